@@ -16,6 +16,7 @@ type Chunk = {
   heading: string;
   url: string;
   markdown: string;
+  alt_urls?: string[];  // Other pages with the same content (scraper --dedup)
   _searchTitle: string;
   _searchHeading: string;
   _searchBody: string;
@@ -391,6 +392,7 @@ function searchChunks(query: string, limit = 10): any[] {
     title: c.title,
     heading: c.heading,
     url: c.url,
+    altUrls: c.alt_urls,
     preview: c.markdown.slice(0, 500) + (c.markdown.length > 500 ? "..." : ""),
     markdown: c.markdown.length <= 1000 ? c.markdown : undefined,
     wordCount: c.markdown.split(/\s+/).length,
@@ -470,6 +472,7 @@ server.registerTool(
       title: c.title,
       heading: c.heading,
       url: c.url,
+      altUrls: c.alt_urls,
       markdown: c.markdown,
       wordCount: c.markdown.split(/\s+/).length,
       keywords: c._keywords.slice(0, 10),
@@ -481,7 +484,7 @@ ${c.markdown}
 
 ---
 Keywords: ${c._keywords.slice(0, 10).join(", ")}
-Source: ${c.url}
+Source: ${c.url}${c.alt_urls?.length ? `\nAlso at: ${c.alt_urls.join(", ")}` : ""}
 ID: ${c.id}`;
 
     return {
@@ -0,0 +1,152 @@
+"""Approximate nearest-neighbour search over chunk vectors (``--ann``).
+
+Brute-force cosine reads every vector for every query, which is fine for one
+manual but grows linearly with the corpus. An inverted-file (IVF) index
+clusters the unit vectors with spherical k-means into about ``4 * sqrt(n)``
+lists. A query is compared with the list centroids first, and only the
+vectors of the ``probes`` closest lists are scored. More probes give better
+recall for more time.
+
+Written to ``embeddings.ivf/`` next to the vectors, every array as a plain
+``.npy`` so it can be memory-mapped:
+
+- ``centroids.npy``: float32 unit centroids, one row per list
+- ``offsets.npy``: where each list starts in ``ids.npy`` / ``vectors.npy``
+- ``ids.npy``: chunk positions (rows of embeddings.npy), grouped by list
+- ``vectors.npy``: the float16 vectors in the same grouped order, so a list
+  is one contiguous slice
+- ``ivf.json``: list count, dimensions and the source checksum
+
+Needs NumPy.
+"""
+import json
+import math
+import pathlib
+import shutil
+
+try:
+    import numpy as np
+except ImportError:  # optional, only needed for --ann
+    np = None
+
+IVF_DIR = "embeddings.ivf"
+FORMAT = "omarchy-ivf"
+FORMAT_VERSION = 1
+_TRAIN_PER_LIST = 64   # k-means trains on at most this many vectors per list
+_ITERATIONS = 10
+_BLOCK = 8192          # rows scored against the centroids at once
+
+
+def default_lists(n: int) -> int:
+    return max(1, min(n, round(4 * math.sqrt(n))))
+
+
+def default_probes(lists: int) -> int:
+    return max(1, min(lists, round(lists / 16)))
+
+
+def top_k(scores, limit: int) -> list[tuple[float, int]]:
+    """``(score, position)`` of the ``limit`` highest scores, best first."""
+    limit = min(limit, len(scores))
+    if limit <= 0:
+        return []
+    top = np.argpartition(-scores, limit - 1)[:limit]
+    top = top[np.argsort(-scores[top], kind="stable")]
+    return [(float(scores[i]), int(i)) for i in top]
+
+
+def _assign(vectors, centroids):
+    """Closest centroid of every row, and its cosine."""
+    labels = np.empty(len(vectors), dtype=np.int64)
+    best = np.empty(len(vectors), dtype=np.float32)
+    for start in range(0, len(vectors), _BLOCK):
+        sims = np.asarray(vectors[start:start + _BLOCK], dtype=np.float32) @ centroids.T
+        labels[start:start + _BLOCK] = sims.argmax(axis=1)
+        best[start:start + _BLOCK] = sims[np.arange(len(sims)), labels[start:start + _BLOCK]]
+    return labels, best
+
+
+def kmeans(vectors, k: int, iterations: int = _ITERATIONS, seed: int = 0):
+    """Spherical k-means: ``k`` unit centroids maximizing the cosine to their members."""
+    rng = np.random.default_rng(seed)
+    centroids = vectors[rng.choice(len(vectors), size=k, replace=False)].copy()
+    for _ in range(iterations):
+        labels, best = _assign(vectors, centroids)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, labels, vectors)
+        counts = np.bincount(labels, minlength=k)
+        empty = np.flatnonzero(counts == 0)
+        if len(empty):
+            # restart empty lists at the vectors their centroids fit worst
+            sums[empty] = vectors[np.argsort(best)[:len(empty)]]
+        norms = np.linalg.norm(sums, axis=1, keepdims=True)
+        centroids = sums / np.where(norms == 0, 1, norms)
+    return centroids.astype(np.float32)
+
+
+def build_ivf(vectors, out_dir, lists: int = 0, source: dict = None, seed: int = 0) -> pathlib.Path:
+    """Cluster ``vectors`` (unit rows) and write the IVF index to ``out_dir``; returns its path."""
+    if np is None:
+        raise RuntimeError("--ann needs NumPy (pip install numpy)")
+    out_dir = pathlib.Path(out_dir)
+    lists = min(lists or default_lists(len(vectors)), len(vectors))
+    rng = np.random.default_rng(seed)
+    train = np.asarray(vectors, dtype=np.float32)
+    if len(train) > lists * _TRAIN_PER_LIST:
+        train = train[np.sort(rng.choice(len(train), size=lists * _TRAIN_PER_LIST, replace=False))]
+    centroids = kmeans(train, lists, seed=seed)
+    labels, _ = _assign(vectors, centroids)
+    order = np.argsort(labels, kind="stable")
+    offsets = np.zeros(lists + 1, dtype=np.int64)
+    offsets[1:] = np.cumsum(np.bincount(labels, minlength=lists))
+
+    tmp = out_dir.with_name(f".{out_dir.name}.tmp")
+    shutil.rmtree(tmp, ignore_errors=True)
+    tmp.mkdir(parents=True)
+    np.save(tmp / "centroids.npy", centroids)
+    np.save(tmp / "offsets.npy", offsets)
+    np.save(tmp / "ids.npy", order.astype(np.int32))
+    np.save(tmp / "vectors.npy", np.asarray(vectors, dtype=np.float16)[order])
+    meta = {
+        "format": FORMAT,
+        "version": FORMAT_VERSION,
+        "vectors": int(len(vectors)),
+        "dims": int(vectors.shape[1]),
+        "lists": int(lists),
+        "source": source or {},
+    }
+    (tmp / "ivf.json").write_text(json.dumps(meta, indent=2) + "\n", encoding="utf-8")
+    shutil.rmtree(out_dir, ignore_errors=True)
+    tmp.rename(out_dir)
+    return out_dir
+
+
+class IVFIndex:
+    """Memory-mapped IVF index written by build_ivf."""
+
+    def __init__(self, path):
+        if np is None:
+            raise RuntimeError("ANN search needs NumPy (pip install numpy)")
+        path = pathlib.Path(path)
+        self.meta = json.loads((path / "ivf.json").read_text(encoding="utf-8"))
+        if self.meta.get("format") != FORMAT or self.meta.get("version") != FORMAT_VERSION:
+            raise ValueError(f"{path}: unsupported IVF format")
+        self.centroids = np.load(path / "centroids.npy", mmap_mode="r")
+        self.offsets = np.load(path / "offsets.npy")
+        self.ids = np.load(path / "ids.npy", mmap_mode="r")
+        self.vectors = np.load(path / "vectors.npy", mmap_mode="r")
+        self.probes = default_probes(len(self.centroids))
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def search(self, query, limit: int = 10, probes: int = 0) -> list[tuple[float, int]]:
+        """``(cosine, chunk position)`` pairs among the ``probes`` closest lists, best first."""
+        probes = min(probes or self.probes, len(self.centroids))
+        if probes <= 0:
+            return []  # empty corpus: no lists
+        nearest = np.argpartition(-(self.centroids @ query), probes - 1)[:probes]
+        spans = [(self.offsets[c], self.offsets[c + 1]) for c in np.sort(nearest)]
+        rows = np.concatenate([self.vectors[lo:hi] for lo, hi in spans]).astype(np.float32)
+        ids = np.concatenate([self.ids[lo:hi] for lo, hi in spans])
+        return [(score, int(ids[i])) for score, i in top_k(rows @ query, limit)]
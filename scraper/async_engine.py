@@ -0,0 +1,75 @@
+"""Asyncio fetch engine for crawl_and_build.
+
+Keeps up to ``concurrency`` fetches in flight by prefetching the URLs that are
+next in the crawl frontier, but hands pages back strictly in crawl order so the
+corpus written by the async engine is identical to the sequential one.
+"""
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+
+async def _fetch_in_order(next_url, upcoming, fetch, concurrency, executor,
+                          process=None, process_pool=None):
+    loop = asyncio.get_running_loop()
+    tasks: dict[str, asyncio.Task] = {}
+
+    async def fetch_one(url):
+        html = await loop.run_in_executor(executor, fetch, url)
+        # processing depends only on (url, html), so it can run ahead of the crawl order
+        processed = await loop.run_in_executor(process_pool, process, url, html) if process else None
+        return html, processed
+
+    def schedule(url):
+        if url not in tasks:
+            tasks[url] = asyncio.ensure_future(fetch_one(url))
+
+    try:
+        while True:
+            url = next_url()
+            if url is None:
+                return
+            schedule(url)
+            # top up the window with whatever the frontier will hand out next
+            for ahead in upcoming():
+                if len(tasks) >= concurrency:
+                    break
+                schedule(ahead)
+
+            task = tasks.pop(url)
+            try:
+                html, processed = await task
+            except Exception as e:
+                yield url, None, None, e
+            else:
+                yield url, html, processed, None
+    finally:
+        for task in tasks.values():
+            task.cancel()
+
+
+def iter_pages(next_url, upcoming, fetch, concurrency=8, process=None, process_pool=None):
+    """Yield ``(url, html, processed, error)`` in crawl order while fetching ahead concurrently.
+
+    ``next_url()`` pops the next URL to crawl (or returns None when done),
+    ``upcoming()`` lists the URLs it would hand out next without consuming them,
+    and ``fetch(url)`` is a blocking call run on a thread pool; politeness is up to
+    ``fetch`` (crawl_and_build passes one that waits on its RateLimiter). If ``process`` is
+    given, ``process(url, html)`` runs on ``process_pool`` as soon as the page
+    arrives and its result is yielded as ``processed`` (otherwise None).
+    """
+    loop = asyncio.new_event_loop()
+    executor = ThreadPoolExecutor(max_workers=max(1, concurrency))
+    loop.set_default_executor(executor)
+    agen = _fetch_in_order(next_url, upcoming, fetch, concurrency, executor,
+                           process, process_pool)
+    try:
+        while True:
+            try:
+                yield loop.run_until_complete(agen.__anext__())
+            except StopAsyncIteration:
+                return
+    finally:
+        loop.run_until_complete(agen.aclose())
+        loop.run_until_complete(asyncio.sleep(0))  # let cancelled tasks settle
+        executor.shutdown(wait=False, cancel_futures=True)
+        loop.close()
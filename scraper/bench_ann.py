@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""Recall and latency of IVF search (ann.py) against exact cosine search.
+
+Runs on the vectors of a built corpus (``--index``, needs ``--embeddings``)
+or on synthetic clustered unit vectors (``--synthetic N``) to model corpora
+larger than one manual. Queries are held-out points near the data. For each
+probe count it prints recall@k against the exact top k, the fraction of
+vectors scanned, and per-query latency percentiles; exact search is the first
+row.
+
+    python3 bench_ann.py --synthetic 100000 --probes 1 4 16 64
+    python3 bench_ann.py --index ../corpus/index.jsonl
+"""
+import argparse
+import pathlib
+import tempfile
+import time
+
+try:
+    import numpy as np
+except ImportError:  # optional, see requirements-optional.txt
+    np = None
+
+import ann
+from embeddings import DEFAULT_DIMS, VECTORS_NAME
+
+
+def synthetic_vectors(n: int, dims: int, topics: int, seed: int = 0):
+    """Unit vectors around ``topics`` random centres of varying spread, like chunks of many documents."""
+    rng = np.random.default_rng(seed)
+    centres = rng.standard_normal((topics, dims), dtype=np.float32)
+    spread = rng.uniform(1.0, 2.0, size=topics).astype(np.float32)
+    which = rng.integers(topics, size=n)
+    vectors = centres[which] + spread[which, None] * rng.standard_normal((n, dims), dtype=np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def near_queries(vectors, count: int, noise: float = 0.5, seed: int = 1):
+    """Perturbed copies of random rows, so every query has real neighbours but no exact match."""
+    rng = np.random.default_rng(seed)
+    base = np.asarray(vectors[rng.choice(len(vectors), size=count)], dtype=np.float32)
+    q = base + noise * rng.standard_normal(base.shape, dtype=np.float32) / np.sqrt(base.shape[1])
+    return q / np.linalg.norm(q, axis=1, keepdims=True)
+
+
+def percentiles(ms: list[float]) -> tuple[float, float, float]:
+    p50, p95, p99 = np.percentile(ms, [50, 95, 99])
+    return float(p50), float(p95), float(p99)
+
+
+def timed(search, queries) -> tuple[list[list[int]], list[float]]:
+    results, ms = [], []
+    for q in queries:
+        start = time.perf_counter()
+        hits = search(q)
+        ms.append((time.perf_counter() - start) * 1000)
+        results.append([pos for _, pos in hits])
+    return results, ms
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Compare IVF search with exact cosine search")
+    src = ap.add_mutually_exclusive_group(required=True)
+    src.add_argument("--index", help="index.jsonl of a corpus built with --embeddings")
+    src.add_argument("--synthetic", type=int, metavar="N", help="Use N synthetic clustered vectors")
+    ap.add_argument("--dims", type=int, default=DEFAULT_DIMS,
+                    help=f"Dimensions of synthetic vectors (default: {DEFAULT_DIMS})")
+    ap.add_argument("--topics", type=int, default=0,
+                    help="Clusters in the synthetic data (default: N/100)")
+    ap.add_argument("--lists", type=int, default=0, help="IVF lists (default: about 4*sqrt(N))")
+    ap.add_argument("--probes", type=int, nargs="+", default=[1, 2, 4, 8, 16, 32, 64],
+                    help="Probe counts to test (default: 1 2 4 8 16 32 64)")
+    ap.add_argument("--queries", type=int, default=500, help="Number of queries (default: 500)")
+    ap.add_argument("-k", type=int, default=10, help="Neighbours per query (default: 10)")
+    args = ap.parse_args()
+    if np is None:
+        ap.error("bench_ann.py needs NumPy (pip install numpy)")
+
+    if args.index:
+        vectors = np.load(pathlib.Path(args.index).with_name(VECTORS_NAME)).astype(np.float32)
+    else:
+        vectors = synthetic_vectors(args.synthetic, args.dims, args.topics or max(1, args.synthetic // 100))
+    queries = near_queries(vectors, args.queries)
+
+    with tempfile.TemporaryDirectory(prefix="omarchy-ann-") as tmp:
+        start = time.perf_counter()
+        path = ann.build_ivf(vectors, pathlib.Path(tmp) / ann.IVF_DIR, args.lists)
+        build_secs = time.perf_counter() - start
+        index = ann.IVFIndex(path)
+        lists = len(index.centroids)
+        print(f"{len(vectors)} vectors x {vectors.shape[1]} dims, {lists} lists "
+              f"(built in {build_secs:.1f}s), {len(queries)} queries, k={args.k}\n")
+
+        exact, exact_ms = timed(lambda q: ann.top_k(vectors @ q, args.k), queries)
+        print(f"{'search':>12} {'recall@' + str(args.k):>10} {'scanned':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}")
+        print(f"{'exact':>12} {1.0:>10.3f} {1.0:>8.1%} " + " ".join(f"{v:>8.3f}" for v in percentiles(exact_ms)))
+        sizes = np.diff(index.offsets)
+        for probes in args.probes:
+            if probes > lists:
+                break
+            found, ms = timed(lambda q: index.search(q, args.k, probes), queries)
+            recall = np.mean([len(set(a) & set(e)) / max(1, len(e)) for a, e in zip(found, exact)])
+            # expected share of vectors in the probed lists, weighting lists by how often queries pick them
+            nearest = np.argsort(-(queries @ index.centroids.T), axis=1)[:, :probes]
+            scanned = sizes[nearest].sum(axis=1).mean() / len(vectors)
+            print(f"{'ivf/' + str(probes):>12} {recall:>10.3f} {scanned:>8.1%} "
+                  + " ".join(f"{v:>8.3f}" for v in percentiles(ms)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""Micro-benchmark for chunk_markdown on pages with many short sections.
+
+Builds synthetic pages shaped like a keybinding reference (one h3 per
+shortcut, a line or two under each) with a growing number of headings, and
+times chunk_markdown on each. With linear chunking the time per heading stays
+flat as the page grows.
+
+``--oversized`` instead times the splitting of sections larger than
+``max_chars`` with split_section against the whitespace word loop it replaced.
+
+    python3 bench_chunker.py --headings 1000 2000 5000 10000
+    python3 bench_chunker.py --oversized --sections 200
+"""
+import argparse
+import random
+import time
+
+from chunking import split_section
+from scrape_and_build_omarchy import chunk_markdown
+
+
+def synthetic_page(headings: int, seed: int = 1) -> str:
+    rng = random.Random(seed)
+    keys = "ABCDEFGHIJKLMNOPQRSTUVWXYZ"
+    parts = ["# Keybindings", "Every shortcut available in the desktop."]
+    for i in range(headings):
+        level = "##" if i % 25 == 0 else "###"
+        parts.append(f"{level} Super + {rng.choice(keys)} ({i})")
+        parts.append(" ".join(rng.choice(("open", "close", "move", "the", "window", "workspace", "launcher"))
+                              for _ in range(rng.randint(4, 12))))
+        if rng.random() < 0.1:
+            parts.append("```\nbind = SUPER, Q, killactive\n```")
+    return "\n\n".join(parts)
+
+
+def oversized_sections(count: int, seed: int = 1) -> list[str]:
+    """Sections of ~6-10k characters mixing paragraphs, list items and code blocks."""
+    rng = random.Random(seed)
+    vocab = ("install", "the", "theme", "with", "pacman", "and", "restart", "waybar", "for", "your", "monitor")
+    sections = []
+    for i in range(count):
+        parts = [f"## Section {i}"]
+        while sum(map(len, parts)) < rng.randint(6000, 10000):
+            kind = rng.random()
+            if kind < 0.2:
+                parts.append("```\n" + "\n".join(f"yay -S {rng.choice(vocab)}-{n}" for n in range(rng.randint(3, 30)))
+                             + "\n```")
+            elif kind < 0.4:
+                parts.append("- " + " ".join(rng.choice(vocab) for _ in range(rng.randint(5, 20))))
+            else:
+                parts.append(" ".join(rng.choice(vocab) for _ in range(rng.randint(20, 120))) + ".")
+        sections.append("\n\n".join(parts))
+    return sections
+
+
+def word_split(sec: str, max_chars: int) -> list[str]:
+    """The whitespace word loop chunk_markdown used for oversized sections before split_section."""
+    out, current, size = [], [], 0
+    for word in sec.split():
+        if size + len(word) + 1 > max_chars and current:
+            out.append(" ".join(current))
+            current, size = [], 0
+        current.append(word)
+        size += len(word) + 1
+    if current:
+        out.append(" ".join(current))
+    return out
+
+
+def bench_oversized(args) -> None:
+    sections = oversized_sections(args.sections)
+    chars = sum(map(len, sections))
+    print(f"{len(sections)} sections, {chars} chars, max_chars={args.max_chars}")
+    for name, split in (("word loop", word_split), ("split_section", split_section)):
+        pieces = sum(len(split(sec, args.max_chars)) for sec in sections)
+        secs = best_of(lambda: [split(sec, args.max_chars) for sec in sections], args.repeat)
+        print(f"  {name:<14} {secs * 1000:8.2f}ms  {chars / secs / 1e6:6.1f} MB/s  {pieces} chunks")
+
+
+def best_of(fn, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Time chunk_markdown against the number of headings on a page")
+    ap.add_argument("--headings", type=int, nargs="+", default=[1000, 2000, 5000, 10000],
+                    help="Heading counts to test (default: 1000 2000 5000 10000)")
+    ap.add_argument("--min-words", type=int, default=30,
+                    help="chunk_markdown's small-section threshold; larger values buffer more sections (default: 30)")
+    ap.add_argument("--oversized", action="store_true",
+                    help="Benchmark splitting of oversized sections instead of many small ones")
+    ap.add_argument("--sections", type=int, default=200, help="Oversized sections with --oversized (default: 200)")
+    ap.add_argument("--max-chars", type=int, default=2500, help="Chunk size with --oversized (default: 2500)")
+    ap.add_argument("--repeat", type=int, default=5, help="Runs per size; the best is reported (default: 5)")
+    args = ap.parse_args()
+    if args.oversized:
+        bench_oversized(args)
+        return
+
+    print(f"{'headings':>9} {'chars':>10} {'chunks':>7} {'ms':>9} {'us/heading':>11}")
+    per_heading = []
+    for n in args.headings:
+        md = synthetic_page(n)
+        run = lambda: list(chunk_markdown(md, "Keybindings", "https://example.invalid/keys",
+                                          min_words=args.min_words))
+        chunks = run()
+        secs = best_of(run, args.repeat)
+        per_heading.append(secs / n)
+        print(f"{n:>9} {len(md):>10} {len(chunks):>7} {secs * 1000:>9.2f} {secs / n * 1e6:>11.2f}")
+
+    if len(per_heading) > 1:
+        # ~1.0 means linear scaling; quadratic buffering grows with the size ratio
+        print(f"\nCost per heading, largest vs smallest page: {per_heading[-1] / per_heading[0]:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+"""Offline crawl benchmark against a synthetic manual served from localhost.
+
+Starts fixture_site.py in a child process, runs crawl_and_build against it and
+reports pages/s, chunks/s, peak RSS and the time spent per pipeline stage. The
+result is written as JSON; pass an earlier result to --compare to see the
+change between versions.
+
+    python3 bench_crawl.py --pages 300 --latency-ms 20 --engine async --out bench.json
+    python3 bench_crawl.py --pages 300 --latency-ms 20 --engine async --compare bench.json
+"""
+import argparse
+import contextlib
+import io
+import json
+import multiprocessing
+import pathlib
+import platform
+import resource
+import sys
+import tempfile
+import time
+
+import fixture_site
+from metrics import STAGES
+from scrape_and_build_omarchy import PARSERS, crawl_and_build
+from seeding import SEEDS
+
+BENCH_VERSION = 1
+
+
+def _serve(site, ready):
+    server = fixture_site.serve(site)
+    ready.put(server.server_port)
+    server.serve_forever()
+
+
+@contextlib.contextmanager
+def running_site(site: fixture_site.SyntheticManual):
+    """Serve ``site`` from a child process so it does not compete for the crawler's GIL."""
+    ready = multiprocessing.Queue()
+    proc = multiprocessing.Process(target=_serve, args=(site, ready), daemon=True)
+    proc.start()
+    try:
+        port = ready.get(timeout=10)
+        yield f"http://127.0.0.1:{port}{fixture_site.ROOT_PATH}/"
+    finally:
+        proc.terminate()
+        proc.join()
+
+
+def _rss_mb(who) -> float:
+    rss = resource.getrusage(who).ru_maxrss
+    # kilobytes on Linux, bytes on macOS
+    return rss / (1024 * 1024) if sys.platform == "darwin" else rss / 1024
+
+
+def run_bench(site: fixture_site.SyntheticManual, crawl_options: dict, warm_cache: bool = False) -> dict:
+    with tempfile.TemporaryDirectory(prefix="omarchy-bench-") as tmp, running_site(site) as root:
+        tmp = pathlib.Path(tmp)
+        options = dict(crawl_options, max_pages=site.pages + 1)
+        if warm_cache:
+            options["cache_dir"] = tmp / "http-cache"
+            with contextlib.redirect_stdout(io.StringIO()):
+                crawl_and_build(root, tmp / "warmup", **options)
+
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            summary = crawl_and_build(root, tmp / "corpus", **options)
+        wall = time.perf_counter() - start
+        # max over joined child processes (pool workers), not the still-running site
+        children_rss = _rss_mb(resource.RUSAGE_CHILDREN)
+
+    return {
+        "pages": summary["pages"],
+        "chunks": summary["chunks"],
+        "wall_s": round(wall, 4),
+        "pages_per_s": round(summary["pages"] / wall, 2) if wall else 0.0,
+        "chunks_per_s": round(summary["chunks"] / wall, 2) if wall else 0.0,
+        "peak_rss_mb": round(_rss_mb(resource.RUSAGE_SELF), 1),
+        "peak_rss_children_mb": round(children_rss, 1),
+        "stages_s": {k: round(v, 4) for k, v in summary["stages"].items()},
+        "cache": summary["cache"],
+        "retried": summary["retries"]["retried"],
+        "failed": len(summary["retries"]["failed"]),
+    }
+
+
+def print_report(result: dict) -> None:
+    r = result["results"]
+    print(f"Pages:   {r['pages']} in {r['wall_s']:.2f}s  ({r['pages_per_s']:.1f} pages/s)")
+    print(f"Chunks:  {r['chunks']}  ({r['chunks_per_s']:.1f} chunks/s)")
+    if r.get("retried") or r.get("failed"):
+        print(f"Retries: {r['retried']} retried, {r['failed']} pages failed")
+    print(f"Peak RSS: {r['peak_rss_mb']:.1f} MB (child processes {r['peak_rss_children_mb']:.1f} MB)")
+    total = sum(r["stages_s"].values()) or 1.0
+    print("Stages (summed over pages; concurrent fetches overlap):")
+    for stage in STAGES:
+        secs = r["stages_s"].get(stage, 0.0)
+        print(f"  {stage:<8} {secs:8.3f}s  {100 * secs / total:5.1f}%")
+
+
+def print_comparison(result: dict, baseline: dict) -> None:
+    new, old = result["results"], baseline["results"]
+    print(f"\nvs {baseline.get('label') or 'baseline'}:")
+    for key in ("pages_per_s", "chunks_per_s", "peak_rss_mb"):
+        if old.get(key):
+            print(f"  {key:<13} {old[key]:>10} -> {new[key]:>10}  ({100 * (new[key] - old[key]) / old[key]:+.1f}%)")
+    for stage in STAGES:
+        a, b = old["stages_s"].get(stage, 0.0), new["stages_s"].get(stage, 0.0)
+        if a:
+            print(f"  {stage:<13} {a:>9.3f}s -> {b:>9.3f}s  ({100 * (b - a) / a:+.1f}%)")
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Benchmark crawl_and_build against a local synthetic manual")
+    fixture_site.add_site_arguments(ap)
+    ap.add_argument("--engine", choices=("sync", "async"), default="async", help="Fetch engine (default: async)")
+    ap.add_argument("--concurrency", type=int, default=8, help="Fetches in flight with --engine async (default: 8)")
+    ap.add_argument("--workers", type=int, default=1, help="Parse/chunk processes (default: 1)")
+    ap.add_argument("--parser", choices=PARSERS, default="bs4", help="HTML extractor (default: bs4)")
+    ap.add_argument("--seed-from", choices=SEEDS, default="none",
+                    help="Queue the fixture's sitemap.xml or llms.txt URLs up front (default: none)")
+    ap.add_argument("--warm-cache", action="store_true",
+                    help="Crawl once to fill an HTTP cache, then measure a revalidating rebuild")
+    ap.add_argument("--label", default="", help="Free-form label stored in the result (e.g. a git revision)")
+    ap.add_argument("--out", default=None, help="Write the result JSON here")
+    ap.add_argument("--compare", default=None, help="Earlier result JSON to compare against")
+    args = ap.parse_args()
+
+    site = fixture_site.site_from_args(args)
+    crawl_options = {
+        "wait_sec": 0.0,
+        "engine": args.engine,
+        "concurrency": args.concurrency,
+        "host_rate": 0.0,  # no rate ceiling against localhost
+        "parser": args.parser,
+        "workers": args.workers,
+        "seed_from": args.seed_from,
+    }
+    result = {
+        "version": BENCH_VERSION,
+        "label": args.label,
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "site": {k: getattr(site, k) for k in ("pages", "links", "words", "nav_links", "chapter_size",
+                                                 "latency_ms", "seed", "error_rate")},
+        "options": dict(crawl_options, warm_cache=args.warm_cache),
+        "results": run_bench(site, crawl_options, warm_cache=args.warm_cache),
+    }
+
+    print_report(result)
+    if args.compare:
+        print_comparison(result, json.loads(pathlib.Path(args.compare).read_text(encoding="utf-8")))
+    if args.out:
+        pathlib.Path(args.out).write_text(json.dumps(result, indent=2) + "\n", encoding="utf-8")
+        print(f"\nSaved: {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+"""Crawl checkpoints for resuming an interrupted build (``--resume``).
+
+Between pages, crawl_and_build periodically saves what it needs to carry on:
+the frontier (queue and every URL ever enqueued), the page and chunk counts,
+the length of index.jsonl after the last finished page, and the manifest
+records so far. The state file is written to a temporary name, fsynced and
+renamed over ``crawl-state.json``, so a crash leaves the previous checkpoint
+intact. A resumed build truncates index.jsonl back to the saved length and
+continues from the saved frontier; pages finished before the checkpoint are
+not fetched again. The file is deleted once the build completes.
+"""
+import json
+import os
+import pathlib
+import time
+from typing import Optional
+
+STATE_NAME = "crawl-state.json"
+STATE_VERSION = 1
+
+
+class Checkpointer:
+    """Saves and loads the crawl state of one build directory.
+
+    ``key`` identifies the crawl (root, order, builder, ...); a state saved
+    under a different key is ignored rather than resumed. ``interval`` is the
+    minimum number of seconds between checkpoints.
+    """
+
+    def __init__(self, build_dir: pathlib.Path, key: dict, interval: float = 10.0):
+        self.path = pathlib.Path(build_dir) / STATE_NAME
+        self.key = key
+        self.interval = interval
+        self.saves = 0
+        self.seconds = 0.0
+        self._last = time.monotonic()
+
+    def load(self) -> Optional[dict]:
+        try:
+            state = json.loads(self.path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return None
+        if state.get("version") != STATE_VERSION or state.get("key") != self.key:
+            return None
+        return state
+
+    def due(self) -> bool:
+        return time.monotonic() - self._last >= self.interval
+
+    def save(self, state: dict) -> None:
+        start = time.perf_counter()
+        tmp = self.path.with_name(f".{self.path.name}.tmp")
+        with tmp.open("w", encoding="utf-8") as f:
+            json.dump({"version": STATE_VERSION, "key": self.key, **state}, f, ensure_ascii=False)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self.path)
+        self.saves += 1
+        self.seconds += time.perf_counter() - start
+        self._last = time.monotonic()
+
+    def clear(self) -> None:
+        self.path.unlink(missing_ok=True)
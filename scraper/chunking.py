@@ -0,0 +1,209 @@
+"""Token-budgeted chunking (``--chunking tokens``).
+
+The page Markdown from html_to_markdown is split into blocks: headings,
+paragraphs, list items and fenced code. Blocks are packed greedily into chunks
+of at most ``max_tokens`` estimated tokens, and each chunk repeats the last
+``overlap_tokens`` worth of blocks from the one before it. A block that is
+larger than the budget on its own is split at line (code) or sentence
+(prose) boundaries, and only then at words. Fences are never left open.
+"""
+import hashlib
+import re
+
+CHUNKINGS = ("sections", "tokens")
+FENCE = "```"
+_TOKEN = re.compile(r"\w+|[^\w\s]")
+_HEADING = re.compile(r"#{1,6}\s")
+_LIST_ITEM = re.compile(r"(?:[-*+]|\d+[.)])\s")
+_SENTENCE_END = re.compile(r"(?<=[.!?:;])\s+")
+
+
+def sha16(s: str) -> str:
+    """First 16 hex digits of the SHA-1 of ``s``; chunk ids and page keys."""
+    return hashlib.sha1(s.encode("utf-8")).hexdigest()[:16]
+
+
+def chunk_id(url: str, heading_path: str, markdown: str, used: set) -> str:
+    """Content-addressed id: URL + heading path + a fingerprint of the chunk text.
+
+    Editing one part of a page leaves the ids of all other chunks alone. Chunks
+    that would share an id (the same text repeated under the same heading)
+    take the next free id in sequence, so ids stay unique within the page.
+    """
+    key = f"{url}|{heading_path}|{hashlib.sha1(markdown.encode('utf-8')).hexdigest()}"
+    cid = sha16(key)
+    n = 1
+    while cid in used:
+        n += 1
+        cid = sha16(f"{key}|{n}")
+    used.add(cid)
+    return cid
+
+
+def estimate_tokens(text: str) -> int:
+    """Approximate BPE token count: one per punctuation mark, one per ~4 word characters."""
+    return sum((len(t) + 3) // 4 for t in _TOKEN.findall(text))
+
+
+def split_blocks(md: str) -> list[tuple[str, str]]:
+    """Split Markdown into ``(kind, text)`` blocks; kind is heading, code, item or para."""
+    blocks = []
+    para: list[str] = []
+    fence: list[str] = []
+
+    def end_para():
+        if para:
+            blocks.append(("para", "\n".join(para)))
+            para.clear()
+
+    for line in md.split("\n"):
+        if fence:
+            fence.append(line)
+            if line.strip() == FENCE:
+                blocks.append(("code", "\n".join(fence)))
+                fence = []
+        elif line.startswith(FENCE):
+            end_para()
+            fence = [line]
+        elif not line.strip():
+            end_para()
+        elif _HEADING.match(line):
+            end_para()
+            blocks.append(("heading", line.strip()))
+        elif _LIST_ITEM.match(line):
+            end_para()
+            blocks.append(("item", line.strip()))
+        else:
+            para.append(line.strip())
+    end_para()
+    if fence:
+        # unterminated fence: close it rather than leak it into the next chunk
+        blocks.append(("code", "\n".join(fence + [FENCE])))
+    return blocks
+
+
+def _pack(units: list[str], budget: int, count, sep: str) -> list[str]:
+    out, current, size = [], [], 0
+    for unit in units:
+        n = count(unit)
+        if current and size + n > budget:
+            out.append(sep.join(current))
+            current, size = [], 0
+        current.append(unit)
+        size += n
+    if current:
+        out.append(sep.join(current))
+    return out
+
+
+def _split_words(text: str, budget: int, count) -> list[str]:
+    return _pack(text.split(), budget, count, " ")
+
+
+def split_oversized(kind: str, text: str, budget: int, count=estimate_tokens) -> list[str]:
+    """Split one block that exceeds ``budget`` into pieces that fit it."""
+    if kind == "code":
+        lines = text.split("\n")[1:-1]  # drop the fences, re-add them per piece
+        inner = max(1, budget - 2 * count(FENCE))
+        pieces = []
+        for line in lines:
+            pieces.extend(_split_words(line, inner, count) if count(line) > inner else [line])
+        return [f"{FENCE}\n{body}\n{FENCE}" for body in _pack(pieces, inner, count, "\n")]
+    units = []
+    for sentence in _SENTENCE_END.split(text):
+        units.extend(_split_words(sentence, budget, count) if count(sentence) > budget else [sentence])
+    return _pack(units, budget, count, " ")
+
+
+def split_section(sec: str, max_chars: int) -> list[str]:
+    """Split one oversized h2/h3 section into pieces of about ``max_chars``.
+
+    Breaks only between blocks, so newlines and fenced code survive; a code
+    block is never cut, even when it alone exceeds ``max_chars``. Every piece
+    starts with the section's heading line so continuations keep their context.
+    Prose blocks that are too large on their own fall back to sentences, then words.
+    """
+    blocks = split_blocks(sec)
+    head = blocks[0][1] if blocks and blocks[0][0] == "heading" else ""
+    if head:
+        blocks = blocks[1:]
+    size = lambda text: len(text) + 2  # the blank line that joins it to the next block
+    budget = max(max_chars - size(head), max_chars // 2) if head else max_chars
+    units = []
+    for kind, text in blocks:
+        if kind != "code" and len(text) > budget:
+            units.extend(split_oversized(kind, text, budget, count=lambda t: len(t) + 1))
+        else:
+            units.append(text)
+    pieces = _pack(units, budget, size, "\n\n") or [""]
+    return [f"{head}\n\n{piece}".strip() if head else piece for piece in pieces]
+
+
+def chunk_by_tokens(md: str, title: str, url: str, max_tokens=512, overlap_tokens=64, count=estimate_tokens):
+    """Chunk page Markdown by an approximate token budget with overlapping windows.
+
+    Yields chunk dicts like chunk_markdown. ``heading`` is the h2/h3 in effect
+    where the chunk's new (non-overlap) content starts.
+    """
+    overlap_tokens = max(0, min(overlap_tokens, max_tokens // 2))
+    pieces = []  # (kind, text, tokens, heading, heading_path)
+    h2 = h3 = ""
+    for kind, text in split_blocks(md):
+        if kind == "heading":
+            level = len(text) - len(text.lstrip("#"))
+            name = text.lstrip("#").strip()
+            if level <= 2:
+                h2, h3 = (name if level == 2 else ""), ""
+            elif level == 3:
+                h3 = name
+        heading = h3 or h2
+        path = f"{h2} > {h3}" if h2 and h3 else heading
+        n = count(text)
+        if n <= max_tokens:
+            pieces.append((kind, text, n, heading, path))
+        else:
+            for part in split_oversized(kind, text, max_tokens, count):
+                pieces.append((kind, part, count(part), heading, path))
+
+    used_ids = set()
+    window, size, first_new = [], 0, 0
+
+    def emit(blocks, first):
+        _, _, _, heading, path = blocks[first]
+        markdown = "\n\n".join(b[1] for b in blocks)
+        return {
+            "id": chunk_id(url, path, markdown, used_ids),
+            "title": title,
+            "heading": heading,
+            "url": url,
+            "markdown": markdown,
+        }
+
+    for piece in pieces:
+        if size + piece[2] > max_tokens and len(window) > first_new:
+            # don't end a chunk on a heading whose content starts the next one; outer
+            # headings that would push the next chunk over budget stay in this one
+            carry, pending = [], piece[2]
+            while len(window) - len(carry) > first_new + 1:
+                block = window[-1 - len(carry)]
+                if block[0] != "heading" or pending + block[2] > max_tokens:
+                    break
+                carry.insert(0, block)
+                pending += block[2]
+            body = window[:len(window) - len(carry)]
+            yield emit(body, first_new)
+
+            keep, kept = [], 0
+            for block in reversed(body):
+                if kept + block[2] > overlap_tokens:
+                    break
+                keep.insert(0, block)
+                kept += block[2]
+            while keep and kept + pending > max_tokens:
+                kept -= keep.pop(0)[2]
+            window, size, first_new = keep + carry, kept + pending - piece[2], len(keep)
+        window.append(piece)
+        size += piece[2]
+
+    if len(window) > first_new:
+        yield emit(window, first_new)
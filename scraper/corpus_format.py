@@ -0,0 +1,251 @@
+#!/usr/bin/env python3
+"""Compressed and columnar exports of index.jsonl (``--format``).
+
+``jsonl.gz`` / ``jsonl.zst`` store the chunks as independently compressed
+frames of ``FRAME_CHUNKS`` lines each, and a small frame index next to the
+data file records where every frame starts. A reader can seek straight to a
+chunk by its position without decompressing what comes before it, and the
+file as a whole is still a valid gzip / zstd stream (``zcat``, ``zstdcat``).
+
+``columnar`` writes a directory with the metadata (ids, urls, titles,
+headings) in ``columns.json`` and the Markdown bodies in a framed
+``bodies.jsonl.gz``, so loaders can list or filter chunks without
+decompressing any bodies.
+
+    python3 corpus_format.py ../corpus/index.jsonl --format columnar
+"""
+import argparse
+import gzip
+import json
+import os
+import pathlib
+import shutil
+from typing import Optional
+
+from search_index import file_sha256
+
+try:
+    import zstandard
+except ImportError:  # optional, only needed for --format jsonl.zst
+    zstandard = None
+
+FORMATS = ("jsonl", "jsonl.gz", "jsonl.zst", "columnar")
+FRAME_FORMAT = "omarchy-framed-jsonl"
+COLUMNS_FORMAT = "omarchy-columnar"
+FORMAT_VERSION = 1
+FRAME_CHUNKS = 256
+COLUMNS_DIR = "index.columns"
+
+
+def available(fmt: str) -> bool:
+    return fmt != "jsonl.zst" or zstandard is not None
+
+
+def _compress(codec: str, data: bytes) -> bytes:
+    if codec == "gzip":
+        return gzip.compress(data, compresslevel=6, mtime=0)  # mtime=0 keeps output byte-stable
+    return zstandard.ZstdCompressor(level=10).compress(data)
+
+
+def _decompress(codec: str, data: bytes) -> bytes:
+    if codec == "gzip":
+        return gzip.decompress(data)
+    return zstandard.ZstdDecompressor().decompress(data)
+
+
+def _atomic_write(path: pathlib.Path, data: bytes) -> None:
+    tmp = path.with_name(f".{path.name}.tmp")
+    tmp.write_bytes(data)
+    os.replace(tmp, path)
+
+
+def frame_index_path(data_path) -> pathlib.Path:
+    data_path = pathlib.Path(data_path)
+    return data_path.with_name(data_path.name + ".idx")
+
+
+def write_framed(lines: list[str], out_path, codec: str = "gzip", frame_chunks: int = FRAME_CHUNKS,
+                 source: Optional[dict] = None) -> pathlib.Path:
+    """Write JSONL ``lines`` (newline-terminated) as compressed frames plus a frame index."""
+    out_path = pathlib.Path(out_path)
+    frames, blobs, offset = [], [], 0
+    for start in range(0, len(lines), frame_chunks):
+        blob = _compress(codec, "".join(lines[start:start + frame_chunks]).encode("utf-8"))
+        frames.append([offset, len(blob)])
+        blobs.append(blob)
+        offset += len(blob)
+    index = {
+        "format": FRAME_FORMAT,
+        "version": FORMAT_VERSION,
+        "codec": codec,
+        "frame_chunks": frame_chunks,
+        "chunks": len(lines),
+        "frames": frames,
+        "source": source,
+    }
+    _atomic_write(out_path, b"".join(blobs))
+    _atomic_write(frame_index_path(out_path), (json.dumps(index) + "\n").encode("utf-8"))
+    return out_path
+
+
+class FramedReader:
+    """Random access to a framed JSONL file by chunk position."""
+
+    def __init__(self, path):
+        self.path = pathlib.Path(path)
+        self.index = json.loads(frame_index_path(self.path).read_text(encoding="utf-8"))
+        if self.index.get("format") != FRAME_FORMAT:
+            raise ValueError(f"{self.path}: not a framed JSONL file")
+        self.codec = self.index["codec"]
+        self.frame_chunks = self.index["frame_chunks"]
+        self._frame_no: Optional[int] = None
+        self._frame: list[str] = []
+
+    def __len__(self) -> int:
+        return self.index["chunks"]
+
+    def _load(self, frame_no: int) -> list[str]:
+        if frame_no != self._frame_no:
+            offset, length = self.index["frames"][frame_no]
+            with self.path.open("rb") as f:
+                f.seek(offset)
+                data = _decompress(self.codec, f.read(length))
+            # not splitlines(): ensure_ascii=False JSON may hold a raw U+2028
+            self._frame_no, self._frame = frame_no, data.decode("utf-8").split("\n")[:-1]
+        return self._frame
+
+    def __getitem__(self, i: int) -> dict:
+        if not 0 <= i < len(self):
+            raise IndexError(i)
+        return json.loads(self._load(i // self.frame_chunks)[i % self.frame_chunks])
+
+    def __iter__(self):
+        for frame_no in range(len(self.index["frames"])):
+            for line in self._load(frame_no):
+                yield json.loads(line)
+
+
+def _dictionary(values: list[str]) -> tuple[list[str], list[int]]:
+    table, codes = {}, []
+    for v in values:
+        codes.append(table.setdefault(v, len(table)))
+    return list(table), codes
+
+
+def write_columnar(chunks: list[dict], out_dir, frame_chunks: int = FRAME_CHUNKS,
+                   source: Optional[dict] = None) -> pathlib.Path:
+    """Write chunk metadata as columns and the Markdown bodies as a separate framed file.
+
+    urls and titles repeat for every chunk of a page, so they are stored once
+    in a table and referenced by position.
+    """
+    out_dir = pathlib.Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    urls, url_codes = _dictionary([c["url"] for c in chunks])
+    titles, title_codes = _dictionary([c["title"] for c in chunks])
+    columns = {
+        "format": COLUMNS_FORMAT,
+        "version": FORMAT_VERSION,
+        "chunks": len(chunks),
+        "id": [c["id"] for c in chunks],
+        "heading": [c["heading"] for c in chunks],
+        "url_table": urls,
+        "url": url_codes,
+        "title_table": titles,
+        "title": title_codes,
+        "bodies": "bodies.jsonl.gz",
+        "source": source,
+    }
+    _atomic_write(out_dir / "columns.json", (json.dumps(columns, ensure_ascii=False) + "\n").encode("utf-8"))
+    bodies = [json.dumps(c["markdown"], ensure_ascii=False) + "\n" for c in chunks]
+    write_framed(bodies, out_dir / "bodies.jsonl.gz", "gzip", frame_chunks)
+    return out_dir
+
+
+class ColumnarReader:
+    """Chunk metadata from a columnar export; bodies are decompressed only on request."""
+
+    def __init__(self, path):
+        self.dir = pathlib.Path(path)
+        self.columns = json.loads((self.dir / "columns.json").read_text(encoding="utf-8"))
+        if self.columns.get("format") != COLUMNS_FORMAT:
+            raise ValueError(f"{self.dir}: not a columnar corpus")
+        self._bodies: Optional[FramedReader] = None
+
+    def __len__(self) -> int:
+        return self.columns["chunks"]
+
+    def metadata(self, i: int) -> dict:
+        c = self.columns
+        return {
+            "id": c["id"][i],
+            "title": c["title_table"][c["title"][i]],
+            "heading": c["heading"][i],
+            "url": c["url_table"][c["url"][i]],
+        }
+
+    def markdown(self, i: int) -> str:
+        if self._bodies is None:
+            self._bodies = FramedReader(self.dir / self.columns["bodies"])
+        return self._bodies[i]
+
+    def __getitem__(self, i: int) -> dict:
+        return dict(self.metadata(i), markdown=self.markdown(i))
+
+
+def export_path(index_path, fmt: str) -> pathlib.Path:
+    """Where the ``fmt`` export of ``index_path`` is written."""
+    index_path = pathlib.Path(index_path)
+    if fmt == "columnar":
+        return index_path.with_name(COLUMNS_DIR)
+    return index_path.with_name(index_path.name + fmt[len("jsonl"):])
+
+
+def remove_exports(index_path, keep: Optional[str] = None) -> None:
+    """Delete the exports next to ``index_path`` in every format but ``keep``."""
+    for fmt in FORMATS[1:]:
+        if fmt == keep:
+            continue
+        path = export_path(index_path, fmt)
+        if fmt == "columnar":
+            shutil.rmtree(path, ignore_errors=True)
+        else:
+            path.unlink(missing_ok=True)
+            frame_index_path(path).unlink(missing_ok=True)
+
+
+def export(index_path, fmt: str) -> Optional[pathlib.Path]:
+    """Write ``index_path`` in ``fmt`` next to it and drop exports in other formats left by
+    earlier builds; returns the written path (None for plain jsonl)."""
+    index_path = pathlib.Path(index_path)
+    if not available(fmt):
+        raise RuntimeError(f"--format {fmt} needs the zstandard package (pip install zstandard)")
+    remove_exports(index_path, keep=fmt)
+    if fmt == "jsonl":
+        return None
+    with index_path.open(encoding="utf-8") as f:
+        lines = [line if line.endswith("\n") else line + "\n" for line in f if line.strip()]
+    # lets loaders tell whether an export is stale relative to index.jsonl
+    source = {"file": index_path.name, "sha256": file_sha256(index_path)}
+    if fmt == "columnar":
+        return write_columnar([json.loads(line) for line in lines], export_path(index_path, fmt), source=source)
+    codec = "gzip" if fmt == "jsonl.gz" else "zstd"
+    return write_framed(lines, export_path(index_path, fmt), codec, source=source)
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Export index.jsonl as framed compressed JSONL or columnar files")
+    ap.add_argument("index", help="Path to index.jsonl")
+    ap.add_argument("--format", choices=FORMATS[1:], default="jsonl.gz", help="Output format (default: jsonl.gz)")
+    args = ap.parse_args()
+    if not available(args.format):
+        ap.error(f"--format {args.format} needs the zstandard package (pip install zstandard)")
+
+    src = pathlib.Path(args.index)
+    out = export(src, args.format)
+    size = sum(p.stat().st_size for p in out.rglob("*")) if out.is_dir() else out.stat().st_size
+    print(f"Wrote {out} ({size / 1024:.0f} KiB, source {src.stat().st_size / 1024:.0f} KiB)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+"""Near-duplicate chunk removal for index.jsonl (``--dedup``).
+
+Manual pages repeat boilerplate (install notes, shortcut tables), so the same
+chunk text shows up under several URLs. Each chunk's Markdown is reduced to
+word 3-shingles and fingerprinted with a 64-value MinHash (one-permutation
+hashing: every shingle is hashed once and lands in one of the 64 bins).
+Locality-sensitive hashing over bands of the signature yields candidate pairs,
+which are then confirmed with the exact Jaccard similarity of their shingle
+sets.
+
+Chunks are visited in index order. A chunk at least ``threshold`` similar to
+an earlier kept chunk is dropped, and its URL is added to the kept chunk's
+``alt_urls``. Dropped chunks are written to ``index-duplicates.jsonl`` with a
+``duplicate_of`` id, so incremental rebuilds can still reuse them.
+
+    python3 dedup.py ../corpus/index.jsonl --threshold 0.9
+"""
+import argparse
+import hashlib
+import json
+import os
+import pathlib
+import re
+
+DUPLICATES_NAME = "index-duplicates.jsonl"
+NUM_HASHES = 64
+SHINGLE = 3
+_EMPTY = (1 << 64) - 1
+_WORD = re.compile(r"\w+")
+
+
+def shingles(text: str) -> set[str]:
+    # every word and number counts: "Page 1" and "Page 10" must not look alike
+    w = _WORD.findall(text.lower())
+    if len(w) <= SHINGLE:
+        return {" ".join(w)} if w else set()
+    return {" ".join(w[i:i + SHINGLE]) for i in range(len(w) - SHINGLE + 1)}
+
+
+def _hash64(s: str) -> int:
+    return int.from_bytes(hashlib.blake2b(s.encode("utf-8"), digest_size=8).digest(), "big")
+
+
+def minhash(shingle_set: set[str], k: int = NUM_HASHES) -> list[int]:
+    """One-permutation MinHash signature of ``k`` values, densified by rotation."""
+    bins = [_EMPTY] * k
+    for s in shingle_set:
+        h = _hash64(s)
+        b, v = h % k, h // k
+        if v < bins[b]:
+            bins[b] = v
+    if len(shingle_set) == 0:
+        return bins
+    signature = list(bins)
+    for i in range(k):
+        if bins[i] == _EMPTY:
+            # borrow the next filled bin's value, tagged with the distance (negative, so
+            # it can never equal a real minimum)
+            j = 1
+            while bins[(i + j) % k] == _EMPTY:
+                j += 1
+            signature[i] = -(bins[(i + j) % k] * k + j) - 1
+    return signature
+
+
+def lsh_bands(threshold: float, k: int = NUM_HASHES) -> int:
+    """Rows per band: the largest whose LSH threshold (1/b)^(1/r) stays below ``threshold``."""
+    best = 1
+    for rows in (1, 2, 4, 8, 16, 32, 64):
+        if rows <= k and (rows / k) ** (1 / rows) <= threshold:
+            best = rows
+    return best
+
+
+def jaccard(a: set, b: set) -> float:
+    if not a and not b:
+        return 1.0
+    return len(a & b) / len(a | b)
+
+
+def raw_chunk(chunk: dict) -> dict:
+    """The chunk as chunk_markdown wrote it, without what dedup adds."""
+    return {k: v for k, v in chunk.items() if k not in ("alt_urls", "duplicate_of")}
+
+
+def dedup_chunks(chunks: list[dict], threshold: float = 0.9) -> tuple[list[dict], list[dict]]:
+    """Split ``chunks`` into (kept, dropped); kept chunks gain ``alt_urls`` where they absorbed others."""
+    rows = lsh_bands(threshold)
+    buckets: list[dict[tuple, list[int]]] = [{} for _ in range(NUM_HASHES // rows)]
+    kept: list[dict] = []
+    kept_shingles: list[set[str]] = []
+    dropped: list[dict] = []
+    for chunk in chunks:
+        chunk = raw_chunk(chunk)
+        sh = shingles(chunk.get("markdown", ""))
+        sig = minhash(sh)
+        keys = [tuple(sig[i * rows:(i + 1) * rows]) for i in range(len(buckets))]
+        match = None
+        seen = set()
+        for band, key in zip(buckets, keys):
+            for idx in band.get(key, ()):
+                if idx not in seen:
+                    seen.add(idx)
+                    if jaccard(sh, kept_shingles[idx]) >= threshold and (match is None or idx < match):
+                        match = idx
+        if match is not None:
+            canonical = kept[match]
+            if chunk["url"] != canonical["url"] and chunk["url"] not in canonical.get("alt_urls", ()):
+                canonical.setdefault("alt_urls", []).append(chunk["url"])
+            dropped.append(dict(chunk, duplicate_of=canonical["id"]))
+            continue
+        for band, key in zip(buckets, keys):
+            band.setdefault(key, []).append(len(kept))
+        kept.append(chunk)
+        kept_shingles.append(sh)
+    return kept, dropped
+
+
+def _write_lines(path: pathlib.Path, chunks: list[dict]) -> None:
+    tmp = path.with_name(f".{path.name}.tmp")
+    with tmp.open("w", encoding="utf-8") as f:
+        for ch in chunks:
+            f.write(json.dumps(ch, ensure_ascii=False) + "\n")
+    os.replace(tmp, path)
+
+
+def dedup_index(index_path, threshold: float = 0.9) -> dict:
+    """Deduplicate ``index_path`` in place; returns chunk and byte counts before and after."""
+    index_path = pathlib.Path(index_path)
+    with index_path.open(encoding="utf-8") as f:
+        chunks = [json.loads(line) for line in f if line.strip()]
+    before = index_path.stat().st_size
+    kept, dropped = dedup_chunks(chunks, threshold)
+    _write_lines(index_path, kept)
+    dup_path = index_path.with_name(DUPLICATES_NAME)
+    if dropped:
+        _write_lines(dup_path, dropped)
+    else:
+        dup_path.unlink(missing_ok=True)
+    return {
+        "chunks_before": len(chunks),
+        "chunks_after": len(kept),
+        "bytes_before": before,
+        "bytes_after": index_path.stat().st_size,
+        "canonical_with_alt_urls": sum(1 for ch in kept if ch.get("alt_urls")),
+    }
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Collapse near-duplicate chunks of index.jsonl in place")
+    ap.add_argument("index", help="Path to index.jsonl")
+    ap.add_argument("--threshold", type=float, default=0.9,
+                    help="Minimum Jaccard similarity of word 3-shingles to merge (default: 0.9)")
+    args = ap.parse_args()
+    stats = dedup_index(args.index, args.threshold)
+    print(f"Chunks: {stats['chunks_before']} -> {stats['chunks_after']}, "
+          f"bytes: {stats['bytes_before']} -> {stats['bytes_after']} "
+          f"({stats['canonical_with_alt_urls']} chunks carry alt_urls)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,291 @@
+#!/usr/bin/env python3
+"""Offline dense chunk vectors for semantic search (``--embeddings``).
+
+Latent semantic analysis on the CPU, with no model download and no network:
+every chunk's title, heading and Markdown become Porter-stemmed unigrams and
+bigrams, hashed into ``FEATURES`` dimensions and weighted with sublinear
+TF-IDF. A randomized truncated SVD (NumPy) finds the ``dims`` directions
+that explain most of that matrix. Chunks and queries are projected onto them
+and compared by cosine, so a query can match a chunk that uses related terms
+rather than the query's own words.
+
+Written next to index.jsonl:
+
+- ``embeddings.npy``: unit-length float16 vectors, one row per index.jsonl
+  line in the same order; ``np.load(..., mmap_mode="r")`` maps it.
+- ``embeddings-model.npz``: the IDF weights and the SVD projection, to embed queries.
+- ``embeddings.json``: dimensions and the SHA-256 of the index.jsonl they
+  were built from.
+- ``embeddings.ivf/``: with ``--ann``, an approximate nearest-neighbour index
+  over the vectors (see ann.py), used by search() when present.
+
+Needs NumPy (``pip install numpy``).
+
+    python3 embeddings.py build ../corpus/index.jsonl --dims 128
+    python3 embeddings.py build ../corpus/index.jsonl --ann
+    python3 embeddings.py search "change the desktop background"
+"""
+import argparse
+import json
+import pathlib
+import shutil
+import time
+import zlib
+from typing import Optional
+
+import ann
+from query_engine import DEFAULT_INDEX, analyze
+from search_index import file_sha256
+
+try:
+    import numpy as np
+except ImportError:  # optional, only needed for --embeddings
+    np = None
+
+FORMAT = "omarchy-lsa-embeddings"
+FORMAT_VERSION = 1
+FEATURES = 1 << 15
+DEFAULT_DIMS = 128
+VECTORS_NAME = "embeddings.npy"
+MODEL_NAME = "embeddings-model.npz"
+META_NAME = "embeddings.json"
+_OVERSAMPLE = 10
+_POWER_ITERATIONS = 3
+
+
+def available() -> bool:
+    return np is not None
+
+
+def features(text: str) -> dict[int, float]:
+    """Signed hashed counts of the text's stems and stem bigrams."""
+    stems = analyze(text)
+    counts: dict[int, float] = {}
+    for term in stems + [f"{a} {b}" for a, b in zip(stems, stems[1:])]:
+        h = zlib.crc32(term.encode("utf-8"))
+        dim = h % FEATURES
+        counts[dim] = counts.get(dim, 0.0) + (1.0 if h & 0x80000000 else -1.0)
+    return counts
+
+
+def chunk_text(chunk: dict) -> str:
+    return f"{chunk.get('title', '')}\n{chunk.get('heading', '')}\n{chunk.get('markdown', '')}"
+
+
+def _weights(row: dict[int, float], idf):
+    """``(dims, weights)`` of one row: L2-normalized sublinear TF-IDF."""
+    dims = np.fromiter(row.keys(), dtype=np.int64, count=len(row))
+    tf = np.fromiter(row.values(), dtype=np.float32, count=len(row))
+    w = np.sign(tf) * (1 + np.log(np.abs(tf) + (tf == 0))) * idf[dims]
+    norm = np.linalg.norm(w)
+    return dims, (w / norm if norm else w).astype(np.float32)
+
+
+class SparseRows:
+    """The TF-IDF matrix in CSR and CSC form, for the products the SVD needs."""
+
+    _BLOCK = 1 << 17  # nonzeros multiplied at once; bounds the temporary to BLOCK x width floats
+
+    def __init__(self, rows: list[dict[int, float]], idf):
+        parts = [_weights(row, idf) for row in rows]
+        self.shape = (len(rows), FEATURES)
+        self.indptr = np.zeros(len(rows) + 1, dtype=np.int64)
+        self.indptr[1:] = np.cumsum([len(d) for d, _ in parts])
+        self.indices = np.concatenate([d for d, _ in parts]) if parts else np.zeros(0, dtype=np.int64)
+        self.data = np.concatenate([w for _, w in parts]) if parts else np.zeros(0, dtype=np.float32)
+        row_of = np.repeat(np.arange(len(rows)), np.diff(self.indptr))
+        order = np.argsort(self.indices, kind="stable")
+        self.t_indptr = np.zeros(FEATURES + 1, dtype=np.int64)
+        self.t_indptr[1:] = np.cumsum(np.bincount(self.indices, minlength=FEATURES))
+        self.t_indices = row_of[order]
+        self.t_data = self.data[order]
+
+    @classmethod
+    def _product(cls, indptr, indices, data, m, n_out):
+        out = np.zeros((n_out, m.shape[1]), dtype=np.float32)
+        filled = np.flatnonzero(np.diff(indptr))
+        start = 0
+        while start < len(filled):
+            # take whole output rows until the block of nonzeros is full
+            end = int(np.searchsorted(indptr[filled + 1], indptr[filled[start]] + cls._BLOCK, side="right"))
+            end = max(end, start + 1)
+            rows = filled[start:end]
+            lo, hi = indptr[rows[0]], indptr[rows[-1] + 1]
+            prod = data[lo:hi, None] * m[indices[lo:hi]]
+            out[rows] = np.add.reduceat(prod, indptr[rows] - lo, axis=0)
+            start = end
+        return out
+
+    def matmul(self, m):
+        """X @ m"""
+        return self._product(self.indptr, self.indices, self.data, m, self.shape[0])
+
+    def rmatmul(self, a):
+        """X.T @ a"""
+        return self._product(self.t_indptr, self.t_indices, self.t_data, a, self.shape[1])
+
+
+def _unit(matrix):
+    norms = np.linalg.norm(matrix, axis=-1, keepdims=True)
+    return matrix / np.where(norms == 0, 1, norms)
+
+
+def fit(chunks: list[dict], dims: int = DEFAULT_DIMS, seed: int = 0):
+    """Returns ``(vectors, idf, components)``: unit chunk vectors and the model to embed queries."""
+    rows = [features(chunk_text(ch)) for ch in chunks]
+    df = np.zeros(FEATURES, dtype=np.float32)
+    for row in rows:
+        df[list(row)] += 1
+    idf = (np.log((1 + len(rows)) / (1 + df)) + 1).astype(np.float32)
+    x = SparseRows(rows, idf)
+
+    # randomized range finder with power iterations (Halko, Martinsson & Tropp)
+    dims = max(1, min(dims, len(rows)))
+    width = min(dims + _OVERSAMPLE, len(rows))
+    rng = np.random.default_rng(seed)
+    q, _ = np.linalg.qr(x.matmul(rng.standard_normal((FEATURES, width), dtype=np.float32)))
+    for _ in range(_POWER_ITERATIONS):
+        # only the short side is re-orthonormalized; a QR of the FEATURES-tall side costs far more
+        q, _ = np.linalg.qr(x.matmul(x.rmatmul(q)))
+    b = x.rmatmul(q).T  # q.T @ X, width x FEATURES
+    # right singular vectors of b from the small width x width Gram matrix
+    evals, evecs = np.linalg.eigh(b @ b.T)
+    order = np.argsort(evals)[::-1][:dims]
+    sing = np.sqrt(np.maximum(evals[order], 1e-12))
+    components = ((evecs[:, order].T @ b) / sing[:, None]).astype(np.float32)
+    vectors = _unit(x.matmul(components.T))
+    return vectors, idf, components
+
+
+def write_embeddings(index_path, dims: int = DEFAULT_DIMS, ann_lists: Optional[int] = None) -> pathlib.Path:
+    """Build the vectors and model for ``index_path``; returns the vectors path.
+
+    ``ann_lists`` also builds the IVF index with that many lists (0 picks the
+    count from the corpus size); None removes a previous one.
+    """
+    if np is None:
+        raise RuntimeError("--embeddings needs NumPy (pip install numpy)")
+    index_path = pathlib.Path(index_path)
+    with index_path.open(encoding="utf-8") as f:
+        chunks = [json.loads(line) for line in f if line.strip()]
+    vectors, idf, components = fit(chunks, dims)
+    out = index_path.with_name(VECTORS_NAME)
+    np.save(out, vectors.astype(np.float16))
+    np.savez(index_path.with_name(MODEL_NAME), idf=idf, components=components.astype(np.float16))
+    meta = {
+        "format": FORMAT,
+        "version": FORMAT_VERSION,
+        "features": FEATURES,
+        "dims": int(vectors.shape[1]),
+        "chunks": len(chunks),
+        "source": {"file": index_path.name, "sha256": file_sha256(index_path)},
+    }
+    index_path.with_name(META_NAME).write_text(json.dumps(meta, indent=2) + "\n", encoding="utf-8")
+    if ann_lists is None:
+        shutil.rmtree(index_path.with_name(ann.IVF_DIR), ignore_errors=True)
+    else:
+        ann.build_ivf(vectors, index_path.with_name(ann.IVF_DIR), ann_lists, source=meta["source"])
+    return out
+
+
+def remove_embeddings(index_path) -> None:
+    """Delete the vectors, model and IVF index next to ``index_path``."""
+    index_path = pathlib.Path(index_path)
+    for name in (VECTORS_NAME, MODEL_NAME, META_NAME):
+        index_path.with_name(name).unlink(missing_ok=True)
+    shutil.rmtree(index_path.with_name(ann.IVF_DIR), ignore_errors=True)
+
+
+class EmbeddingIndex:
+    """Cosine top-k over the vectors written by write_embeddings."""
+
+    def __init__(self, index_path):
+        if np is None:
+            raise RuntimeError("semantic search needs NumPy (pip install numpy)")
+        index_path = pathlib.Path(index_path)
+        self.meta = json.loads(index_path.with_name(META_NAME).read_text(encoding="utf-8"))
+        if self.meta.get("format") != FORMAT or self.meta.get("version") != FORMAT_VERSION:
+            raise ValueError(f"{index_path.with_name(META_NAME)}: unsupported embeddings format")
+        self.stale = self.meta["source"]["sha256"] != file_sha256(index_path)
+        self.vectors = np.load(index_path.with_name(VECTORS_NAME), mmap_mode="r")
+        model = np.load(index_path.with_name(MODEL_NAME))
+        self.idf = model["idf"]
+        self.components = model["components"].astype(np.float32)
+        self._matrix = None
+        self.ivf = None
+        ivf_path = index_path.with_name(ann.IVF_DIR)
+        if ivf_path.is_dir():
+            ivf = ann.IVFIndex(ivf_path)
+            if ivf.meta["source"] == self.meta["source"] and len(ivf) == len(self):
+                self.ivf = ivf
+
+    def __len__(self) -> int:
+        return self.vectors.shape[0]
+
+    def matrix(self):
+        """The vectors as float32, converted once on first use for BLAS-speed scoring."""
+        if self._matrix is None:
+            self._matrix = np.asarray(self.vectors, dtype=np.float32)
+        return self._matrix
+
+    def embed(self, text: str):
+        row = features(text)
+        if not row:
+            return np.zeros(self.components.shape[0], dtype=np.float32)
+        dims, weights = _weights(row, self.idf)
+        return _unit(self.components[:, dims] @ weights)
+
+    def search(self, query: str, limit: int = 10, probes: int = 0, exact: bool = False) -> list[tuple[float, int]]:
+        """``(cosine, chunk position)`` pairs, best first.
+
+        Uses the IVF index when there is one, probing ``probes`` lists (0 for
+        its default); ``exact`` scores every chunk instead.
+        """
+        vector = self.embed(query)
+        if self.ivf is not None and not exact:
+            return self.ivf.search(vector, limit, probes)
+        return ann.top_k(self.matrix() @ vector, limit)
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Build or query offline LSA embeddings for index.jsonl")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    bp = sub.add_parser("build", help="Compute vectors for every chunk")
+    bp.add_argument("index", nargs="?", default=str(DEFAULT_INDEX), help="Path to index.jsonl")
+    bp.add_argument("--dims", type=int, default=DEFAULT_DIMS, help=f"Vector dimensions (default: {DEFAULT_DIMS})")
+    bp.add_argument("--ann", type=int, nargs="?", const=0, default=None, metavar="LISTS",
+                    help="Also build an IVF index with this many lists (about 4*sqrt(chunks) if given without a value)")
+    sp = sub.add_parser("search", help="Print the chunks closest to a query")
+    sp.add_argument("query")
+    sp.add_argument("--index", default=str(DEFAULT_INDEX), help="Path to index.jsonl (default: %(default)s)")
+    sp.add_argument("--limit", type=int, default=10, help="Max results (default: 10)")
+    sp.add_argument("--probes", type=int, default=0, help="IVF lists to scan (default: about 1/16 of them)")
+    sp.add_argument("--exact", action="store_true", help="Score every chunk even if there is an IVF index")
+    args = ap.parse_args()
+    if np is None:
+        ap.error("embeddings need NumPy (pip install numpy)")
+
+    if args.cmd == "build":
+        start = time.perf_counter()
+        out = write_embeddings(args.index, args.dims, args.ann)
+        print(f"Wrote {out} in {time.perf_counter() - start:.1f}s")
+        return
+
+    index = EmbeddingIndex(args.index)
+    if index.stale:
+        print("warning: index.jsonl changed since the embeddings were built", flush=True)
+    with open(args.index, encoding="utf-8") as f:
+        chunks = [json.loads(line) for line in f if line.strip()]
+    start = time.perf_counter()
+    results = index.search(args.query, args.limit, args.probes, args.exact)
+    elapsed = (time.perf_counter() - start) * 1000
+    for rank, (score, pos) in enumerate(results, 1):
+        ch = chunks[pos]
+        heading = f" — {ch['heading']}" if ch.get("heading") else ""
+        print(f"{rank:2d}. {score:6.3f}  {ch['id']}  {ch['title']}{heading}")
+        print(f"    {ch['url']}")
+    print(f"\n{len(results)} results in {elapsed:.2f}ms")
+
+
+if __name__ == "__main__":
+    main()
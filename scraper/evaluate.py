@@ -0,0 +1,314 @@
+#!/usr/bin/env python3
+"""Offline ranking evaluation against relevance judgments.
+
+Runs every query of a judgments file against a corpus built by
+scrape_and_build_omarchy.py and reports, per search engine, MRR, nDCG@10,
+recall@k and per-query latency percentiles. Ranking quality and speed are
+measured in the same run, so a change to weights or synonyms shows its cost
+next to its effect. ``--out`` saves the result, and ``--compare`` prints the
+change against an earlier result.
+
+Judgments are JSON Lines, one query per line:
+
+    {"query": "take a screenshot", "relevant": ["https://learn.omacom.io/2/the-omarchy-manual/52/screenshots"]}
+    {"query": "change wallpaper", "relevant": [{"heading": "Backgrounds", "grade": 2}, {"url": "...", "grade": 1}]}
+
+A relevant entry is a URL string or an object with ``url`` and/or ``heading``
+and an optional ``grade`` (default 1). A chunk matches an entry when every
+given field matches: the URL ignoring ``#fragment`` and a trailing slash (a
+deduplicated chunk's ``alt_urls`` count too), and the heading ignoring case.
+A URL entry therefore covers every chunk of that page.
+
+- MRR: mean of 1 / rank of the first matching chunk (0 if none is returned)
+- nDCG@10: graded gain ``2**grade - 1``, against the best possible order of all matching chunks in the corpus
+- recall@k: the share of a query's entries with a matching chunk in the top k
+
+    python3 evaluate.py judgments.jsonl --index ../corpus/index.jsonl
+    python3 evaluate.py judgments.jsonl --engine bm25 embeddings --out eval.json
+    python3 evaluate.py judgments.jsonl --weights title=4 heading=2 --synonyms synonyms.json --compare eval.json
+"""
+import argparse
+import json
+import math
+import pathlib
+import platform
+import statistics
+import time
+from typing import Callable, Optional
+
+import embeddings
+import sparse_scoring
+from metrics import percentile
+from query_engine import DEFAULT_B, DEFAULT_INDEX, DEFAULT_K1, DEFAULT_WEIGHTS, FIELDS, InvertedIndex
+
+EVAL_VERSION = 1
+ENGINES = ("bm25", "embeddings")
+NDCG_DEPTH = 10
+DEFAULT_RECALL_AT = (1, 5, 10, 20)
+
+
+def normalize_url(url: str) -> str:
+    return url.split("#", 1)[0].rstrip("/")
+
+
+def load_judgments(path) -> list[dict]:
+    """``[{"query", "relevant": [{"url", "heading", "grade"}]}]`` from a JSON Lines file."""
+    judgments = []
+    for n, line in enumerate(pathlib.Path(path).read_text(encoding="utf-8").splitlines(), 1):
+        if not line.strip() or line.lstrip().startswith("#"):
+            continue
+        entry = json.loads(line)
+        relevant = []
+        for item in entry.get("relevant", []):
+            if isinstance(item, str):
+                item = {"url": item}
+            if not item.get("url") and not item.get("heading"):
+                raise ValueError(f"{path}:{n}: relevant entries need a url or a heading")
+            relevant.append({
+                "url": normalize_url(item["url"]) if item.get("url") else None,
+                "heading": item["heading"].strip().lower() if item.get("heading") else None,
+                "grade": float(item.get("grade", 1)),
+            })
+        if not entry.get("query") or not relevant:
+            raise ValueError(f"{path}:{n}: each line needs a query and at least one relevant entry")
+        judgments.append({"query": entry["query"], "relevant": relevant})
+    return judgments
+
+
+class ChunkLookup:
+    """Chunk positions by normalized URL (including alt_urls) and by lowercase heading."""
+
+    def __init__(self, chunks: list[dict]):
+        self.by_url: dict[str, set[int]] = {}
+        self.by_heading: dict[str, set[int]] = {}
+        for pos, ch in enumerate(chunks):
+            for url in [ch.get("url", "")] + ch.get("alt_urls", []):
+                self.by_url.setdefault(normalize_url(url), set()).add(pos)
+            self.by_heading.setdefault((ch.get("heading") or "").strip().lower(), set()).add(pos)
+
+    def matching(self, item: dict) -> set[int]:
+        """Positions of the chunks matching every field given in ``item``."""
+        found = None
+        if item["url"] is not None:
+            found = self.by_url.get(item["url"], set())
+        if item["heading"] is not None:
+            by_heading = self.by_heading.get(item["heading"], set())
+            found = by_heading if found is None else found & by_heading
+        return found
+
+
+def dcg(gains: list[float]) -> float:
+    return sum((2 ** g - 1) / math.log2(rank + 1) for rank, g in enumerate(gains, 1))
+
+
+def score_query(ranked: list[int], relevant: list[dict], lookup: ChunkLookup, recall_at) -> dict:
+    """MRR, nDCG@10 and recall@k of one ranked list of chunk positions."""
+    matching = [lookup.matching(item) for item in relevant]
+    grades: dict[int, float] = {}
+    for item, positions in zip(relevant, matching):
+        for pos in positions:
+            grades[pos] = max(grades.get(pos, 0.0), item["grade"])
+    gains = [grades.get(pos, 0.0) for pos in ranked]
+    first = next((rank for rank, g in enumerate(gains, 1) if g > 0), None)
+    best = dcg(sorted(grades.values(), reverse=True)[:NDCG_DEPTH])
+    found_at = [next((rank for rank, pos in enumerate(ranked, 1) if pos in positions), None)
+                for positions in matching]
+    return {
+        "rr": 1 / first if first else 0.0,
+        "ndcg": dcg(gains[:NDCG_DEPTH]) / best if best else 0.0,
+        "recall": {k: sum(1 for r in found_at if r is not None and r <= k) / len(relevant) for k in recall_at},
+        "first_relevant": first,
+    }
+
+
+def load_synonyms(path: Optional[str]) -> dict[str, list[str]]:
+    if not path:
+        return {}
+    return {k.lower(): v for k, v in json.loads(pathlib.Path(path).read_text(encoding="utf-8")).items()}
+
+
+def expand_query(query: str, synonyms: dict[str, list[str]]) -> str:
+    """The query plus the synonyms of the whole query and of each of its words, as the server expands them."""
+    q = query.lower().strip()
+    extra = list(synonyms.get(q, []))
+    for word in q.split():
+        extra.extend(synonyms.get(word, []))
+    return " ".join([query, *extra])
+
+
+def make_engine(name: str, index_path: pathlib.Path, chunks: list[dict], params: dict,
+                exact: bool = False) -> tuple[Callable, Optional[Callable]]:
+    """``(search, batch)`` for one engine: ``search(query, depth)`` returns ranked chunk positions,
+    ``batch(queries, depth)`` (None if the engine has no batch mode) one such list per query."""
+    if name == "bm25":
+        # both indexes return the chunk dicts of ``chunks`` itself, so identity gives the position
+        position = {id(ch): pos for pos, ch in enumerate(chunks)}
+        if not sparse_scoring.available():
+            index = InvertedIndex(chunks)
+            return lambda q, depth: [position[id(ch)] for _, ch in index.search(q, depth, **params)], None
+        index = sparse_scoring.SparseIndex(chunks)
+        index.impacts(params["k1"], params["weights"], params["b"])  # before the first timed query
+        return (lambda q, depth: [position[id(ch)] for _, ch in index.search(q, depth, **params)],
+                lambda qs, depth: [[position[id(ch)] for _, ch in r] for r in index.search_batch(qs, depth, **params)])
+    index = embeddings.EmbeddingIndex(index_path)
+    if index.stale or len(index) != len(chunks):
+        raise ValueError(f"{index_path.with_name(embeddings.META_NAME)} does not match {index_path.name}; "
+                         "rebuild with: python3 embeddings.py build")
+    index.matrix()  # convert the vectors before the first timed query
+    return lambda q, depth: [pos for _, pos in index.search(q, depth, exact=exact)], None
+
+
+def evaluate(search: Callable, batch: Optional[Callable], judgments: list[dict], lookup: ChunkLookup,
+             synonyms: dict[str, list[str]], recall_at=DEFAULT_RECALL_AT) -> dict:
+    depth = max(NDCG_DEPTH, *recall_at)
+    queries = [expand_query(j["query"], synonyms) for j in judgments]
+    per_query, timings = [], []
+    for j, query in zip(judgments, queries):
+        start = time.perf_counter()
+        ranked = search(query, depth)
+        timings.append((time.perf_counter() - start) * 1000)
+        per_query.append({"query": j["query"], "ms": round(timings[-1], 4),
+                          **score_query(ranked, j["relevant"], lookup, recall_at)})
+    batch_qps = None
+    if batch is not None and queries:
+        start = time.perf_counter()
+        batch(queries, depth)
+        batch_qps = round(len(queries) / (time.perf_counter() - start), 1)
+    n = max(1, len(per_query))
+    return {
+        "mrr": round(sum(q["rr"] for q in per_query) / n, 4),
+        f"ndcg@{NDCG_DEPTH}": round(sum(q["ndcg"] for q in per_query) / n, 4),
+        "recall": {str(k): round(sum(q["recall"][k] for q in per_query) / n, 4) for k in recall_at},
+        "latency_ms": {
+            "mean": round(statistics.fmean(timings), 4) if timings else 0.0,
+            "p50": round(percentile(timings, 50), 4),
+            "p95": round(percentile(timings, 95), 4),
+            "p99": round(percentile(timings, 99), 4),
+        },
+        "batch_queries_per_s": batch_qps,
+        "queries": [dict(q, recall={str(k): v for k, v in q["recall"].items()}) for q in per_query],
+    }
+
+
+def print_report(result: dict) -> None:
+    print(f"{len(result['judgments'])} queries against {result['chunks']} chunks\n")
+    recall_keys = list(next(iter(result["engines"].values()))["recall"])
+    header = f"{'engine':<12} {'MRR':>6} {'nDCG@10':>8} " + " ".join(f"{'R@' + k:>6}" for k in recall_keys)
+    print(header + f" {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}")
+    for name, r in result["engines"].items():
+        lat = r["latency_ms"]
+        print(f"{name:<12} {r['mrr']:>6.3f} {r[f'ndcg@{NDCG_DEPTH}']:>8.3f} "
+              + " ".join(f"{r['recall'][k]:>6.3f}" for k in recall_keys)
+              + f" {lat['p50']:>8.3f} {lat['p95']:>8.3f} {lat['p99']:>8.3f}")
+    for name, r in result["engines"].items():
+        if r.get("batch_queries_per_s"):
+            print(f"{name}: {r['batch_queries_per_s']:.0f} queries/s scored as one batch")
+
+
+def print_misses(result: dict) -> None:
+    for name, r in result["engines"].items():
+        misses = [q["query"] for q in r["queries"] if q["first_relevant"] is None]
+        if misses:
+            print(f"\n{name}: no relevant chunk returned for {len(misses)} queries:")
+            for q in misses:
+                print(f"  {q}")
+
+
+def print_comparison(result: dict, baseline: dict) -> None:
+    print(f"\nvs {baseline.get('label') or 'baseline'}:")
+    for name, new in result["engines"].items():
+        old = baseline.get("engines", {}).get(name)
+        if not old:
+            continue
+        for key in ("mrr", f"ndcg@{NDCG_DEPTH}"):
+            print(f"  {name:<12} {key:<10} {old[key]:>8.3f} -> {new[key]:>8.3f}  ({new[key] - old[key]:+.3f})")
+        for k, v in new["recall"].items():
+            if k in old["recall"]:
+                print(f"  {name:<12} {'R@' + k:<10} {old['recall'][k]:>8.3f} -> {v:>8.3f}  "
+                      f"({v - old['recall'][k]:+.3f})")
+        for key in ("p50", "p95"):
+            a, b = old["latency_ms"][key], new["latency_ms"][key]
+            if a:
+                print(f"  {name:<12} {key + ' ms':<10} {a:>8.3f} -> {b:>8.3f}  ({100 * (b - a) / a:+.1f}%)")
+
+
+def field_values(pairs: Optional[list[str]], defaults: dict, flag: str) -> dict:
+    """``["title=4", "heading=2"]`` over ``defaults``."""
+    values = dict(defaults)
+    for pair in pairs or []:
+        field, sep, value = pair.partition("=")
+        if not sep or field not in FIELDS:
+            raise argparse.ArgumentTypeError(f"{flag} takes FIELD=VALUE with FIELD one of {', '.join(FIELDS)}")
+        values[field] = float(value)
+    return values
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Score search engines against relevance judgments")
+    ap.add_argument("judgments", help="JSON Lines file of queries and their relevant URLs or headings")
+    ap.add_argument("--index", default=str(DEFAULT_INDEX), help="Path to index.jsonl (default: %(default)s)")
+    ap.add_argument("--engine", nargs="+", choices=ENGINES, default=["bm25"],
+                    help="Engines to evaluate; embeddings needs a corpus built with --embeddings (default: bm25)")
+    ap.add_argument("--recall-at", type=int, nargs="+", default=list(DEFAULT_RECALL_AT),
+                    help="Cutoffs for recall@k (default: 1 5 10 20)")
+    ap.add_argument("--k1", type=float, default=DEFAULT_K1, help=f"BM25 k1 (default: {DEFAULT_K1})")
+    ap.add_argument("--weights", nargs="+", metavar="FIELD=W",
+                    help="BM25F field weights (default: title=3 heading=2 markdown=1)")
+    ap.add_argument("--b", nargs="+", metavar="FIELD=B",
+                    help="BM25F length normalization per field (default: title=0.5 heading=0.5 markdown=0.75)")
+    ap.add_argument("--synonyms", default=None,
+                    help="JSON object of word or phrase -> synonyms to add to matching queries")
+    ap.add_argument("--exact", action="store_true", help="Score every vector even if there is an IVF index")
+    ap.add_argument("--misses", action="store_true", help="List the queries with no relevant result")
+    ap.add_argument("--label", default="", help="Free-form label stored in the result (e.g. a git revision)")
+    ap.add_argument("--out", default=None, help="Write the result JSON here")
+    ap.add_argument("--compare", default=None, help="Earlier result JSON to compare against")
+    args = ap.parse_args()
+    try:
+        params = {"k1": args.k1, "weights": field_values(args.weights, DEFAULT_WEIGHTS, "--weights"),
+                  "b": field_values(args.b, DEFAULT_B, "--b")}
+    except (argparse.ArgumentTypeError, ValueError) as e:
+        ap.error(str(e))
+    if "embeddings" in args.engine and not embeddings.available():
+        ap.error("--engine embeddings needs NumPy (pip install numpy)")
+    if min(args.recall_at) < 1:
+        ap.error("--recall-at cutoffs must be at least 1")
+
+    index_path = pathlib.Path(args.index)
+    judgments = load_judgments(args.judgments)
+    with index_path.open(encoding="utf-8") as f:
+        chunks = [json.loads(line) for line in f if line.strip()]
+    synonyms = load_synonyms(args.synonyms)
+    lookup = ChunkLookup(chunks)
+
+    engines = {}
+    for name in args.engine:
+        try:
+            search, batch = make_engine(name, index_path, chunks, params, exact=args.exact)
+        except (OSError, ValueError) as e:
+            ap.error(f"--engine {name}: {e}")
+        engines[name] = evaluate(search, batch, judgments, lookup, synonyms, sorted(set(args.recall_at)))
+
+    result = {
+        "version": EVAL_VERSION,
+        "label": args.label,
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "python": platform.python_version(),
+        "index": str(index_path),
+        "chunks": len(chunks),
+        "judgments": [j["query"] for j in judgments],
+        "options": {**params, "synonyms": args.synonyms, "exact": args.exact},
+        "engines": engines,
+    }
+    print_report(result)
+    if args.misses:
+        print_misses(result)
+    if args.compare:
+        print_comparison(result, json.loads(pathlib.Path(args.compare).read_text(encoding="utf-8")))
+    if args.out:
+        pathlib.Path(args.out).write_text(json.dumps(result, indent=2) + "\n", encoding="utf-8")
+        print(f"\nSaved: {args.out}")
+
+
+if __name__ == "__main__":
+    main()
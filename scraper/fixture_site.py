@@ -0,0 +1,230 @@
+#!/usr/bin/env python3
+"""Synthetic Omarchy-style manual served over HTTP, for offline benchmarks.
+
+Pages look like the real manual (header, TOC nav, aside, a <main> with h1/h2/h3,
+paragraphs, keybinding lists and code blocks) and are generated
+deterministically from a seed, so every run crawls the same site. The site
+also has a robots.txt, a sitemap index with one sitemap per chapter, and an
+llms.txt, for ``--seed-from``.
+
+    python3 fixture_site.py --pages 200 --port 8000
+    python3 scrape_and_build_omarchy.py --root http://127.0.0.1:8000/manual/ --wait 0
+"""
+import argparse
+import hashlib
+import http.server
+import random
+import re
+import time
+
+ROOT_PATH = "/manual"
+_PAGE_PATH = re.compile(r"/manual/(\d+)/page-(\d+)")
+_CHAPTER_SITEMAP = re.compile(r"/sitemaps/chapter-(\d+)\.xml")
+_SITEMAP_NS = "http://www.sitemaps.org/schemas/sitemap/0.9"
+
+_VOCAB = """
+omarchy hyprland waybar walker alacritty neovim chromium theme wallpaper font
+keybinding hotkey shortcut workspace window tiling floating fullscreen launcher
+terminal config install update package pacman yay screenshot record clipboard
+network wifi bluetooth audio volume brightness battery monitor display scale
+menu lock suspend restart session login password firewall backup dotfiles
+the a to of and in is you your with for on that this can it by from or as
+""".split()
+
+
+class SyntheticManual:
+    """Deterministic manual site: ``pages`` pages in chapters of ``chapter_size``.
+
+    ``links`` is the number of in-content links per page, ``words`` the
+    approximate body size in words, ``nav_links`` the number of links in the
+    navigation chrome that the extractor has to prune. ``error_rate`` is the
+    fraction of requests answered with a transient 503 (with ``Retry-After: 1``
+    on every other one).
+    """
+
+    def __init__(self, pages=200, links=8, words=600, nav_links=40, chapter_size=10,
+                 latency_ms=0.0, seed=1, error_rate=0.0):
+        self.pages = pages
+        self.links = links
+        self.words = words
+        self.nav_links = nav_links
+        self.chapter_size = max(1, chapter_size)
+        self.latency_ms = latency_ms
+        self.seed = seed
+        self.error_rate = error_rate
+        self._errors = random.Random(seed)
+
+    def path(self, i: int) -> str:
+        return f"{ROOT_PATH}/{i // self.chapter_size + 1}/page-{i}"
+
+    def _sentence(self, rng: random.Random, n: int) -> str:
+        return " ".join(rng.choice(_VOCAB) for _ in range(n)).capitalize() + "."
+
+    def _chrome(self, rng: random.Random) -> tuple[str, str]:
+        toc = "".join(
+            f'<li class="toc__item"><a href="{self.path(rng.randrange(self.pages))}">Entry</a></li>'
+            for _ in range(self.nav_links)
+        )
+        header = (f'<header class="page-header"><a href="{ROOT_PATH}">The Manual</a>'
+                  f'<button class="btn--menu">Menu</button></header>'
+                  f'<nav class="book-toc"><ol>{toc}</ol></nav>')
+        aside = '<aside class="callout"><p>Tip: press Super + K for all hotkeys.</p></aside>'
+        return header, aside
+
+    def render_root(self) -> str:
+        chapters = range(0, self.pages, self.chapter_size)
+        items = "".join(f'<li><a href="{self.path(i)}">Chapter {i // self.chapter_size + 1}</a></li>'
+                        for i in chapters)
+        return (f"<!DOCTYPE html><html><head><title>The Manual</title></head><body>"
+                f"<main><h1>The Manual</h1><p>Welcome to the synthetic manual.</p>"
+                f"<ul>{items}</ul></main></body></html>")
+
+    def render_page(self, i: int) -> str:
+        rng = random.Random(self.seed * 1_000_003 + i)
+        header, aside = self._chrome(rng)
+        body, written = [], 0
+        section = 0
+        while written < self.words:
+            section += 1
+            tag = "h2" if section % 3 == 1 else "h3"
+            body.append(f"<{tag}>{self._sentence(rng, rng.randint(1, 4))[:-1]}</{tag}>")
+            kind = rng.random()
+            if kind < 0.2:
+                items = [f"<li><kbd>Super</kbd> + <kbd>{rng.choice('ABCDEFGHIJKLMNOPQRSTUVWXYZ')}</kbd>"
+                         f" &mdash; {self._sentence(rng, 5)}</li>" for _ in range(rng.randint(3, 10))]
+                body.append(f"<ul>{''.join(items)}</ul>")
+                written += 8 * len(items)
+            elif kind < 0.3:
+                lines = [f"bind = SUPER, {rng.choice('QWERTY')}, exec, {rng.choice(_VOCAB)}"
+                         for _ in range(rng.randint(2, 8))]
+                body.append("<pre><code>" + "\n".join(lines) + "</code></pre>")
+                written += 5 * len(lines)
+            for _ in range(rng.randint(1, 4)):
+                n = rng.randint(10, 80)
+                body.append(f"<p>{self._sentence(rng, n)}</p>")
+                written += n
+
+        # always link the next page so every page is reachable
+        targets = [min(i + 1, self.pages - 1)] + [rng.randrange(self.pages) for _ in range(self.links)]
+        body.append("<p>See also: " + ", ".join(
+            f'<a href="{self.path(t)}">{"page " + str(t)}</a>' for t in targets) + "</p>")
+
+        return (f"<!DOCTYPE html><html><head><title>Page {i} - The Manual</title></head><body>"
+                f"{header}<main><article><h1>Page {i}</h1>{''.join(body)}</article>{aside}</main>"
+                f"<footer><p>Footer</p></footer></body></html>")
+
+    def render_index(self, path: str, base: str):
+        """robots.txt, sitemaps (an index with one sitemap per chapter) and llms.txt,
+        as ``(body, content_type)``, or None. ``base`` is e.g. ``http://127.0.0.1:8000``."""
+        chapters = (self.pages + self.chapter_size - 1) // self.chapter_size
+        if path == "/robots.txt":
+            return f"User-agent: *\nAllow: /\nSitemap: {base}/sitemap.xml\n", "text/plain"
+        if path == "/sitemap.xml":
+            entries = "".join(f"<sitemap><loc>{base}/sitemaps/chapter-{c + 1}.xml</loc></sitemap>"
+                              for c in range(chapters))
+            return f'<?xml version="1.0"?><sitemapindex xmlns="{_SITEMAP_NS}">{entries}</sitemapindex>', "application/xml"
+        m = _CHAPTER_SITEMAP.fullmatch(path)
+        if m and 1 <= int(m.group(1)) <= chapters:
+            first = (int(m.group(1)) - 1) * self.chapter_size
+            entries = "".join(f"<url><loc>{base}{self.path(i)}</loc></url>"
+                              for i in range(first, min(first + self.chapter_size, self.pages)))
+            return f'<?xml version="1.0"?><urlset xmlns="{_SITEMAP_NS}">{entries}</urlset>', "application/xml"
+        if path in (f"{ROOT_PATH}/llms.txt", "/llms.txt"):
+            lines = ["# The Manual", "", "> Synthetic manual for offline benchmarks.", "", "## Pages", ""]
+            lines += [f"- [Page {i}]({self.path(i)})" for i in range(self.pages)]
+            return "\n".join(lines) + "\n", "text/plain"
+        return None
+
+    def render(self, path: str):
+        """HTML for ``path``, or None if it is not part of the site."""
+        path = path.split("?", 1)[0].split("#", 1)[0].rstrip("/")
+        if path == ROOT_PATH:
+            return self.render_root()
+        m = _PAGE_PATH.fullmatch(path)
+        if not m or int(m.group(2)) >= self.pages or self.path(int(m.group(2))) != path:
+            return None
+        return self.render_page(int(m.group(2)))
+
+
+def make_handler(site: SyntheticManual):
+    class Handler(http.server.BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_GET(self):
+            if site.latency_ms:
+                time.sleep(site.latency_ms / 1000)
+            if site.error_rate and site._errors.random() < site.error_rate:
+                self.send_response(503)
+                if site._errors.random() < 0.5:
+                    self.send_header("Retry-After", "1")
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+            index = site.render_index(self.path, f"http://{self.headers.get('Host', 'localhost')}")
+            html, content_type = index if index is not None else (site.render(self.path), "text/html")
+            if html is None:
+                self.send_error(404)
+                return
+            body = html.encode("utf-8")
+            etag = '"' + hashlib.sha1(body).hexdigest()[:16] + '"'
+            if self.headers.get("If-None-Match") == etag:
+                self.send_response(304)
+                self.send_header("ETag", etag)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+            self.send_response(200)
+            self.send_header("Content-Type", f"{content_type}; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.send_header("ETag", etag)
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    return Handler
+
+
+def serve(site: SyntheticManual, host="127.0.0.1", port=0) -> http.server.ThreadingHTTPServer:
+    """Bind a server for ``site``; port 0 picks a free port (see ``server.server_port``)."""
+    server = http.server.ThreadingHTTPServer((host, port), make_handler(site))
+    server.daemon_threads = True
+    return server
+
+
+def add_site_arguments(ap: argparse.ArgumentParser) -> None:
+    ap.add_argument("--pages", type=int, default=200, help="Number of pages (default: 200)")
+    ap.add_argument("--links", type=int, default=8, help="In-content links per page (default: 8)")
+    ap.add_argument("--words", type=int, default=600, help="Approximate words per page (default: 600)")
+    ap.add_argument("--nav-links", type=int, default=40, help="Links in the nav chrome per page (default: 40)")
+    ap.add_argument("--chapter-size", type=int, default=10,
+                    help="Pages per chapter; the root page links the first page of each (default: 10)")
+    ap.add_argument("--latency-ms", type=float, default=0.0, help="Delay added to every response (default: 0)")
+    ap.add_argument("--seed", type=int, default=1, help="Content seed (default: 1)")
+    ap.add_argument("--error-rate", type=float, default=0.0,
+                    help="Fraction of requests answered with a transient 503 (default: 0)")
+
+
+def site_from_args(args) -> SyntheticManual:
+    return SyntheticManual(pages=args.pages, links=args.links, words=args.words,
+                           nav_links=args.nav_links, chapter_size=args.chapter_size, latency_ms=args.latency_ms,
+                           seed=args.seed, error_rate=args.error_rate)
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Serve a synthetic manual for offline crawl benchmarks")
+    add_site_arguments(ap)
+    ap.add_argument("--host", default="127.0.0.1", help="Bind address (default: 127.0.0.1)")
+    ap.add_argument("--port", type=int, default=8000, help="Port (default: 8000)")
+    args = ap.parse_args()
+    server = serve(site_from_args(args), args.host, args.port)
+    print(f"Serving {args.pages} pages at http://{args.host}:{server.server_port}{ROOT_PATH}/")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+"""Crawl frontier for crawl_and_build.
+
+URLs are deduplicated when they are enqueued rather than when they are popped,
+so each normalized URL enters the frontier at most once and pops are O(1).
+"""
+from collections import OrderedDict, deque
+from typing import Optional
+
+ORDERS = ("bfs", "chapter")
+
+
+class Frontier:
+    """Queue of normalized URLs still to crawl.
+
+    ``order="bfs"`` pops in discovery order (the classic breadth-first crawl).
+    ``order="chapter"`` finishes one chapter (the first path segment below the
+    root) before starting the next, going depth-first inside the chapter.
+    """
+
+    def __init__(self, root: str, order: str = "bfs"):
+        if order not in ORDERS:
+            raise ValueError(f"unknown frontier order: {order!r}")
+        self.root = root
+        self.order = order
+        self.enqueued: set[str] = set()
+        self._fifo: deque[str] = deque()
+        self._chapters: OrderedDict[str, deque[str]] = OrderedDict()
+        self._size = 0
+        self.pushed = 0
+        self.duplicates = 0
+        self.popped = 0
+        self.peak = 0
+
+    def chapter(self, url: str) -> str:
+        rest = url[len(self.root):].lstrip("/")
+        return rest.split("/", 1)[0]
+
+    def push(self, url: str) -> bool:
+        """Enqueue ``url`` unless it was ever enqueued before. Returns True if added."""
+        if url in self.enqueued:
+            self.duplicates += 1
+            return False
+        self.enqueued.add(url)
+        if self.order == "bfs":
+            self._fifo.append(url)
+        else:
+            self._chapters.setdefault(self.chapter(url), deque()).append(url)
+        self._size += 1
+        self.pushed += 1
+        self.peak = max(self.peak, self._size)
+        return True
+
+    def pop(self) -> Optional[str]:
+        if not self._size:
+            return None
+        if self.order == "bfs":
+            url = self._fifo.popleft()
+        else:
+            key, bucket = next(iter(self._chapters.items()))
+            url = bucket.pop()
+            if not bucket:
+                del self._chapters[key]
+        self._size -= 1
+        self.popped += 1
+        return url
+
+    def __len__(self) -> int:
+        return self._size
+
+    def __iter__(self):
+        """URLs in the order ``pop`` would return them if nothing else were pushed."""
+        if self.order == "bfs":
+            yield from self._fifo
+        else:
+            for bucket in self._chapters.values():
+                yield from reversed(bucket)
+
+    def snapshot(self) -> dict:
+        """JSON-serializable state, for crawl checkpoints."""
+        if self.order == "bfs":
+            queue = list(self._fifo)
+        else:
+            queue = [[key, list(bucket)] for key, bucket in self._chapters.items()]
+        return {
+            "order": self.order,
+            "enqueued": sorted(self.enqueued),
+            "queue": queue,
+            "counters": [self.pushed, self.duplicates, self.popped, self.peak],
+        }
+
+    @classmethod
+    def from_snapshot(cls, root: str, snap: dict) -> "Frontier":
+        frontier = cls(root, snap["order"])
+        frontier.enqueued = set(snap["enqueued"])
+        if frontier.order == "bfs":
+            frontier._fifo = deque(snap["queue"])
+            frontier._size = len(frontier._fifo)
+        else:
+            frontier._chapters = OrderedDict((key, deque(urls)) for key, urls in snap["queue"])
+            frontier._size = sum(len(b) for b in frontier._chapters.values())
+        frontier.pushed, frontier.duplicates, frontier.popped, frontier.peak = snap["counters"]
+        return frontier
+
+    def stats(self) -> dict:
+        return {
+            "order": self.order,
+            "enqueued": self.pushed,
+            "duplicates_dropped": self.duplicates,
+            "popped": self.popped,
+            "peak_size": self.peak,
+            "remaining": self._size,
+        }
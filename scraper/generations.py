@@ -0,0 +1,246 @@
+#!/usr/bin/env python3
+"""Atomic corpus publication with generation directories (``--generations N``).
+
+Each build is written into a fresh ``generations/<id>.partial`` directory.
+Once it is complete, every file is fsynced, ``generation.json`` records the
+counts and a SHA-256 of every file, the directory is renamed to
+``generations/<id>``, and the ``current`` symlink is swapped to it with a
+single rename. A crash or Ctrl-C leaves the previous generation live and
+untouched. ``<out>/index.jsonl`` and the other top-level names are symlinks
+through ``current``, so readers keep using the old paths.
+
+Only the newest ``keep`` generations are kept.
+
+    python3 generations.py list ../corpus
+    python3 generations.py rollback ../corpus            # back to the previous generation
+    python3 generations.py rollback ../corpus 20261015T101500-4242
+"""
+import argparse
+import json
+import os
+import pathlib
+import shutil
+import sys
+import time
+from typing import Optional
+
+from search_index import file_sha256
+
+GENERATIONS_DIR = "generations"
+CURRENT = "current"
+MANIFEST = "generation.json"
+PARTIAL = ".partial"
+MANIFEST_VERSION = 1
+DEFAULT_KEEP = 3
+STALE_PARTIAL = 24 * 3600  # seconds untouched after which a partial build counts as abandoned anyway
+
+
+def _fsync_tree(root: pathlib.Path) -> None:
+    for dirpath, _, filenames in os.walk(root):
+        for name in filenames:
+            fd = os.open(os.path.join(dirpath, name), os.O_RDONLY)
+            try:
+                os.fsync(fd)
+            finally:
+                os.close(fd)
+        _fsync_dir(pathlib.Path(dirpath))
+
+
+def _fsync_dir(path: pathlib.Path) -> None:
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def _pid_running(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True  # someone else's process
+    return True
+
+
+def _abandoned(partial: pathlib.Path) -> bool:
+    """True unless a live build is still writing ``partial`` (``<id>-<pid>.partial``)."""
+    pid = partial.name[: -len(PARTIAL)].rsplit("-", 1)[-1]
+    if not pid.isdigit():
+        return True
+    if int(pid) == os.getpid():
+        return False
+    try:
+        stale = time.time() - partial.stat().st_mtime > STALE_PARTIAL
+    except FileNotFoundError:
+        return False
+    return stale or not _pid_running(int(pid))
+
+
+def uses_generations(out_dir: pathlib.Path) -> bool:
+    """True if ``out_dir`` was published with generations; its top-level names are then
+    symlinks into the live generation and must not be written through."""
+    out_dir = pathlib.Path(out_dir)
+    return (out_dir / CURRENT).is_symlink() or (out_dir / GENERATIONS_DIR).is_dir()
+
+
+def _symlink_atomic(target: str, link: pathlib.Path) -> None:
+    tmp = link.with_name(f".{link.name}.tmp")
+    tmp.unlink(missing_ok=True)
+    os.symlink(target, tmp)
+    os.replace(tmp, link)
+
+
+class Generations:
+    """The generation directories of one corpus directory."""
+
+    def __init__(self, out_dir: pathlib.Path, keep: int = DEFAULT_KEEP):
+        self.out_dir = pathlib.Path(out_dir)
+        self.root = self.out_dir / GENERATIONS_DIR
+        self.keep = max(1, keep)
+
+    def current(self) -> Optional[pathlib.Path]:
+        link = self.out_dir / CURRENT
+        return link.resolve() if link.is_symlink() and link.resolve().is_dir() else None
+
+    def previous_build(self) -> pathlib.Path:
+        """Where the last build's files are: the current generation, or the
+        corpus directory itself for a corpus built without generations."""
+        return self.current() or self.out_dir
+
+    def all(self) -> list[pathlib.Path]:
+        if not self.root.is_dir():
+            return []
+        return sorted(p for p in self.root.iterdir() if p.is_dir() and not p.name.endswith(PARTIAL))
+
+    def latest_partial(self) -> Optional[pathlib.Path]:
+        """The newest unfinished build directory no live build is writing, e.g. to resume an
+        interrupted crawl into."""
+        if not self.root.is_dir():
+            return None
+        partials = sorted(p for p in self.root.iterdir()
+                          if p.is_dir() and p.name.endswith(PARTIAL) and _abandoned(p))
+        return partials[-1] if partials else None
+
+    def adopt(self, partial: pathlib.Path) -> pathlib.Path:
+        """Take over an unfinished build directory under this process's pid, so other
+        builds' prune() sees it as live again."""
+        gen_id = partial.name[: -len(PARTIAL)].rsplit("-", 1)[0]
+        path = partial.with_name(f"{gen_id}-{os.getpid()}{PARTIAL}")
+        if path != partial:
+            os.rename(partial, path)
+        return path
+
+    def begin(self) -> pathlib.Path:
+        """Create the directory the next build writes into."""
+        self.root.mkdir(parents=True, exist_ok=True)
+        stamp, n = time.strftime("%Y%m%dT%H%M%S"), 1
+        while True:
+            # a second build within the same second gets <stamp>.2, .3, ... (sorting after the first)
+            gen_id = f"{stamp}-{os.getpid()}" if n == 1 else f"{stamp}.{n}-{os.getpid()}"
+            path = self.root / (gen_id + PARTIAL)
+            n += 1
+            if (self.root / gen_id).exists():
+                continue
+            try:
+                path.mkdir()
+            except FileExistsError:
+                continue
+            return path
+
+    def publish(self, build_dir: pathlib.Path, summary: dict) -> pathlib.Path:
+        """Seal ``build_dir``, make it ``current`` and prune old generations."""
+        files = sorted(p for p in build_dir.rglob("*") if p.is_file())
+        manifest = {
+            "version": MANIFEST_VERSION,
+            "generation": build_dir.name[: -len(PARTIAL)],
+            "created": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "counts": summary,
+            "files": {str(p.relative_to(build_dir)): {"bytes": p.stat().st_size, "sha256": file_sha256(p)}
+                      for p in files},
+        }
+        (build_dir / MANIFEST).write_text(json.dumps(manifest, ensure_ascii=False, indent=2) + "\n",
+                                          encoding="utf-8")
+        _fsync_tree(build_dir)
+
+        final = build_dir.with_name(manifest["generation"])
+        os.rename(build_dir, final)
+        _fsync_dir(self.root)
+        self.activate(final)
+        self.prune()
+        return final
+
+    def activate(self, generation: pathlib.Path) -> None:
+        """Point ``current`` (and the top-level names through it) at ``generation``."""
+        _symlink_atomic(f"{GENERATIONS_DIR}/{generation.name}", self.out_dir / CURRENT)
+        self._link_names(generation)
+        _fsync_dir(self.out_dir)
+
+    def _link_names(self, generation: pathlib.Path) -> None:
+        names = {p.name for p in generation.iterdir()}
+        for name in sorted(names):
+            link = self.out_dir / name
+            if link.is_symlink():
+                continue
+            if link.is_dir():
+                shutil.rmtree(link)  # left over from a build without generations
+            _symlink_atomic(f"{CURRENT}/{name}", link)
+        # names the new generation no longer has (e.g. a dropped --format export)
+        for link in self.out_dir.iterdir():
+            if link.is_symlink() and link.name != CURRENT and os.readlink(link).startswith(f"{CURRENT}/") \
+                    and link.name not in names:
+                link.unlink()
+
+    def prune(self) -> list[pathlib.Path]:
+        """Remove all but the newest ``keep`` generations, and unfinished builds no live process is writing."""
+        current = self.current()
+        removed = []
+        for path in self.all()[: -self.keep]:
+            if current is None or path.name != current.name:
+                shutil.rmtree(path)
+                removed.append(path)
+        for path in self.root.glob(f"*{PARTIAL}"):
+            if _abandoned(path):
+                shutil.rmtree(path, ignore_errors=True)
+                removed.append(path)
+        return removed
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Inspect or roll back corpus generations")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    ls = sub.add_parser("list", help="List generations, newest last")
+    ls.add_argument("corpus", help="Corpus directory (the scraper's --out)")
+    rb = sub.add_parser("rollback", help="Make an older generation current")
+    rb.add_argument("corpus", help="Corpus directory (the scraper's --out)")
+    rb.add_argument("generation", nargs="?", help="Generation id (default: the one before current)")
+    args = ap.parse_args()
+
+    gens = Generations(pathlib.Path(args.corpus))
+    current = gens.current()
+    available = gens.all()
+    if args.cmd == "list":
+        for path in available:
+            try:
+                counts = json.loads((path / MANIFEST).read_text(encoding="utf-8"))["counts"]
+            except (OSError, ValueError, KeyError):
+                counts = {}
+            mark = "*" if current is not None and path.name == current.name else " "
+            print(f"{mark} {path.name}  pages={counts.get('pages', '?')} chunks={counts.get('chunks', '?')}")
+        return
+
+    if args.generation:
+        target = gens.root / args.generation
+    else:
+        older = [p for p in available if current is None or p.name < current.name]
+        target = older[-1] if older else None
+    if target is None or target.name not in {p.name for p in available}:
+        print("no such generation to roll back to", file=sys.stderr)
+        sys.exit(1)
+    gens.activate(target)
+    print(f"current -> {target.name}")
+
+
+if __name__ == "__main__":
+    main()
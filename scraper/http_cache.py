@@ -0,0 +1,63 @@
+"""Persistent conditional-GET cache for the scraper.
+
+Each normalized URL maps to one JSON entry holding its ETag, Last-Modified and
+decoded body. Later crawls revalidate with If-None-Match / If-Modified-Since
+and reuse the stored body when the server answers 304 Not Modified.
+"""
+import json
+import os
+import pathlib
+import threading
+from typing import Optional
+
+from chunking import sha16
+
+
+class HttpCache:
+    def __init__(self, cache_dir):
+        self.dir = pathlib.Path(cache_dir)
+        self.dir.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self.hits = 0    # 304 Not Modified, body served from cache
+        self.misses = 0  # full download (new URL, changed page or no validators)
+
+    def _path(self, url: str) -> pathlib.Path:
+        return self.dir / f"{sha16(url)}.json"
+
+    def get(self, url: str) -> Optional[dict]:
+        try:
+            entry = json.loads(self._path(url).read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return None
+        return entry if entry.get("url") == url else None
+
+    @staticmethod
+    def conditional_headers(entry: Optional[dict]) -> dict:
+        headers = {}
+        if entry:
+            if entry.get("etag"):
+                headers["If-None-Match"] = entry["etag"]
+            if entry.get("last_modified"):
+                headers["If-Modified-Since"] = entry["last_modified"]
+        return headers
+
+    def store(self, url: str, response) -> None:
+        etag = response.headers.get("ETag")
+        last_modified = response.headers.get("Last-Modified")
+        if not etag and not last_modified:
+            return  # nothing to revalidate with next time
+        entry = {"url": url, "etag": etag, "last_modified": last_modified, "body": response.text}
+        path = self._path(url)
+        tmp = path.with_suffix(f".{threading.get_ident()}.tmp")
+        tmp.write_text(json.dumps(entry, ensure_ascii=False), encoding="utf-8")
+        os.replace(tmp, path)
+
+    def record(self, hit: bool) -> None:
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def stats(self) -> dict:
+        return {"hits": self.hits, "misses": self.misses}
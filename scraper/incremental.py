@@ -0,0 +1,136 @@
+"""Incremental corpus rebuilds for crawl_and_build.
+
+A manifest next to index.jsonl maps every page URL to the hash of its HTML and
+the chunk ids it produced. On the next build a page whose HTML hash is unchanged
+has its previous index lines copied through untouched instead of re-running
+html_to_markdown and chunk_markdown; pages that were not crawled again are
+dropped together with their chunks.
+"""
+import hashlib
+import json
+import os
+import pathlib
+from typing import Optional
+
+from dedup import DUPLICATES_NAME, raw_chunk
+
+MANIFEST_NAME = "page-manifest.json"
+MANIFEST_VERSION = 1
+
+
+def html_hash(html: str) -> str:
+    return hashlib.sha1(html.encode("utf-8")).hexdigest()
+
+
+class IncrementalBuild:
+    """Tracks one build against the manifest and index left by the previous one.
+
+    ``builder`` identifies the extraction/chunking code; when it differs from
+    the one recorded in the manifest nothing is reused. ``previous_dir`` is
+    where the previous build lives if it is not ``out_dir`` (--generations).
+    """
+
+    def __init__(self, out_dir: pathlib.Path, builder: str, reuse: bool = True,
+                 previous_dir: Optional[pathlib.Path] = None):
+        self.out_dir = pathlib.Path(out_dir)
+        self.previous_dir = pathlib.Path(previous_dir) if previous_dir is not None else self.out_dir
+        self.builder = builder
+        self.reuse = reuse
+        self.old_pages: dict[str, dict] = {}
+        self.old_lines: dict[str, str] = {}
+        self.pages: dict[str, dict] = {}
+        self.same_builder = False
+        self.counts = {"added": 0, "changed": 0, "unchanged": 0, "kept": 0, "removed": 0}
+        self._load()
+
+    def _load(self) -> None:
+        try:
+            manifest = json.loads((self.previous_dir / MANIFEST_NAME).read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return
+        if manifest.get("version") != MANIFEST_VERSION:
+            return
+        self.old_pages = manifest.get("pages", {})
+        self.same_builder = manifest.get("builder") == self.builder
+        if not self.reuse or not self.same_builder:
+            return
+        try:
+            with (self.previous_dir / "index.jsonl").open(encoding="utf-8") as f:
+                self._load_lines(f)
+        except (OSError, ValueError, KeyError):
+            self.old_lines = {}
+            return
+        # chunks --dedup dropped from index.jsonl last time
+        try:
+            with (self.previous_dir / DUPLICATES_NAME).open(encoding="utf-8") as f:
+                self._load_lines(f)
+        except OSError:
+            pass
+        except (ValueError, KeyError):
+            self.old_lines = {}
+
+    def _load_lines(self, f) -> None:
+        for line in f:
+            if line.strip():
+                chunk = json.loads(line)
+                if "alt_urls" in chunk or "duplicate_of" in chunk:
+                    # back to the line the chunker wrote; dedup runs again over the new index
+                    line = json.dumps(raw_chunk(chunk), ensure_ascii=False) + "\n"
+                self.old_lines[chunk["id"]] = line
+
+    def previous_lines(self, url: str, digest: str) -> Optional[list[str]]:
+        """Index lines written for ``url`` last time, if its HTML is unchanged."""
+        old = self.old_pages.get(url)
+        if not old or old.get("hash") != digest:
+            return None
+        return self.kept_lines(url)
+
+    def kept_lines(self, url: str) -> Optional[list[str]]:
+        """Index lines written for ``url`` last time, whatever its HTML is now; for pages
+        that could not be fetched this time."""
+        old = self.old_pages.get(url)
+        if not self.reuse or not old:
+            return None
+        lines = [self.old_lines.get(cid) for cid in old.get("chunks", [])]
+        if any(line is None for line in lines):
+            return None
+        return lines
+
+    def record_unchanged(self, url: str) -> None:
+        self.pages[url] = self.old_pages[url]
+        self.counts["unchanged"] += 1
+
+    def record_kept(self, url: str) -> None:
+        self.pages[url] = self.old_pages[url]
+        self.counts["kept"] += 1
+
+    def record(self, url: str, digest: str, chunk_ids: list[str]) -> None:
+        self.pages[url] = {"hash": digest, "chunks": chunk_ids}
+        old = self.old_pages.get(url)
+        if self.reuse and self.same_builder and old and old.get("hash") == digest:
+            # re-chunked only because its old lines are gone, e.g. a resumed in-place build
+            # that had already rewritten index.jsonl
+            self.counts["unchanged"] += 1
+        elif old:
+            self.counts["changed"] += 1
+        else:
+            self.counts["added"] += 1
+
+    def snapshot(self) -> dict:
+        """Pages recorded so far, for crawl checkpoints."""
+        return {"pages": self.pages, "counts": self.counts}
+
+    def restore(self, snap: dict) -> None:
+        self.pages = dict(snap["pages"])
+        self.counts.update(snap["counts"])
+
+    def removed(self) -> list[str]:
+        return [url for url in self.old_pages if url not in self.pages]
+
+    def write_manifest(self) -> None:
+        self.counts["removed"] = len(self.removed())
+        manifest = {"version": MANIFEST_VERSION, "builder": self.builder, "pages": self.pages}
+        path = self.out_dir / MANIFEST_NAME
+        tmp = path.with_suffix(".tmp")
+        tmp.write_text(json.dumps(manifest, ensure_ascii=False), encoding="utf-8")
+        os.replace(tmp, path)
@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+"""Fast extractor backend (``--parser lxml-fast``) built on lxml's element tree.
+
+Produces the same title and Markdown as ``html_to_markdown`` on a
+BeautifulSoup tree, but without building the soup: navigation, aside and TOC
+subtrees are pruned while walking the content root once, instead of running a
+CSS select to decompose them and then visiting every element with find_all.
+
+Run it as a script to check parity with the BeautifulSoup extractor:
+
+    python3 lxml_extractor.py fixtures/*.html
+"""
+import sys
+
+import lxml.html
+from lxml import etree
+
+# Tags whose strings BeautifulSoup stores as Script/Stylesheet/TemplateString/
+# ruby strings, which get_text() leaves out.
+_STRING_CONTAINERS = frozenset(("script", "style", "template", "rt", "rp"))
+
+# Mirrors the select() in html_to_markdown that decomposes navigation/UI elements.
+_PRUNED_TAGS = frozenset(("nav", "button", "aside", "header", "footer"))
+_PRUNED_CLASS_PARTS = ("toc", "arrangement", "sidebar", "menu")
+_NAV_LI_CLASS_PARTS = ("toc", "arrangement", "nav", "menu", "sidebar")
+
+
+def parse(html: str):
+    """Parse a document into an lxml tree rooted at <html>."""
+    try:
+        return lxml.html.document_fromstring(html)
+    except ValueError:
+        # str input with an XML encoding declaration
+        return lxml.html.document_fromstring(html.encode("utf-8"), lxml.html.HTMLParser(encoding="utf-8"))
+    except etree.ParserError:
+        return lxml.html.document_fromstring("<html></html>")
+
+
+def links(doc) -> list[str]:
+    """href of every <a href> in document order, like soup.select("a[href]")."""
+    return [a.get("href") for a in doc.iter("a") if a.get("href") is not None]
+
+
+def _pruned(el) -> bool:
+    if el.tag in _PRUNED_TAGS or el.get("role") == "navigation":
+        return True
+    cls = el.get("class")
+    return bool(cls) and any(part in cls for part in _PRUNED_CLASS_PARTS)
+
+
+def _strings(el, prune: bool, hidden: bool = False):
+    """Text nodes under ``el`` in document order, as BeautifulSoup's get_text() sees them."""
+    hidden = hidden or el.tag in _STRING_CONTAINERS
+    if el.text and not hidden:
+        yield el.text
+    for child in el:
+        if isinstance(child.tag, str) and not (prune and _pruned(child)):
+            yield from _strings(child, prune, hidden)
+        # a tail is a sibling string of the child in the soup, so it survives decompose()
+        if child.tail and not hidden:
+            yield child.tail
+
+
+def _text(el, prune: bool = True, hidden: bool = False) -> str:
+    return " ".join(s for s in (t.strip() for t in _strings(el, prune, hidden)) if s)
+
+
+def _walk(el, parts: list[str], hidden: bool = False) -> None:
+    for child in el:
+        name = child.tag
+        if not isinstance(name, str) or _pruned(child):
+            continue
+        if name in ("h2", "h3"):
+            txt = _text(child, hidden=hidden)
+            if txt:
+                parts.append(f"{'#' * (2 if name == 'h2' else 3)} {txt}\n")
+        elif name == "p":
+            txt = _text(child, hidden=hidden)
+            if txt:
+                parts.append(txt + "\n")
+        elif name == "pre":
+            parts.append("```\n" + "".join(_strings(child, True, hidden)) + "\n```\n")
+        elif name == "li":
+            classes = (child.get("class") or "").split()
+            if not any(part in c for c in classes for part in _NAV_LI_CLASS_PARTS):
+                txt = _text(child, hidden=hidden)
+                if txt:
+                    parts.append(f"- {txt}\n")
+        # descendants are emitted too, exactly like the find_all() walk
+        _walk(child, parts, hidden or name in _STRING_CONTAINERS)
+
+
+def to_markdown(doc) -> tuple[str, str]:
+    h1 = next(doc.iter("h1", "title"), None)
+    if h1 is not None:
+        hidden = any(a.tag in _STRING_CONTAINERS for a in h1.iterancestors())
+        title = _text(h1, prune=False, hidden=hidden).strip() or "Untitled"
+    else:
+        title = "Untitled"
+    root = next(doc.iter("main", "article"), None)
+    if root is None:
+        root = next(doc.iter("body"), None)
+    if root is None:
+        root = doc
+
+    parts = [f"# {title}\n"]
+    _walk(root, parts, any(a.tag in _STRING_CONTAINERS for a in root.iterancestors()))
+    md = "\n".join(parts).strip()
+    return title, md
+
+
+def html_to_markdown(html: str) -> tuple[str, str]:
+    return to_markdown(parse(html))
+
+
+def main():
+    from scrape_and_build_omarchy import html_to_markdown as soup_to_markdown, parse_html
+
+    paths = sys.argv[1:]
+    if not paths:
+        print("usage: lxml_extractor.py FILE.html [...]", file=sys.stderr)
+        sys.exit(2)
+
+    failed = 0
+    for path in paths:
+        with open(path, encoding="utf-8") as f:
+            html = f.read()
+        expected = soup_to_markdown(parse_html(html))
+        doc = parse(html)
+        actual = to_markdown(doc)
+        expected_links = [a.get("href", "") for a in parse_html(html).select("a[href]")]
+        if actual == expected and links(doc) == expected_links:
+            print(f"OK   {path}")
+            continue
+        failed += 1
+        print(f"DIFF {path}")
+        if actual[0] != expected[0]:
+            print(f"  title: {expected[0]!r} != {actual[0]!r}")
+        for i, (a, b) in enumerate(zip(expected[1].splitlines(), actual[1].splitlines())):
+            if a != b:
+                print(f"  line {i + 1}:\n    bs4:  {a!r}\n    lxml: {b!r}")
+                break
+        if links(doc) != expected_links:
+            print("  links differ")
+    print(f"\n{len(paths) - failed}/{len(paths)} fixtures match")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
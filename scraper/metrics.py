@@ -0,0 +1,181 @@
+"""Stage timing and build metrics for crawl_and_build.
+
+Besides the per-stage totals, every page gets a record with its own fetch,
+parse, extract, chunk and write seconds, the bytes downloaded for it and the
+number of chunks it produced. ``summary()`` turns those into percentiles, and
+the summary can be written as JSON (``--metrics-out``) or as a Prometheus
+textfile (``--prometheus-out``) for node_exporter's textfile collector.
+"""
+import contextlib
+import json
+import math
+import os
+import pathlib
+import threading
+import time
+from typing import Optional
+
+STAGES = ("fetch", "parse", "extract", "chunk", "write")
+PERCENTILES = (50, 90, 95, 99)
+SLOWEST_PAGES = 10
+
+
+def percentile(values: list[float], pct: float) -> float:
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    k = (len(ordered) - 1) * pct / 100
+    lo, hi = math.floor(k), math.ceil(k)
+    return ordered[lo] + (ordered[hi] - ordered[lo]) * (k - lo)
+
+
+class BuildMetrics:
+    """Accumulates seconds spent per pipeline stage, in total and per page.
+
+    Fetch time is summed over concurrent fetches, so with ``--engine async`` it
+    can exceed wall-clock time.
+    """
+
+    def __init__(self):
+        self.totals = dict.fromkeys(STAGES, 0.0)
+        self.pages: list[dict] = []
+        self.bytes_downloaded = 0
+        self.started = time.time()
+        self._start = time.perf_counter()
+        self._fetched: dict[str, dict] = {}  # fetch stats waiting for their page record
+        self._lock = threading.Lock()
+
+    def add(self, stage: str, seconds: float, page: Optional[dict] = None) -> None:
+        with self._lock:
+            self.totals[stage] += seconds
+        if page is not None:
+            page[stage] += seconds
+
+    @contextlib.contextmanager
+    def time(self, stage: str, page: Optional[dict] = None):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(stage, time.perf_counter() - start, page)
+
+    def timed_fetch(self, fn):
+        """Wrap ``fetch(url)`` so its time is kept for the page record of ``url``.
+
+        Safe to call from the async engine's fetch threads.
+        """
+        def wrapper(url, *args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return fn(url, *args, **kwargs)
+            finally:
+                seconds = time.perf_counter() - start
+                with self._lock:
+                    self.totals["fetch"] += seconds
+                    self._fetched.setdefault(url, {"bytes": 0})["fetch"] = seconds
+        return wrapper
+
+    def downloaded(self, url: str, nbytes: int) -> None:
+        """Count response body bytes received for ``url`` (0 for a 304)."""
+        with self._lock:
+            self.bytes_downloaded += nbytes
+            self._fetched.setdefault(url, {"fetch": 0.0, "bytes": 0})["bytes"] += nbytes
+
+    def start_page(self, url: str) -> dict:
+        """Open the record for a fetched page; pass it to ``time()``/``add()``."""
+        with self._lock:
+            fetched = self._fetched.pop(url, {})
+        page = {"url": url, **dict.fromkeys(STAGES, 0.0)}
+        page["fetch"] = fetched.get("fetch", 0.0)
+        page["bytes"] = fetched.get("bytes", 0)
+        page["chunks"] = 0
+        page["unchanged"] = False
+        return page
+
+    def finish_page(self, page: dict, chunks: int, unchanged: bool = False) -> None:
+        page["chunks"] = chunks
+        page["unchanged"] = unchanged
+        page["total"] = sum(page[stage] for stage in STAGES)
+        self.pages.append(page)
+
+    def summary(self) -> dict:
+        """Totals, per-page percentiles for every stage and the slowest pages."""
+        stages = {}
+        for stage in STAGES + ("total",):
+            values = [p[stage] for p in self.pages]
+            stats = {"total": round(self.totals[stage] if stage in self.totals else sum(values), 6)}
+            stats.update({f"p{pct}": round(percentile(values, pct), 6) for pct in PERCENTILES})
+            stats["max"] = round(max(values, default=0.0), 6)
+            stages[stage] = stats
+        slowest = sorted(self.pages, key=lambda p: p["total"], reverse=True)[:SLOWEST_PAGES]
+        return {
+            "started": self.started,
+            "wall_s": round(time.perf_counter() - self._start, 6),
+            "pages": len(self.pages),
+            "unchanged_pages": sum(p["unchanged"] for p in self.pages),
+            "chunks": sum(p["chunks"] for p in self.pages),
+            "bytes_downloaded": self.bytes_downloaded,
+            "stages": stages,
+            "slowest_pages": [{"url": p["url"], "total": round(p["total"], 6)} for p in slowest],
+            "per_page": [{k: round(v, 6) if isinstance(v, float) else v for k, v in p.items()}
+                         for p in self.pages],
+        }
+
+
+def _atomic_write(path, text: str) -> None:
+    # the textfile collector may read at any moment, so never expose a partial file
+    path = pathlib.Path(path)
+    tmp = path.with_name(f".{path.name}.tmp")
+    tmp.write_text(text, encoding="utf-8")
+    os.replace(tmp, path)
+
+
+def write_json(summary: dict, path) -> None:
+    _atomic_write(path, json.dumps(summary, ensure_ascii=False, indent=2) + "\n")
+
+
+def _label(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _num(value) -> str:
+    return str(value) if isinstance(value, int) else repr(round(float(value), 6))
+
+
+def prometheus_text(summary: dict, prefix: str = "omarchy_build") -> str:
+    """Render ``summary`` in the Prometheus text exposition format."""
+    lines = []
+
+    def metric(name, kind, help_text, samples):
+        lines.append(f"# HELP {prefix}_{name} {help_text}")
+        lines.append(f"# TYPE {prefix}_{name} {kind}")
+        for labels, value in samples:
+            lines.append(f"{prefix}_{name}{labels} {_num(value)}")
+
+    metric("last_run_timestamp_seconds", "gauge", "Unix time the build started.",
+           [("", summary["started"])])
+    metric("duration_seconds", "gauge", "Wall-clock duration of the build.", [("", summary["wall_s"])])
+    metric("pages", "gauge", "Pages written by the build.", [("", summary["pages"])])
+    metric("unchanged_pages", "gauge", "Pages reused unchanged by an incremental build.",
+           [("", summary["unchanged_pages"])])
+    metric("chunks", "gauge", "Chunks written by the build.", [("", summary["chunks"])])
+    metric("downloaded_bytes", "gauge", "Response body bytes downloaded.", [("", summary["bytes_downloaded"])])
+
+    stages = summary["stages"]
+    metric("stage_seconds", "gauge", "Seconds spent per pipeline stage, summed over pages.",
+           [(f'{{stage="{s}"}}', stages[s]["total"]) for s in STAGES])
+    name = f"{prefix}_page_stage_seconds"
+    lines.append(f"# HELP {name} Per-page seconds per pipeline stage.")
+    lines.append(f"# TYPE {name} summary")
+    for s in STAGES + ("total",):
+        for pct in PERCENTILES:
+            lines.append(f'{name}{{stage="{s}",quantile="{pct / 100:g}"}} {_num(stages[s][f"p{pct}"])}')
+        lines.append(f'{name}_sum{{stage="{s}"}} {_num(sum(p[s] for p in summary["per_page"]))}')
+        lines.append(f'{name}_count{{stage="{s}"}} {summary["pages"]}')
+    metric("slowest_page_seconds", "gauge", "Total seconds for the slowest pages of the build.",
+           [(f'{{url="{_label(p["url"])}"}}', p["total"]) for p in summary["slowest_pages"]])
+    return "\n".join(lines) + "\n"
+
+
+def write_prometheus(summary: dict, path) -> None:
+    _atomic_write(path, prometheus_text(summary))
@@ -0,0 +1,235 @@
+#!/usr/bin/env python3
+"""Storage for the full page records (url, title, markdown) of a corpus.
+
+``files`` is the original layout: one pretty-printed ``pages/<sha16(url)>.json``
+per page. ``sqlite`` packs every page into a single ``pages.sqlite`` keyed by
+the same ``sha16(url)``, so a crawl writes pages in batched transactions
+instead of one file per page, lookups are a primary-key probe, and backups
+copy one file.
+
+Migrate an existing corpus from ``pages/`` to ``pages.sqlite``:
+
+    python3 page_store.py migrate ../corpus            # keeps pages/
+    python3 page_store.py migrate ../corpus --remove   # deletes pages/ once verified
+    python3 page_store.py get ../corpus https://learn.omacom.io/2/the-omarchy-manual/...
+"""
+import argparse
+import json
+import os
+import pathlib
+import shutil
+import sqlite3
+import sys
+from typing import Optional
+
+from chunking import sha16
+
+PAGE_STORES = ("files", "sqlite")
+PAGES_DIR = "pages"
+SQLITE_NAME = "pages.sqlite"
+BATCH = 256
+
+
+def page_key(url: str) -> str:
+    return sha16(url)
+
+
+class FilePageStore:
+    """One JSON file per page under ``pages/``."""
+
+    def __init__(self, out_dir: pathlib.Path, readonly: bool = False):
+        self.path = pathlib.Path(out_dir) / PAGES_DIR
+        if not readonly:
+            self.path.mkdir(parents=True, exist_ok=True)
+
+    def _file(self, url: str) -> pathlib.Path:
+        return self.path / f"{page_key(url)}.json"
+
+    def __contains__(self, url: str) -> bool:
+        return self._file(url).exists()
+
+    def put(self, page: dict) -> None:
+        # replace rather than rewrite in place: the file may be hard-linked into an older generation
+        path = self._file(page["url"])
+        tmp = path.with_suffix(".tmp")
+        tmp.write_text(json.dumps(page, ensure_ascii=False, indent=2), encoding="utf-8")
+        os.replace(tmp, path)
+
+    def get(self, url: str) -> Optional[dict]:
+        return self.get_by_key(page_key(url))
+
+    def get_by_key(self, key: str) -> Optional[dict]:
+        try:
+            return json.loads((self.path / f"{key}.json").read_text(encoding="utf-8"))
+        except FileNotFoundError:
+            return None
+
+    def remove(self, url: str) -> None:
+        self._file(url).unlink(missing_ok=True)
+
+    def __iter__(self):
+        for f in sorted(self.path.glob("*.json")):
+            yield json.loads(f.read_text(encoding="utf-8"))
+
+    def flush(self) -> None:
+        pass  # every put() is already on disk
+
+    def close(self) -> None:
+        pass
+
+
+class SqlitePageStore:
+    """All pages in one SQLite file, written in batches of ``BATCH`` pages per transaction.
+
+    With ``readonly`` the file is opened for lookups only: no pragmas, no schema
+    and no checkpoint on close, so a published generation is left untouched.
+    """
+
+    def __init__(self, out_dir: pathlib.Path, readonly: bool = False):
+        self.path = pathlib.Path(out_dir) / SQLITE_NAME
+        self.readonly = readonly
+        self._pending: list[tuple] = []
+        if readonly:
+            self._db = sqlite3.connect(f"{self.path.resolve().as_uri()}?mode=ro", uri=True)
+            return
+        self._db = sqlite3.connect(self.path)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS pages ("
+            " key TEXT PRIMARY KEY, url TEXT NOT NULL, title TEXT NOT NULL, markdown TEXT NOT NULL"
+            ") WITHOUT ROWID"
+        )
+        self._db.commit()
+
+    def flush(self) -> None:
+        if self._pending:
+            with self._db:
+                self._db.executemany("INSERT OR REPLACE INTO pages VALUES (?, ?, ?, ?)", self._pending)
+            self._pending = []
+
+    def __contains__(self, url: str) -> bool:
+        key = page_key(url)
+        if any(p[0] == key for p in self._pending):
+            return True
+        return self._db.execute("SELECT 1 FROM pages WHERE key = ?", (key,)).fetchone() is not None
+
+    def put(self, page: dict) -> None:
+        self._pending.append((page_key(page["url"]), page["url"], page["title"], page["markdown"]))
+        if len(self._pending) >= BATCH:
+            self.flush()
+
+    def get(self, url: str) -> Optional[dict]:
+        return self.get_by_key(page_key(url))
+
+    def get_by_key(self, key: str) -> Optional[dict]:
+        self.flush()
+        row = self._db.execute("SELECT url, title, markdown FROM pages WHERE key = ?", (key,)).fetchone()
+        return {"url": row[0], "title": row[1], "markdown": row[2]} if row else None
+
+    def remove(self, url: str) -> None:
+        self.flush()
+        with self._db:
+            self._db.execute("DELETE FROM pages WHERE key = ?", (page_key(url),))
+
+    def __iter__(self):
+        self.flush()
+        for url, title, markdown in self._db.execute("SELECT url, title, markdown FROM pages ORDER BY key"):
+            yield {"url": url, "title": title, "markdown": markdown}
+
+    def close(self) -> None:
+        if self.readonly:
+            self._db.close()
+            return
+        self.flush()
+        # leave a single self-contained file, which read-only opens need no -wal/-shm files for
+        self._db.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        self._db.execute("PRAGMA journal_mode=DELETE")
+        self._db.close()
+
+
+def open_page_store(out_dir: pathlib.Path, kind: str = "files", readonly: bool = False):
+    return SqlitePageStore(out_dir, readonly) if kind == "sqlite" else FilePageStore(out_dir, readonly)
+
+
+def seed_page_store(src_dir: pathlib.Path, dst_dir: pathlib.Path, kind: str = "files") -> None:
+    """Start ``dst_dir``'s store as a copy of ``src_dir``'s, so unchanged pages need not be rewritten.
+
+    Page files are hard-linked where the filesystem allows it.
+    """
+    if kind == "sqlite":
+        if (pathlib.Path(src_dir) / SQLITE_NAME).exists():
+            # src is usually the published generation: read it, never open it for writing
+            src = SqlitePageStore(src_dir, readonly=True)
+            dst = sqlite3.connect(pathlib.Path(dst_dir) / SQLITE_NAME)
+            try:
+                src._db.backup(dst)
+            finally:
+                dst.close()
+                src.close()
+        return
+    src = pathlib.Path(src_dir) / PAGES_DIR
+    if not src.is_dir():
+        return
+    dst = pathlib.Path(dst_dir) / PAGES_DIR
+    dst.mkdir(parents=True, exist_ok=True)
+    for f in src.glob("*.json"):
+        try:
+            os.link(f, dst / f.name)
+        except OSError:
+            shutil.copy2(f, dst / f.name)
+
+
+def migrate(out_dir: pathlib.Path, remove: bool = False) -> int:
+    """Copy ``pages/*.json`` into ``pages.sqlite``; with ``remove``, delete the files once verified."""
+    src = FilePageStore(out_dir)
+    dst = SqlitePageStore(out_dir)
+    files = sorted(src.path.glob("*.json"))
+    try:
+        for f in files:
+            dst.put(json.loads(f.read_text(encoding="utf-8")))
+        dst.flush()
+        for f in files:
+            if dst.get_by_key(f.stem) != json.loads(f.read_text(encoding="utf-8")):
+                raise RuntimeError(f"{f}: copy in {dst.path} does not match")
+    finally:
+        dst.close()
+    if remove:
+        for f in files:
+            f.unlink()
+        if not any(src.path.iterdir()):
+            src.path.rmdir()
+    return len(files)
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Manage the page store of a corpus")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    m = sub.add_parser("migrate", help="Pack pages/*.json into pages.sqlite")
+    m.add_argument("corpus", help="Corpus directory (the scraper's --out)")
+    m.add_argument("--remove", action="store_true", help="Delete pages/ after the copy is verified")
+    g = sub.add_parser("get", help="Print one page as JSON")
+    g.add_argument("corpus", help="Corpus directory (the scraper's --out)")
+    g.add_argument("url", help="Page URL, or its 16-hex-digit key")
+    args = ap.parse_args()
+
+    out_dir = pathlib.Path(args.corpus)
+    if args.cmd == "migrate":
+        n = migrate(out_dir, remove=args.remove)
+        print(f"Migrated {n} pages into {out_dir / SQLITE_NAME}" + (" (pages/ removed)" if args.remove else ""))
+        return
+
+    kind = "sqlite" if (out_dir / SQLITE_NAME).exists() else "files"
+    store = open_page_store(out_dir, kind, readonly=True)
+    try:
+        page = store.get_by_key(args.url) if "/" not in args.url else store.get(args.url)
+    finally:
+        store.close()
+    if page is None:
+        print(f"not found: {args.url}", file=sys.stderr)
+        sys.exit(1)
+    print(json.dumps(page, ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+"""Inverted-index query engine over index.jsonl with BM25F ranking.
+
+Every chunk is tokenized per field (title, heading, markdown) into Porter stems
+with their positions. A query only walks the postings of its own terms, so the
+cost depends on how common the query terms are rather than on corpus size.
+
+    python3 query_engine.py search "screenshot shortcuts" --limit 10
+    python3 query_engine.py bench --queries queries.txt --repeat 20
+"""
+import argparse
+import functools
+import heapq
+import json
+import math
+import pathlib
+import statistics
+import time
+from typing import Optional
+
+from metrics import percentile
+from search_index import content_words, porter_stem
+
+FIELDS = ("title", "heading", "markdown")
+# Same relative weights the server gives Fuse.js for title / heading / body
+DEFAULT_WEIGHTS = {"title": 3.0, "heading": 2.0, "markdown": 1.0}
+DEFAULT_B = {"title": 0.5, "heading": 0.5, "markdown": 0.75}
+DEFAULT_K1 = 1.2
+DEFAULT_INDEX = pathlib.Path(__file__).resolve().parent.parent / "corpus" / "index.jsonl"
+
+
+stem = functools.lru_cache(maxsize=1 << 16)(porter_stem)
+
+
+def analyze(text: str) -> list[str]:
+    """Tokens as indexed: lowercase content words (no stopwords), Porter-stemmed."""
+    return [stem(w) for w in content_words(text)]
+
+
+class InvertedIndex:
+    """term -> postings of ``(chunk position, positions per field)``."""
+
+    def __init__(self, chunks: list[dict]):
+        self.chunks = chunks
+        self.postings: dict[str, list[tuple[int, tuple[list[int], ...]]]] = {}
+        self.field_lengths = {f: [0] * len(chunks) for f in FIELDS}
+
+        for doc, ch in enumerate(chunks):
+            per_term: dict[str, tuple[list[int], ...]] = {}
+            for fi, field in enumerate(FIELDS):
+                tokens = analyze(ch.get(field) or "")
+                self.field_lengths[field][doc] = len(tokens)
+                for pos, term in enumerate(tokens):
+                    positions = per_term.get(term)
+                    if positions is None:
+                        positions = per_term[term] = tuple([] for _ in FIELDS)
+                    positions[fi].append(pos)
+            for term, positions in per_term.items():
+                self.postings.setdefault(term, []).append((doc, positions))
+
+        n = max(1, len(chunks))
+        self.avg_length = {f: (sum(self.field_lengths[f]) / n) or 1.0 for f in FIELDS}
+
+    @classmethod
+    def from_jsonl(cls, path) -> "InvertedIndex":
+        with open(path, encoding="utf-8") as f:
+            return cls([json.loads(line) for line in f if line.strip()])
+
+    def __len__(self) -> int:
+        return len(self.chunks)
+
+    def idf(self, term: str) -> float:
+        df = len(self.postings.get(term, ()))
+        return math.log(1 + (len(self.chunks) - df + 0.5) / (df + 0.5))
+
+    def search(self, query: str, limit: int = 10, k1: float = DEFAULT_K1,
+               weights: Optional[dict] = None, b: Optional[dict] = None) -> list[tuple[float, dict]]:
+        """BM25F: field term frequencies are length-normalized, weighted and summed
+        before the k1 saturation, then scaled by the term's IDF."""
+        weights = weights or DEFAULT_WEIGHTS
+        b = b or DEFAULT_B
+        field_params = [
+            (fi, weights[f], b[f], self.avg_length[f], self.field_lengths[f])
+            for fi, f in enumerate(FIELDS)
+        ]
+
+        scores: dict[int, float] = {}
+        for term in dict.fromkeys(analyze(query)):
+            postings = self.postings.get(term)
+            if not postings:
+                continue
+            idf = self.idf(term)
+            for doc, positions in postings:
+                tf = 0.0
+                for fi, w, bf, avg, lengths in field_params:
+                    if positions[fi]:
+                        tf += w * len(positions[fi]) / (1 - bf + bf * lengths[doc] / avg)
+                scores[doc] = scores.get(doc, 0.0) + idf * tf / (k1 + tf)
+
+        top = heapq.nlargest(limit, scores.items(), key=lambda kv: kv[1])
+        return [(score, self.chunks[doc]) for doc, score in top]
+
+
+def cmd_search(index: InvertedIndex, args) -> None:
+    start = time.perf_counter()
+    results = index.search(args.query, limit=args.limit)
+    elapsed = (time.perf_counter() - start) * 1000
+    if args.json:
+        print(json.dumps([
+            {"score": round(score, 4), "id": ch["id"], "title": ch["title"],
+             "heading": ch.get("heading", ""), "url": ch["url"]}
+            for score, ch in results
+        ], ensure_ascii=False, indent=2))
+        return
+    for rank, (score, ch) in enumerate(results, 1):
+        heading = f" — {ch['heading']}" if ch.get("heading") else ""
+        print(f"{rank:2d}. {score:7.3f}  {ch['id']}  {ch['title']}{heading}")
+        print(f"    {ch['url']}")
+    print(f"\n{len(results)} results in {elapsed:.2f}ms")
+
+
+def cmd_bench(index: InvertedIndex, args) -> None:
+    if args.queries:
+        queries = [q.strip() for q in pathlib.Path(args.queries).read_text(encoding="utf-8").splitlines()]
+        queries = [q for q in queries if q and not q.startswith("#")]
+    else:
+        queries = ["shortcuts", "theme settings", "how to screenshot", "wifi setup", "neovim config"]
+    if not queries:
+        print(f"No queries to run in {args.queries}")
+        return
+
+    timings = []
+    for q in queries:
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            index.search(q, limit=args.limit)
+            timings.append((time.perf_counter() - start) * 1000)
+
+    print(f"Queries: {len(queries)} x {args.repeat}")
+    print(f"Latency: mean {statistics.fmean(timings):.3f}ms, p50 {percentile(timings, 50):.3f}ms, "
+          f"p95 {percentile(timings, 95):.3f}ms, p99 {percentile(timings, 99):.3f}ms")
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Search or benchmark a corpus built by scrape_and_build_omarchy.py")
+    ap.add_argument("--index", default=str(DEFAULT_INDEX), help="Path to index.jsonl (default: %(default)s)")
+    sub = ap.add_subparsers(dest="command", required=True)
+
+    sp = sub.add_parser("search", help="Run one query and print the ranked chunks")
+    sp.add_argument("query")
+    sp.add_argument("--limit", type=int, default=10, help="Max results (default: 10)")
+    sp.add_argument("--json", action="store_true", help="Print results as JSON")
+
+    bp = sub.add_parser("bench", help="Time a batch of queries against the index")
+    bp.add_argument("--queries", default=None, help="File with one query per line (default: a few built-in queries)")
+    bp.add_argument("--repeat", type=int, default=20, help="Runs per query (default: 20)")
+    bp.add_argument("--limit", type=int, default=10, help="Max results per query (default: 10)")
+
+    args = ap.parse_args()
+    if args.command == "bench" and args.repeat < 1:
+        ap.error("--repeat must be at least 1")
+
+    start = time.perf_counter()
+    index = InvertedIndex.from_jsonl(args.index)
+    load_ms = (time.perf_counter() - start) * 1000
+    if args.command == "bench":
+        print(f"Index: {len(index)} chunks, {len(index.postings)} terms, built in {load_ms:.1f}ms")
+        cmd_bench(index, args)
+    else:
+        cmd_search(index, args)
+
+
+if __name__ == "__main__":
+    main()
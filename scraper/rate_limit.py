@@ -0,0 +1,150 @@
+"""Adaptive per-host rate limiting and retries for the scraper's fetches.
+
+Each host gets a token bucket whose rate starts at the configured ceiling
+(``--wait`` / ``--host-rate``) and never exceeds it. The rate is halved when
+the server answers 429 or 503 and eased down while response times climb
+well above the fastest seen, then recovers step by step once responses are
+healthy again. A ``Retry-After`` header pauses the whole host for that long.
+
+Connection errors, timeouts and 429/500/502/503/504 responses are retried
+with jittered exponential backoff ("full jitter": a random delay between 0
+and ``base * 2**attempt``, capped).
+"""
+import email.utils
+import random
+import threading
+import time
+import urllib.parse
+from typing import Optional
+
+TRANSIENT_STATUS = frozenset({429, 500, 502, 503, 504})
+THROTTLE_STATUS = frozenset({429, 503})
+MIN_RATE = 0.2           # requests/s a throttled host is never slowed below
+MAX_RETRY_AFTER = 300.0  # ignore absurd Retry-After values beyond this many seconds
+LATENCY_FACTOR = 2.0     # slow down once latency exceeds this multiple of the baseline...
+LATENCY_SLACK = 0.25     # ...and the baseline by at least this many seconds
+EWMA_ALPHA = 0.2
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Seconds to wait from a Retry-After header (delta-seconds or HTTP-date)."""
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        seconds = float(value)
+    else:
+        try:
+            seconds = email.utils.parsedate_to_datetime(value).timestamp() - time.time()
+        except (TypeError, ValueError):
+            return None
+    return min(max(0.0, seconds), MAX_RETRY_AFTER)
+
+
+class TokenBucket:
+    """Token bucket for one host, adapting its rate to how the host responds.
+
+    ``ceiling`` is the configured maximum rate in requests/s (0 = unlimited).
+    Callers reserve a token in ``acquire`` and sleep outside the lock, so
+    concurrent fetch threads are spaced out rather than serialized.
+    """
+
+    def __init__(self, ceiling: float, burst: float = 1.0):
+        self.ceiling = ceiling if ceiling > 0 else float("inf")
+        self.rate = self.ceiling
+        self.burst = max(1.0, burst)
+        self._tokens = self.burst
+        self._last = time.monotonic()
+        self._paused_until = 0.0
+        self._interval: Optional[float] = None  # EWMA of the time between request starts
+        self._latency: Optional[float] = None   # EWMA of response latency
+        self._baseline: Optional[float] = None  # lowest latency EWMA seen
+        self._lock = threading.Lock()
+
+    def acquire(self) -> float:
+        """Block until a request may start; returns the seconds waited."""
+        with self._lock:
+            now = time.monotonic()
+            elapsed = now - self._last
+            self._interval = elapsed if self._interval is None else \
+                self._interval + EWMA_ALPHA * (elapsed - self._interval)
+            self._last = now
+            if self.rate == float("inf"):
+                wait = 0.0
+            else:
+                self._tokens = min(self.burst, self._tokens + elapsed * self.rate) - 1
+                wait = -self._tokens / self.rate if self._tokens < 0 else 0.0
+            wait = max(wait, self._paused_until - now)
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+    def feedback(self, status: Optional[int], latency: float, retry_after: Optional[float] = None) -> None:
+        """Adjust the rate after a response (``status`` None for a connection error or timeout)."""
+        with self._lock:
+            if retry_after is not None:
+                self._paused_until = max(self._paused_until, time.monotonic() + retry_after)
+            if status in THROTTLE_STATUS or status is None:
+                # unlimited hosts start throttling from the rate they were actually getting
+                current = self.rate if self.rate != float("inf") else 1.0 / max(self._interval or 1.0, 1e-3)
+                self.rate = max(MIN_RATE, current / 2)
+                return
+            self._latency = latency if self._latency is None else \
+                self._latency + EWMA_ALPHA * (latency - self._latency)
+            self._baseline = self._latency if self._baseline is None else min(self._baseline, self._latency)
+            if self._latency > max(LATENCY_FACTOR * self._baseline, self._baseline + LATENCY_SLACK):
+                current = self.rate if self.rate != float("inf") else 1.0 / max(self._interval or 1.0, 1e-3)
+                self.rate = max(MIN_RATE, current * 0.9)
+            elif self.rate < self.ceiling:
+                # additive increase back towards the ceiling
+                step = self.ceiling / 20 if self.ceiling != float("inf") else self.rate / 10
+                self.rate = min(self.ceiling, self.rate + max(step, MIN_RATE))
+
+
+class RateLimiter:
+    """One adaptive TokenBucket per host."""
+
+    def __init__(self, ceiling: float):
+        self.ceiling = ceiling
+        self._buckets: dict[str, TokenBucket] = {}
+        self._lock = threading.Lock()
+        self.waited = 0.0
+
+    def bucket(self, url: str) -> TokenBucket:
+        host = urllib.parse.urlsplit(url).netloc
+        with self._lock:
+            bucket = self._buckets.get(host)
+            if bucket is None:
+                bucket = self._buckets[host] = TokenBucket(self.ceiling)
+            return bucket
+
+    def acquire(self, url: str) -> None:
+        waited = self.bucket(url).acquire()
+        with self._lock:
+            self.waited += waited
+
+    def feedback(self, url: str, status: Optional[int], latency: float, retry_after: Optional[float] = None) -> None:
+        self.bucket(url).feedback(status, latency, retry_after)
+
+    def rates(self) -> dict[str, float]:
+        with self._lock:
+            return {host: b.rate for host, b in self._buckets.items()}
+
+
+class RetryPolicy:
+    """How often and how long to back off before retrying a transient failure."""
+
+    def __init__(self, retries: int = 3, base: float = 0.5, cap: float = 30.0):
+        self.retries = max(0, retries)
+        self.base = base
+        self.cap = cap
+        self.retried = 0
+        self._lock = threading.Lock()
+
+    def delay(self, attempt: int, retry_after: Optional[float] = None) -> float:
+        """Seconds to sleep before retry number ``attempt + 1``."""
+        with self._lock:
+            self.retried += 1
+        if retry_after is not None:
+            return retry_after
+        return random.uniform(0, min(self.cap, self.base * 2 ** attempt))
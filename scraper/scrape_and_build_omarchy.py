@@ -1,12 +1,32 @@
 #!/usr/bin/env python3
-import time, pathlib, json, re, hashlib, sys, urllib.parse, argparse
+import time, pathlib, json, os, re, sys, urllib.parse, argparse, threading, contextlib
+import concurrent.futures, functools
+from typing import Optional
 import requests
 from bs4 import BeautifulSoup
 
-DEFAULT_ROOT = "https://learn.omacom.io/2/the-omarchy-manual/"
+import ann
+import async_engine
+import corpus_format
+import embeddings
+from checkpoint import Checkpointer
+from chunking import CHUNKINGS, chunk_by_tokens, chunk_id, split_section
+from dedup import DUPLICATES_NAME, dedup_index
+from frontier import Frontier, ORDERS
+from generations import DEFAULT_KEEP, Generations, uses_generations
+from http_cache import HttpCache
+from incremental import IncrementalBuild, html_hash
+from metrics import BuildMetrics, write_json as write_metrics_json, write_prometheus
+from page_store import PAGE_STORES, open_page_store, seed_page_store
+from rate_limit import TRANSIENT_STATUS, RateLimiter, RetryPolicy, parse_retry_after
+from search_index import write_search_index
+from seeding import SEEDS, seed_urls
 
-def sha16(s: str) -> str:
-    return hashlib.sha1(s.encode("utf-8")).hexdigest()[:16]
+DEFAULT_ROOT = "https://learn.omacom.io/2/the-omarchy-manual/"
+# Bump whenever extraction or chunking output changes, so incremental builds
+# stop reusing chunks produced by the old code.
+BUILDER_VERSION = "4"
+USER_AGENT = "OmarchyBot/1.0 (documentation-scraper; github.com/omarchy-mcp-search)"
 
 def abs_url(href: str, base: str) -> str:
     return urllib.parse.urljoin(base, href)
@@ -28,15 +48,95 @@ def same_manual_path(url: str, root_prefix: str) -> bool:
     r = normalize_url(root_prefix)
     return u == r or u.startswith(r + "/")
 
-def load_html(session: requests.Session, url: str) -> BeautifulSoup:
-    r = session.get(url, timeout=25)
+def make_session() -> requests.Session:
+    session = requests.Session()
+    session.headers.update({
+        "User-Agent": USER_AGENT,
+        "Accept": "text/html,application/xhtml+xml",
+    })
+    return session
+
+_thread_state = threading.local()
+
+def thread_session() -> requests.Session:
+    """One Session per worker thread; requests.Session is not safe to share across threads."""
+    session = getattr(_thread_state, "session", None)
+    if session is None:
+        session = _thread_state.session = make_session()
+    return session
+
+def get_with_retries(session: requests.Session, url: str, headers: dict,
+                     limiter: Optional[RateLimiter] = None,
+                     retry: Optional[RetryPolicy] = None) -> requests.Response:
+    """GET through the host's rate limiter, retrying connection errors and 429/5xx with backoff."""
+    attempt = 0
+    while True:
+        if limiter is not None:
+            limiter.acquire(url)
+        start = time.monotonic()
+        try:
+            r = session.get(url, timeout=25, headers=headers)
+        except (requests.ConnectionError, requests.Timeout):
+            if limiter is not None:
+                limiter.feedback(url, None, time.monotonic() - start)
+            if retry is None or attempt >= retry.retries:
+                raise
+            time.sleep(retry.delay(attempt))
+        else:
+            retry_after = parse_retry_after(r.headers.get("Retry-After"))
+            if limiter is not None:
+                limiter.feedback(url, r.status_code, time.monotonic() - start, retry_after)
+            if r.status_code not in TRANSIENT_STATUS or retry is None or attempt >= retry.retries:
+                return r
+            time.sleep(retry.delay(attempt, retry_after))
+        attempt += 1
+
+def fetch_html(session: requests.Session, url: str, cache: Optional[HttpCache] = None,
+               metrics: Optional[BuildMetrics] = None, limiter: Optional[RateLimiter] = None,
+               retry: Optional[RetryPolicy] = None) -> str:
+    entry = cache.get(url) if cache is not None else None
+    r = get_with_retries(session, url, HttpCache.conditional_headers(entry), limiter, retry)
+    if metrics is not None:
+        metrics.downloaded(url, len(r.content))
+    if cache is None:
+        r.raise_for_status()
+        return r.text
+
+    if r.status_code == 304 and entry:
+        cache.record(hit=True)
+        return entry["body"]
     r.raise_for_status()
-    html = r.text
+    cache.store(url, r)
+    cache.record(hit=False)
+    return r.text
+
+def parse_html(html: str) -> BeautifulSoup:
     try:
         return BeautifulSoup(html, "lxml")
     except Exception:
         return BeautifulSoup(html, "html.parser")
 
+def fetch_seed(session: requests.Session, url: str) -> Optional[bytes]:
+    """Body of a sitemap/llms.txt candidate, or None if it is missing or unreachable."""
+    try:
+        r = session.get(url, timeout=25)
+    except requests.RequestException:
+        return None
+    return r.content if r.ok else None
+
+PARSERS = ("bs4", "lxml-fast")
+
+def parse_page(html: str, parser: str = "bs4"):
+    """Parse a page once; returns its hrefs and a callable producing (title, markdown)."""
+    if parser == "lxml-fast":
+        import lxml_extractor  # needs lxml, unlike the default BeautifulSoup path
+
+        doc = lxml_extractor.parse(html)
+        return lxml_extractor.links(doc), lambda: lxml_extractor.to_markdown(doc)
+    soup = parse_html(html)
+    hrefs = [a.get("href", "") for a in soup.select("a[href]")]
+    return hrefs, lambda: html_to_markdown(soup)
+
 def html_to_markdown(soup: BeautifulSoup) -> tuple[str, str]:
     h1 = soup.select_one("main h1, article h1, h1, title")
     title = (h1.get_text(" ", strip=True) if h1 else "").strip() or "Untitled"
@@ -80,190 +180,507 @@ def html_to_markdown(soup: BeautifulSoup) -> tuple[str, str]:
     md = "\n".join(parts).strip()
     return title, md
 
+_SECTION_START = re.compile(r"^##\s|^###\s", re.M)
+
+def iter_sections(md: str):
+    """Yield the stripped, non-empty sections of ``md``, each starting at an h2/h3 line."""
+    start = 0
+    for m in _SECTION_START.finditer(md):
+        if m.start() > start:
+            sec = md[start:m.start()].strip()
+            if sec:
+                yield sec
+        start = m.start()
+    sec = md[start:].strip()
+    if sec:
+        yield sec
+
+def section_heading(sec: str) -> str:
+    if not sec.startswith(("## ", "### ")):
+        return ""
+    return sec.splitlines()[0].lstrip("# ").strip()
+
 def chunk_markdown(md: str, title: str, url: str, max_chars=2500, min_words=30):
-    sections = re.split(r"(?=^##\s|^###\s)", md, flags=re.M) or [md]
-    chunk_counter = 0
+    """Split page Markdown into chunks at h2/h3 sections.
+
+    Sections under ``min_words`` are buffered together until the buffer holds
+    ``2 * min_words`` words; sections over ``max_chars`` are split between
+    paragraphs, list items and code blocks (see chunking.split_section).
+    Buffer size is tracked with a running word count, so the cost is linear
+    in the page size however many headings it has.
+    """
+    used_ids = set()
     pending_sections = []  # Buffer to accumulate small sections
+    pending_words = 0
+    pending_path = ""
+    h2 = ""  # heading of the enclosing h2, for the heading path of h3 sections
 
-    def word_count(text):
-        return len(text.split())
-
-    def flush_pending():
-        """Yield buffered sections as a single chunk."""
-        nonlocal chunk_counter, pending_sections
-        if not pending_sections:
-            return
-
-        combined = "\n\n".join(pending_sections)
-        # Extract heading from first section if it has one
-        heading = ""
-        first_lines = pending_sections[0].splitlines()
-        if first_lines and first_lines[0].startswith(("## ", "### ")):
-            heading = first_lines[0].lstrip("# ").strip()
-
-        yield {
-            "id": sha16(f"{url}|{chunk_counter}"),
+    def make_chunk(heading, markdown, heading_path):
+        return {
+            "id": chunk_id(url, heading_path, markdown, used_ids),
             "title": title,
             "heading": heading,
             "url": url,
-            "markdown": combined.strip()
+            "markdown": markdown
         }
-        chunk_counter += 1
-        pending_sections = []
-
-    for sec in sections:
-        sec = sec.strip()
-        if not sec:
-            continue
-
-        lines = sec.splitlines()
-        heading = ""
-        if lines and lines[0].startswith(("## ", "### ")):
-            heading = lines[0].lstrip("# ").strip()
 
-        wc = word_count(sec)
+    def flush_pending():
+        """Return buffered sections as a single chunk, headed by the first one's heading."""
+        nonlocal pending_sections, pending_words
+        chunk = make_chunk(section_heading(pending_sections[0]), "\n\n".join(pending_sections), pending_path)
+        pending_sections = []
+        pending_words = 0
+        return chunk
+
+    for sec in iter_sections(md):
+        wc = len(sec.split())
+        heading = section_heading(sec)
+        if sec.startswith("## "):
+            h2 = heading
+            heading_path = heading
+        elif heading:
+            heading_path = f"{h2} > {heading}" if h2 else heading
+        else:
+            heading_path = ""
 
         # If this section is tiny (< min_words), buffer it with others
         if wc < min_words:
+            if not pending_sections:
+                pending_path = heading_path
             pending_sections.append(sec)
-            # Flush if buffered content is getting large enough
-            if word_count("\n\n".join(pending_sections)) >= min_words * 2:
-                yield from flush_pending()
+            # sections are stripped and joined by blank lines, so word counts add up
+            pending_words += wc
+            if pending_words >= min_words * 2:
+                yield flush_pending()
             continue
 
         # Flush any buffered tiny sections before processing this larger one
         if pending_sections:
-            yield from flush_pending()
+            yield flush_pending()
 
         # If section fits in one chunk, yield it
         if len(sec) <= max_chars:
-            yield {
-                "id": sha16(f"{url}|{chunk_counter}"),
-                "title": title,
-                "heading": heading,
-                "url": url,
-                "markdown": sec
-            }
-            chunk_counter += 1
-        else:
-            # Smart chunking: split at word boundaries
-            words = sec.split()
-            current_chunk = []
-            current_size = 0
-
-            for word in words:
-                word_len = len(word) + 1  # +1 for space
-
-                # If adding this word exceeds limit and we have content, yield chunk
-                if current_size + word_len > max_chars and current_chunk:
-                    chunk_text = ' '.join(current_chunk)
-                    yield {
-                        "id": sha16(f"{url}|{chunk_counter}"),
-                        "title": title,
-                        "heading": heading,
-                        "url": url,
-                        "markdown": chunk_text
-                    }
-                    chunk_counter += 1
-                    current_chunk = []
-                    current_size = 0
-
-                current_chunk.append(word)
-                current_size += word_len
-
-            # Yield remaining words
-            if current_chunk:
-                chunk_text = ' '.join(current_chunk)
-                yield {
-                    "id": sha16(f"{url}|{chunk_counter}"),
-                    "title": title,
-                    "heading": heading,
-                    "url": url,
-                    "markdown": chunk_text
-                }
-                chunk_counter += 1
+            yield make_chunk(heading, sec, heading_path)
+            continue
+
+        # Oversized: split between Markdown blocks, repeating the heading on each piece
+        for piece in split_section(sec, max_chars):
+            yield make_chunk(heading, piece, heading_path)
 
     # Flush any remaining buffered sections
     if pending_sections:
-        yield from flush_pending()
-
-def crawl_and_build(root_url: str, out_dir: pathlib.Path, wait_sec=1.0, max_pages=1000):
-    out_pages = out_dir / "pages"
-    out_pages.mkdir(parents=True, exist_ok=True)
-    out_index = out_dir / "index.jsonl"
+        yield flush_pending()
+
+def process_page(url: str, html: str, parser: str = "bs4", chunker=None):
+    """Parse, extract and chunk one page, with the seconds spent per stage.
+    Runs in a worker process with --workers."""
+    t0 = time.perf_counter()
+    hrefs, extract = parse_page(html, parser)
+    t1 = time.perf_counter()
+    title, md = extract()
+    t2 = time.perf_counter()
+    chunks = list((chunker or chunk_markdown)(md, title, url))
+    t3 = time.perf_counter()
+    return hrefs, title, md, chunks, {"parse": t1 - t0, "extract": t2 - t1, "chunk": t3 - t2}
+
+def iter_pages_sequential(next_url, fetch):
+    """Yield ``(url, html, None, error)`` one blocking fetch at a time; ``fetch`` does its own pacing."""
+    while True:
+        url = next_url()
+        if url is None:
+            return
+        try:
+            html = fetch(url)
+        except Exception as e:
+            yield url, None, None, e
+            continue
+        yield url, html, None, None
 
-    session = requests.Session()
-    session.headers.update({
-        "User-Agent": "OmarchyBot/1.0 (documentation-scraper; github.com/omarchy-mcp-search)",
-        "Accept": "text/html,application/xhtml+xml",
-    })
+RETRY_LIST = "retry-urls.txt"
 
+def read_retry_list(out_dir: pathlib.Path) -> list[str]:
+    try:
+        return (out_dir / RETRY_LIST).read_text(encoding="utf-8").split()
+    except OSError:
+        return []
+
+def write_retry_list(out_dir: pathlib.Path, urls: list[str]) -> None:
+    """URLs that still failed after all retries, one per line; removed once a run has none."""
+    path = out_dir / RETRY_LIST
+    if urls:
+        path.write_text("".join(u + "\n" for u in urls), encoding="utf-8")
+    else:
+        path.unlink(missing_ok=True)
+
+def crawl_and_build(root_url: str, out_dir: pathlib.Path, wait_sec=1.0, max_pages=1000,
+                    engine="sync", concurrency=8, host_rate=5.0, order="bfs", cache_dir=None,
+                    incremental=False, parser="bs4", workers=1, metrics_out=None, prometheus_out=None,
+                    chunking="sections", max_tokens=512, overlap_tokens=64, output_format="jsonl", page_store="files", generations=0,
+                    resume=False, checkpoint_interval=10.0, seed_from="none", retries=3,
+                    dedup=None, embedding_dims=0,
+                    ann_lists=None):
+    if chunking == "tokens":
+        chunker = functools.partial(chunk_by_tokens, max_tokens=max_tokens, overlap_tokens=overlap_tokens)
+        builder = f"{BUILDER_VERSION}/tokens-{max_tokens}-{overlap_tokens}"
+    else:
+        chunker = chunk_markdown
+        builder = BUILDER_VERSION
     root_norm = normalize_url(root_url)
-    seen = set()
-    queue = [root_norm]  # normalized root only
-
-    total_pages = 0
-    total_chunks = 0
-
-    with out_index.open("w", encoding="utf-8") as jl:
-        while queue and total_pages < max_pages:
-            raw = queue.pop(0)
-            url = normalize_url(raw)
-            if url in seen:
-                continue
-            seen.add(url)
-            if not same_manual_path(url, root_norm):
-                continue
-
-            try:
-                soup = load_html(session, url)
-            except Exception as e:
-                print(f"SKIP {url} ({e})", file=sys.stderr)
+    checkpoint_key = {"root": root_norm, "order": order, "builder": builder, "page_store": page_store,
+                      "incremental": incremental}
+
+    if not generations and uses_generations(out_dir):
+        # its top-level files are symlinks into the live generation; never write through them
+        print(f"{out_dir} is published as generations; building a new one (keeping {DEFAULT_KEEP})",
+              file=sys.stderr)
+        generations = DEFAULT_KEEP
+    gens = Generations(out_dir, keep=generations) if generations else None
+    state = None
+    if gens is not None:
+        # build off to the side; out_dir keeps serving the last generation until publish()
+        previous_dir = gens.previous_build()
+        partial = gens.latest_partial() if resume else None
+        if partial is not None:
+            state = Checkpointer(partial, checkpoint_key).load()
+        if state is not None:
+            build_dir = gens.adopt(partial)
+        else:
+            build_dir = gens.begin()
+            if incremental:
+                seed_page_store(previous_dir, build_dir, page_store)
+    else:
+        build_dir = previous_dir = out_dir
+        if resume:
+            state = Checkpointer(build_dir, checkpoint_key).load()
+    if resume and state is None:
+        print("No matching checkpoint to resume; starting a fresh crawl", file=sys.stderr)
+    checkpoints = Checkpointer(build_dir, checkpoint_key, checkpoint_interval)
+
+    out_index = build_dir / "index.jsonl"
+    if state is not None:
+        # drop whatever was written after the last checkpoint
+        with out_index.open("r+b") as f:
+            f.truncate(state["index_bytes"])
+    pages_out = open_page_store(build_dir, page_store)
+    build = IncrementalBuild(build_dir, builder, reuse=incremental, previous_dir=previous_dir)
+
+    if state is not None:
+        frontier = Frontier.from_snapshot(root_norm, state["frontier"])
+        build.restore(state["build"])
+        total_pages, total_chunks = state["pages"], state["chunks"]
+        failed = state.get("failed", [])
+        print(f"Resuming after {total_pages} pages ({len(frontier)} queued) in {build_dir}")
+    else:
+        frontier = Frontier(root_norm, order)
+        frontier.push(root_norm)
+        total_pages = total_chunks = 0
+        failed = []
+        # pages that failed last time get another chance even if nothing links them now
+        for u in read_retry_list(out_dir):
+            if same_manual_path(u, root_norm):
+                frontier.push(normalize_url(u))
+    cache = HttpCache(cache_dir) if cache_dir else None
+    metrics = BuildMetrics()
+
+    seeded = 0
+    if seed_from != "none" and state is None:
+        with metrics.time("fetch"):
+            urls, source = seed_urls(lambda u: fetch_seed(thread_session(), u), root_norm, seed_from,
+                                   concurrency=max(concurrency, workers))
+        for u in urls:
+            nu = normalize_url(u)
+            if same_manual_path(nu, root_norm) and frontier.push(nu):
+                seeded += 1
+        print(f"Seeded {seeded} URLs from {source} ({len(urls)} listed)")
+
+    # --wait / --host-rate are now the ceiling of an adaptive per-host rate
+    limiter = RateLimiter(host_rate if engine == "async" else (1.0 / wait_sec if wait_sec > 0 else 0.0))
+    retry = RetryPolicy(retries)
+
+    pool = None
+    if engine == "async":
+        if workers > 1:
+            pool = concurrent.futures.ProcessPoolExecutor(max_workers=workers)
+        fetch = metrics.timed_fetch(lambda u: fetch_html(thread_session(), u, cache, metrics, limiter, retry))
+        pages = async_engine.iter_pages(
+            frontier.pop, lambda: iter(frontier), fetch,
+            concurrency=max(concurrency, workers),
+            process=functools.partial(process_page, parser=parser, chunker=chunker) if pool else None, process_pool=pool,
+        )
+    else:
+        session = make_session()
+        fetch = metrics.timed_fetch(lambda u: fetch_html(session, u, cache, metrics, limiter, retry))
+        pages = iter_pages_sequential(frontier.pop, fetch)
+
+    def checkpoint():
+        with metrics.time("write"):
+            jl.flush()
+            os.fsync(jl.fileno())
+            pages_out.flush()
+            checkpoints.save({
+                "pages": total_pages,
+                "chunks": total_chunks,
+                "index_bytes": os.fstat(jl.fileno()).st_size,
+                "frontier": frontier.snapshot(),
+                "build": build.snapshot(),
+                "failed": failed,
+            })
+
+    with out_index.open("a" if state is not None else "w", encoding="utf-8") as jl, contextlib.closing(pages):
+        for url, html, processed, err in pages:
+            if err is not None:
+                print(f"SKIP {url} ({err})", file=sys.stderr)
+                failed.append(url)
+                kept = build.kept_lines(url)
+                if kept is not None and url in pages_out:
+                    # keep the last good copy until the page can be fetched again
+                    with metrics.time("write"):
+                        jl.writelines(kept)
+                    total_chunks += len(kept)
+                    build.record_kept(url)
                 continue
+            stats = metrics.start_page(url)
+            if processed is not None:
+                hrefs, title, md, chunks, timings = processed
+                for stage, seconds in timings.items():
+                    metrics.add(stage, seconds, stats)
+            else:
+                with metrics.time("parse", stats):
+                    hrefs, extract = parse_page(html, parser)
+                chunks = None
 
             # enqueue new links
-            for a in soup.select("a[href]"):
-                href = a.get("href", "")
+            for href in hrefs:
                 if not href:
                     continue
                 absu = abs_url(href, url + "/")  # base w/ slash to resolve relatives
                 nu = normalize_url(absu)
-                if same_manual_path(nu, root_norm) and nu not in seen:
-                    queue.append(nu)
-
-            # extract page
-            title, md = html_to_markdown(soup)
-            page = {"url": url, "title": title, "markdown": md}
-            (out_pages / f"{sha16(url)}.json").write_text(
-                json.dumps(page, ensure_ascii=False, indent=2), encoding="utf-8"
-            )
+                if same_manual_path(nu, root_norm):
+                    frontier.push(nu)
+
+            digest = html_hash(html)
+            previous = build.previous_lines(url, digest)
+            if previous is not None and url not in pages_out:
+                previous = None  # e.g. first build after switching --page-store
+            if previous is not None:
+                # unchanged since the last build: copy its chunks through untouched
+                with metrics.time("write", stats):
+                    jl.writelines(previous)
+                total_chunks += len(previous)
+                build.record_unchanged(url)
+            else:
+                if chunks is None:
+                    # extract & chunk page
+                    with metrics.time("extract", stats):
+                        title, md = extract()
+                    with metrics.time("chunk", stats):
+                        chunks = list(chunker(md, title, url))
+
+                with metrics.time("write", stats):
+                    pages_out.put({"url": url, "title": title, "markdown": md})
+                    for ch in chunks:
+                        jl.write(json.dumps(ch, ensure_ascii=False) + "\n")
+                total_chunks += len(chunks)
+                build.record(url, digest, [ch["id"] for ch in chunks])
             total_pages += 1
-
-            # chunk & write
-            for ch in chunk_markdown(md, title, url):
-                jl.write(json.dumps(ch, ensure_ascii=False) + "\n")
-                total_chunks += 1
-
-            print(f"[{total_pages}] {url}")
-            time.sleep(wait_sec)
-
+            metrics.finish_page(stats, len(previous) if previous is not None else len(chunks),
+                                unchanged=previous is not None)
+
+            print(f"[{total_pages}] {url}" + (" (unchanged)" if previous is not None else ""))
+            if total_pages >= max_pages:
+                break
+            if checkpoints.due():
+                checkpoint()
+
+    if pool is not None:
+        pool.shutdown(cancel_futures=True)
+
+    with metrics.time("write"):
+        for url in build.removed():
+            pages_out.remove(url)
+        pages_out.close()
+        build.write_manifest()
+        write_retry_list(out_dir, failed)
+        checkpoints.clear()
+        dedup_stats = None
+        if dedup is not None:
+            dedup_stats = dedup_index(out_index, dedup)
+            total_chunks = dedup_stats["chunks_after"]
+        else:
+            (build_dir / DUPLICATES_NAME).unlink(missing_ok=True)  # left by an earlier --dedup build
+        out_search = write_search_index(out_index)
+        out_export = corpus_format.export(out_index, output_format)
+        out_vectors = None
+        if embedding_dims:
+            out_vectors = embeddings.write_embeddings(out_index, embedding_dims, ann_lists)
+        else:
+            embeddings.remove_embeddings(out_index)  # left by an earlier --embeddings build
+
+    generation = None
+    if gens is not None:
+        with metrics.time("write"):
+            counts = {"pages": total_pages, "chunks": total_chunks, **build.counts}
+            generation = gens.publish(build_dir, counts)
+        out_index, out_search = out_dir / out_index.name, out_dir / out_search.name
+        if out_export is not None:
+            out_export = out_dir / out_export.name
+        if out_vectors is not None:
+            out_vectors = out_dir / out_vectors.name
+
+    summary = metrics.summary()
+    if metrics_out:
+        write_metrics_json(summary, metrics_out)
+    if prometheus_out:
+        write_prometheus(summary, prometheus_out)
+
+    fs = dict(frontier.stats(), seeded=seeded)
     print(f"\nDONE. Pages: {total_pages}, Chunks: {total_chunks}")
-    print(f"Pages dir: {out_pages}")
+    print(f"Frontier:  {fs['enqueued']} enqueued, {fs['duplicates_dropped']} duplicates dropped, "
+          f"peak {fs['peak_size']}, {fs['remaining']} left ({fs['order']})"
+          + (f", {seeded} seeded" if seed_from != "none" else ""))
+    if incremental:
+        c = build.counts
+        print(f"Incremental: {c['added']} added, {c['changed']} changed, "
+              f"{c['removed']} removed, {c['unchanged']} unchanged, {c['kept']} kept after failing")
+    if dedup_stats is not None:
+        d = dedup_stats
+        print(f"Dedup:     {d['chunks_before'] - d['chunks_after']} near-duplicate chunks collapsed "
+              f"({(d['bytes_before'] - d['bytes_after']) / 1024:.0f} KiB saved), "
+              f"{d['canonical_with_alt_urls']} chunks carry alt_urls")
+    if retry.retried or failed:
+        print(f"Retries:   {retry.retried} retried, {len(failed)} failed"
+              + (f" (listed in {out_dir / RETRY_LIST})" if failed else ""))
+    if checkpoints.saves:
+        share = checkpoints.seconds / summary["wall_s"] * 100 if summary["wall_s"] else 0.0
+        print(f"Checkpoints: {checkpoints.saves} saved, {checkpoints.seconds:.3f}s ({share:.2f}% of the build)")
+    if cache is not None:
+        print(f"HTTP cache: {cache.hits} hits (304), {cache.misses} misses ({cache.dir})")
+    if generation is not None:
+        print(f"Generation: {generation.name} (current, keeping {gens.keep})")
+    print(f"Pages:     {out_dir / pages_out.path.name if gens else pages_out.path}")
     print(f"Index:     {out_index}")
+    print(f"Search:    {out_search}")
+    if out_export is not None:
+        print(f"Export:    {out_export} ({output_format})")
+    if out_vectors is not None:
+        ivf = "" if ann_lists is None else f", IVF index in {ann.IVF_DIR}/"
+        print(f"Vectors:   {out_vectors} ({embedding_dims} dims{ivf})")
+    fetch_p95, total_p95 = summary["stages"]["fetch"]["p95"], summary["stages"]["total"]["p95"]
+    print(f"Timing:    {summary['wall_s']:.1f}s, {summary['bytes_downloaded'] / 1e6:.1f} MB downloaded, "
+          f"p95 per page {total_p95 * 1000:.0f}ms (fetch {fetch_p95 * 1000:.0f}ms)")
+    for path in (metrics_out, prometheus_out):
+        if path:
+            print(f"Metrics:   {path}")
+
+    return {
+        "pages": total_pages,
+        "chunks": total_chunks,
+        "stages": dict(metrics.totals),
+        "metrics": summary,
+        "frontier": fs,
+        "cache": cache.stats() if cache is not None else None,
+        "incremental": dict(build.counts) if incremental else None,
+        "checkpoints": {"saves": checkpoints.saves, "seconds": checkpoints.seconds},
+        "dedup": dedup_stats,
+        "retries": {"retried": retry.retried, "failed": failed, "rate_wait_s": limiter.waited},
+    }
 
 def main():
     ap = argparse.ArgumentParser(description="Scrape Omarchy manual into a chunked corpus")
     ap.add_argument("--root", default=DEFAULT_ROOT, help="Root URL (default: %(default)s)")
     ap.add_argument("--out", default="corpus", help="Output directory (default: corpus)")
-    ap.add_argument("--wait", type=float, default=1.0, help="Delay between requests in seconds (default: 1.0)")
+    ap.add_argument("--wait", type=float, default=1.0,
+                    help="Minimum delay between requests in seconds; slowed down further when the server "
+                         "throttles or slows (default: 1.0)")
     ap.add_argument("--max-pages", type=int, default=1000, help="Safety cap on pages (default: 1000)")
+    ap.add_argument("--engine", choices=("sync", "async"), default="sync",
+                    help="Fetch engine: one page at a time, or several in flight (default: sync)")
+    ap.add_argument("--concurrency", type=int, default=8,
+                    help="Max fetches in flight with --engine async (default: 8)")
+    ap.add_argument("--host-rate", type=float, default=5.0,
+                    help="Max request starts per second per host with --engine async; adaptive below that "
+                         "(default: 5.0)")
+    ap.add_argument("--retries", type=int, default=3,
+                    help="Retries for connection errors, timeouts and 429/5xx responses, with jittered "
+                         "exponential backoff (default: 3)")
+    ap.add_argument("--order", choices=ORDERS, default="bfs",
+                    help="Crawl order: breadth-first, or depth-first within each chapter (default: bfs)")
+    ap.add_argument("--cache-dir", default=None,
+                    help="Directory for the conditional-GET HTTP cache (default: no cache)")
+    ap.add_argument("--incremental", action="store_true",
+                    help="Reuse chunks of pages whose HTML did not change since the last build in --out")
+    ap.add_argument("--parser", choices=PARSERS, default="bs4",
+                    help="HTML extractor: BeautifulSoup, or a single-pass lxml tree walk with identical output (default: bs4)")
+    ap.add_argument("--workers", type=int, default=1,
+                    help="Processes for parsing and chunking with --engine async (default: 1, inline)")
+    ap.add_argument("--chunking", choices=CHUNKINGS, default="sections",
+                    help="Chunking: one chunk per h2/h3 section, or packed to a token budget with overlap (default: sections)")
+    ap.add_argument("--max-tokens", type=int, default=512,
+                    help="Approximate tokens per chunk with --chunking tokens (default: 512)")
+    ap.add_argument("--overlap-tokens", type=int, default=64,
+                    help="Tokens repeated from the previous chunk with --chunking tokens (default: 64)")
+    ap.add_argument("--page-store", choices=PAGE_STORES, default="files",
+                    help="Full page records: one JSON file per page, or a single pages.sqlite (default: files)")
+    ap.add_argument("--generations", type=int, default=0, metavar="N",
+                    help="Build into a new generation directory, publish it atomically via the 'current' "
+                         "symlink and keep the newest N (default: 0, write into --out directly)")
+    ap.add_argument("--format", choices=corpus_format.FORMATS, default="jsonl",
+                    help="Also export index.jsonl as framed gzip/zstd JSONL or columnar files (default: jsonl only)")
+    ap.add_argument("--metrics-out", default=None,
+                    help="Write per-stage and per-page timings with percentiles to this JSON file")
+    ap.add_argument("--prometheus-out", default=None,
+                    help="Write build metrics in Prometheus textfile format to this path (e.g. build.prom)")
+    ap.add_argument("--resume", action="store_true",
+                    help="Continue an interrupted crawl from its last checkpoint instead of starting over")
+    ap.add_argument("--checkpoint-interval", type=float, default=10.0, metavar="SEC",
+                    help="Seconds between crawl checkpoints (default: 10)")
+    ap.add_argument("--seed-from", choices=SEEDS, default="none",
+                    help="Queue the URLs listed in sitemap.xml or llms.txt before crawling; auto tries both "
+                         "(default: none, discover pages through links only)")
+    ap.add_argument("--dedup", type=float, nargs="?", const=0.9, default=None, metavar="SIMILARITY",
+                    help="Collapse chunks at least this similar (Jaccard of word 3-shingles) into one that lists "
+                         "the other URLs in alt_urls (default: off; 0.9 if given without a value)")
+    ap.add_argument("--embeddings", type=int, nargs="?", const=embeddings.DEFAULT_DIMS, default=0, metavar="DIMS",
+                    help="Also compute offline LSA vectors for semantic search (needs NumPy; "
+                         f"default: off, {embeddings.DEFAULT_DIMS} dims if given without a value)")
+    ap.add_argument("--ann", type=int, nargs="?", const=0, default=None, metavar="LISTS",
+                    help="With --embeddings, also build an IVF index for approximate search on large corpora "
+                         "(default: off; about 4*sqrt(chunks) lists if given without a value)")
     args = ap.parse_args()
+    if args.workers > 1 and args.engine != "async":
+        ap.error("--workers needs --engine async")
+    if args.max_tokens < 16 or not 0 <= args.overlap_tokens < args.max_tokens:
+        ap.error("--max-tokens must be at least 16 and --overlap-tokens between 0 and --max-tokens")
+    if args.dedup is not None and not 0 < args.dedup <= 1:
+        ap.error("--dedup similarity must be in (0, 1]")
+    if args.embeddings and not embeddings.available():
+        ap.error("--embeddings needs NumPy (pip install numpy)")
+    if args.embeddings < 0:
+        ap.error("--embeddings dimensions must be positive")
+    if args.ann is not None and (not args.embeddings or args.ann < 0):
+        ap.error("--ann needs --embeddings and a positive number of lists")
+    if not corpus_format.available(args.format):
+        ap.error(f"--format {args.format} needs the zstandard package (pip install zstandard)")
+    if args.parser == "lxml-fast":
+        try:
+            import lxml_extractor
+        except ImportError:
+            ap.error("--parser lxml-fast needs the lxml package (pip install lxml)")
 
     out_dir = pathlib.Path(args.out)
     out_dir.mkdir(parents=True, exist_ok=True)
     print(f"Root: {args.root}")
     print(f"Out:  {out_dir}")
-    crawl_and_build(args.root, out_dir, wait_sec=args.wait, max_pages=args.max_pages)
+    crawl_and_build(args.root, out_dir, wait_sec=args.wait, max_pages=args.max_pages,
+                    engine=args.engine, concurrency=args.concurrency, host_rate=args.host_rate,
+                    order=args.order, cache_dir=args.cache_dir,
+                    incremental=args.incremental, parser=args.parser, workers=args.workers,
+                    metrics_out=args.metrics_out, prometheus_out=args.prometheus_out,
+                    chunking=args.chunking, max_tokens=args.max_tokens, overlap_tokens=args.overlap_tokens,
+                    output_format=args.format, page_store=args.page_store, generations=args.generations,
+                    resume=args.resume, checkpoint_interval=args.checkpoint_interval, seed_from=args.seed_from,
+                    retries=args.retries, dedup=args.dedup,
+                    embedding_dims=args.embeddings, ann_lists=args.ann)
 
 if __name__ == "__main__":
     main()
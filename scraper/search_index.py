@@ -0,0 +1,269 @@
+#!/usr/bin/env python3
+"""Precomputed search index built from index.jsonl.
+
+The MCP server derives keywords, Porter stems, term frequencies and document
+frequencies for every chunk on each cold start. This module does that work once
+at build time, mirroring the server's tokenization, and writes the result to
+``search-index.json`` next to ``index.jsonl``.
+
+The artifact records its format version and the SHA-256 of the index.jsonl it
+was built from, so a consumer can tell when it is stale and fall back to
+tokenizing the chunks itself.
+"""
+import argparse
+import hashlib
+import json
+import math
+import os
+import pathlib
+import re
+from typing import Optional
+
+FORMAT = "omarchy-search-index"
+FORMAT_VERSION = 1
+SEARCH_INDEX_NAME = "search-index.json"
+
+# Same list as STOPWORDS in mcp-server/src/server.ts
+STOPWORDS = frozenset("""
+a an and are as at be by for from has he in is it its of on that the to was will
+with you your this can all or but not have
+""".split())
+
+_NON_WORD = re.compile(r"[^\w\s]", re.ASCII)  # JS /[^\w\s]/g: \w is ASCII-only there too
+
+
+def words(text: str) -> list[str]:
+    """Lowercase, replace punctuation with spaces and keep words longer than two chars."""
+    return [w for w in _NON_WORD.sub(" ", text.lower()).split() if len(w) > 2]
+
+
+def content_words(text: str) -> list[str]:
+    return [w for w in words(text) if w not in STOPWORDS]
+
+
+def top_keywords(terms: list[str], limit: int = 20) -> list[str]:
+    freq: dict[str, int] = {}
+    for t in terms:
+        freq[t] = freq.get(t, 0) + 1
+    # sorted() is stable, so ties keep first-occurrence order like the server's Map
+    return [t for t, _ in sorted(freq.items(), key=lambda kv: -kv[1])[:limit]]
+
+
+# ---------------------------------------------------------------------------
+# Porter stemmer (reference algorithm, as used by natural's PorterStemmer)
+# ---------------------------------------------------------------------------
+
+def _is_cons(w: str, i: int) -> bool:
+    c = w[i]
+    if c in "aeiou":
+        return False
+    if c == "y":
+        return i == 0 or not _is_cons(w, i - 1)
+    return True
+
+
+def _measure(stem: str) -> int:
+    """Number of VC sequences in ``stem``."""
+    m, prev_vowel = 0, False
+    for i in range(len(stem)):
+        vowel = not _is_cons(stem, i)
+        if prev_vowel and not vowel:
+            m += 1
+        prev_vowel = vowel
+    return m
+
+
+def _has_vowel(stem: str) -> bool:
+    return any(not _is_cons(stem, i) for i in range(len(stem)))
+
+
+def _double_cons(w: str) -> bool:
+    return len(w) >= 2 and w[-1] == w[-2] and _is_cons(w, len(w) - 1)
+
+
+def _cvc(w: str) -> bool:
+    """Ends consonant-vowel-consonant, where the last consonant is not w, x or y."""
+    if len(w) < 3:
+        return False
+    return (_is_cons(w, len(w) - 3) and not _is_cons(w, len(w) - 2)
+            and _is_cons(w, len(w) - 1) and w[-1] not in "wxy")
+
+
+def _replace(w: str, rules, min_measure: int) -> str:
+    for suffix, repl in rules:
+        if w.endswith(suffix):
+            stem = w[:-len(suffix)]
+            return stem + repl if _measure(stem) > min_measure else w
+    return w
+
+
+_STEP2 = (
+    ("ational", "ate"), ("tional", "tion"), ("enci", "ence"), ("anci", "ance"),
+    ("izer", "ize"), ("bli", "ble"), ("alli", "al"), ("entli", "ent"), ("eli", "e"),
+    ("ousli", "ous"), ("ization", "ize"), ("ation", "ate"), ("ator", "ate"),
+    ("alism", "al"), ("iveness", "ive"), ("fulness", "ful"), ("ousness", "ous"),
+    ("aliti", "al"), ("iviti", "ive"), ("biliti", "ble"), ("logi", "log"),
+)
+_STEP3 = (
+    ("icate", "ic"), ("ative", ""), ("alize", "al"), ("iciti", "ic"),
+    ("ical", "ic"), ("ful", ""), ("ness", ""),
+)
+_STEP4 = (
+    "al", "ance", "ence", "er", "ic", "able", "ible", "ant", "ement", "ment",
+    "ent", "ion", "ou", "ism", "ate", "iti", "ous", "ive", "ize",
+)
+
+
+def porter_stem(w: str) -> str:
+    w = w.lower()
+    if len(w) <= 2:
+        return w
+
+    # step 1a
+    if w.endswith("sses") or w.endswith("ies"):
+        w = w[:-2]
+    elif w.endswith("s") and not w.endswith("ss"):
+        w = w[:-1]
+
+    # step 1b
+    if w.endswith("eed"):
+        if _measure(w[:-3]) > 0:
+            w = w[:-1]
+    else:
+        for suffix in ("ed", "ing"):
+            if w.endswith(suffix) and _has_vowel(w[:-len(suffix)]):
+                w = w[:-len(suffix)]
+                if w.endswith(("at", "bl", "iz")):
+                    w += "e"
+                elif _double_cons(w) and w[-1] not in "lsz":
+                    w = w[:-1]
+                elif _measure(w) == 1 and _cvc(w):
+                    w += "e"
+                break
+
+    # step 1c
+    if w.endswith("y") and _has_vowel(w[:-1]):
+        w = w[:-1] + "i"
+
+    w = _replace(w, _STEP2, 0)
+    w = _replace(w, _STEP3, 0)
+
+    # step 4
+    for suffix in _STEP4:
+        if w.endswith(suffix):
+            stem = w[:-len(suffix)]
+            if _measure(stem) > 1 and (suffix != "ion" or stem.endswith(("s", "t"))):
+                w = stem
+            break
+
+    # step 5a
+    if w.endswith("e"):
+        stem = w[:-1]
+        m = _measure(stem)
+        if m > 1 or (m == 1 and not _cvc(stem)):
+            w = stem
+
+    # step 5b
+    if _measure(w) > 1 and _double_cons(w) and w.endswith("l"):
+        w = w[:-1]
+    return w
+
+
+# ---------------------------------------------------------------------------
+# Build
+# ---------------------------------------------------------------------------
+
+def file_sha256(path: pathlib.Path) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def build_search_index(index_path: pathlib.Path) -> dict:
+    index_path = pathlib.Path(index_path)
+    chunks = []
+    postings: dict[str, list[list[int]]] = {}
+    df: dict[str, int] = {}
+    stem_cache: dict[str, str] = {}
+
+    with index_path.open(encoding="utf-8") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            ch = json.loads(line)
+            n = len(chunks)
+            full_text = f"{ch.get('title', '')} {ch.get('heading') or ''} {ch.get('markdown', '')}"
+            all_words = words(full_text)
+            terms = [w for w in all_words if w not in STOPWORDS]
+
+            counts: dict[str, int] = {}
+            for t in terms:
+                counts[t] = counts.get(t, 0) + 1
+            for t, c in counts.items():
+                postings.setdefault(t, []).append([n, c])
+
+            stems = []
+            for w in dict.fromkeys(all_words):
+                s = stem_cache.get(w)
+                if s is None:
+                    s = stem_cache[w] = porter_stem(w)
+                stems.append(s)
+
+            # the server counts document frequency over raw whitespace tokens of the body
+            for w in dict.fromkeys(w for w in (ch.get("markdown") or "").lower().split() if len(w) > 2):
+                df[w] = df.get(w, 0) + 1
+
+            total = len(terms)
+            chunks.append({
+                "id": ch["id"],
+                "keywords": top_keywords(terms),
+                "stems": list(dict.fromkeys(stems)),
+                "tf": {t: c / total for t, c in counts.items()},
+            })
+
+    n_chunks = len(chunks)
+    return {
+        "format": FORMAT,
+        "version": FORMAT_VERSION,
+        "source": {
+            "file": index_path.name,
+            "sha256": file_sha256(index_path),
+            "chunks": n_chunks,
+        },
+        "df": df,
+        "idf": {w: math.log(n_chunks / c) for w, c in df.items()},
+        "postings": postings,
+        "chunks": chunks,
+    }
+
+
+def write_search_index(index_path: pathlib.Path, out_path: Optional[pathlib.Path] = None) -> pathlib.Path:
+    index_path = pathlib.Path(index_path)
+    out_path = pathlib.Path(out_path) if out_path else index_path.with_name(SEARCH_INDEX_NAME)
+    artifact = build_search_index(index_path)
+    tmp = out_path.with_suffix(".tmp")
+    tmp.write_text(json.dumps(artifact, ensure_ascii=False, separators=(",", ":")), encoding="utf-8")
+    os.replace(tmp, out_path)
+    return out_path
+
+
+def is_current(index_path: pathlib.Path, artifact: dict) -> bool:
+    """True if ``artifact`` uses this format version and was built from ``index_path`` as it is now."""
+    return (artifact.get("format") == FORMAT
+            and artifact.get("version") == FORMAT_VERSION
+            and artifact.get("source", {}).get("sha256") == file_sha256(index_path))
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Build the precomputed search index for a corpus")
+    ap.add_argument("index", help="Path to index.jsonl")
+    ap.add_argument("--out", default=None, help=f"Output path (default: {SEARCH_INDEX_NAME} next to the index)")
+    args = ap.parse_args()
+    out = write_search_index(pathlib.Path(args.index), args.out)
+    print(f"Search index: {out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+"""Seed the crawl frontier from sitemap.xml or llms.txt (``--seed-from``).
+
+Without seeding, a page's children are only known once the page itself has
+been fetched and parsed, so the crawl fans out one level at a time. A sitemap
+(or the llms.txt index of a documentation site) lists the pages up front, so
+every known URL can be queued before the first fetch and the async engine
+runs at full width from the start. Link extraction still runs on every page
+and picks up whatever the index missed.
+
+Sitemaps are looked for in robots.txt ``Sitemap:`` lines, ``<root>/sitemap.xml``
+and ``/sitemap.xml``; sitemap indexes are followed. llms.txt is looked for at
+``<root>/llms.txt`` and ``/llms.txt``.
+"""
+import concurrent.futures
+import gzip
+import re
+import sys
+import urllib.parse
+import zlib
+import xml.etree.ElementTree as ET
+from typing import Callable, Optional
+
+SEEDS = ("none", "sitemap", "llms", "auto")
+MAX_SITEMAPS = 50
+_MD_LINK = re.compile(r"\[[^\]]*\]\(\s*<?([^)\s>]+)>?[^)]*\)")
+_BARE_URL = re.compile(r"(?<![(<])\bhttps?://[^\s)>\]]+")
+
+
+def _site_root(root: str) -> str:
+    s = urllib.parse.urlsplit(root)
+    return urllib.parse.urlunsplit((s.scheme, s.netloc, "/", "", ""))
+
+
+def _local(tag: str) -> str:
+    return tag.rsplit("}", 1)[-1]
+
+
+def parse_sitemap(data: bytes, source: str = "sitemap") -> tuple[list[str], list[str]]:
+    """``(page_urls, child_sitemaps)`` from a sitemap or sitemap index document.
+
+    A corrupt document is reported and yields nothing, leaving its pages to link discovery.
+    """
+    try:
+        if data[:2] == b"\x1f\x8b":
+            data = gzip.decompress(data)
+        root = ET.fromstring(data)
+    except (ET.ParseError, gzip.BadGzipFile, EOFError, zlib.error) as e:
+        print(f"Ignoring unreadable sitemap {source} ({e})", file=sys.stderr)
+        return [], []
+    locs = [el.text.strip() for el in root.iter() if _local(el.tag) == "loc" and el.text]
+    if _local(root.tag) == "sitemapindex":
+        return [], locs
+    return locs, []
+
+
+def parse_llms_txt(text: str, base: str) -> list[str]:
+    """Link targets in an llms.txt file, resolved against ``base``."""
+    urls = [urllib.parse.urljoin(base, m) for m in _MD_LINK.findall(text)]
+    urls.extend(_BARE_URL.findall(text))
+    return urls
+
+
+def sitemap_urls(get: Callable[[str], Optional[bytes]], root: str, concurrency: int = 8) -> list[str]:
+    """Page URLs from every sitemap found for ``root``; each level of an index is fetched concurrently."""
+    site = _site_root(root)
+    level = []
+    robots = get(urllib.parse.urljoin(site, "robots.txt"))
+    if robots:
+        for line in robots.decode("utf-8", "replace").splitlines():
+            key, _, value = line.partition(":")
+            if key.strip().lower() == "sitemap" and value.strip():
+                level.append(value.strip())
+    level += [root.rstrip("/") + "/sitemap.xml", urllib.parse.urljoin(site, "sitemap.xml")]
+
+    urls, seen = [], set()
+    with concurrent.futures.ThreadPoolExecutor(max_workers=concurrency) as pool:
+        while level:
+            level = [u for u in dict.fromkeys(level) if u not in seen][: MAX_SITEMAPS - len(seen)]
+            seen.update(level)
+            children = []
+            for url, data in zip(level, pool.map(get, level)):
+                if data:
+                    pages, nested = parse_sitemap(data, url)
+                    urls.extend(pages)
+                    children.extend(nested)
+            level = children
+    return urls
+
+
+def llms_urls(get: Callable[[str], Optional[bytes]], root: str) -> list[str]:
+    for candidate in (root.rstrip("/") + "/llms.txt", urllib.parse.urljoin(_site_root(root), "llms.txt")):
+        data = get(candidate)
+        if data:
+            return parse_llms_txt(data.decode("utf-8", "replace"), candidate)
+    return []
+
+
+def seed_urls(get: Callable[[str], Optional[bytes]], root: str, mode: str,
+              concurrency: int = 8) -> tuple[list[str], str]:
+    """URLs listed for the site and where they came from; ``auto`` tries the sitemap, then llms.txt.
+
+    ``get(url)`` returns the response body, or None if the URL is missing or fails.
+    """
+    if mode in ("sitemap", "auto"):
+        urls = sitemap_urls(get, root, concurrency)
+        if urls or mode == "sitemap":
+            return urls, "sitemap"
+    if mode in ("llms", "auto"):
+        return llms_urls(get, root), "llms.txt"
+    return [], ""
@@ -0,0 +1,269 @@
+#!/usr/bin/env python3
+"""Vectorized BM25F scoring over a sparse term-document matrix.
+
+query_engine.InvertedIndex scores a query by walking Python postings lists
+one chunk at a time. SparseIndex keeps the same postings as NumPy arrays in
+CSR layout: ``indptr`` gives each term's row, ``docs`` holds the chunk
+positions, and ``counts`` holds the term's count in each field. Scoring a
+query takes a few gathers and a bincount. Each posting's BM25F contribution
+depends only on k1, the field weights and b, so it is computed once per
+parameter set for the whole matrix. ``search_batch`` scores a whole block of
+queries in the same pass, for offline evaluation runs. The scores equal
+InvertedIndex.search's.
+
+Needs NumPy (``pip install numpy``).
+
+    python3 sparse_scoring.py --index ../corpus/index.jsonl search "screenshot shortcuts"
+    python3 sparse_scoring.py --index ../corpus/index.jsonl bench --queries queries.txt
+"""
+import argparse
+import gc
+import json
+import pathlib
+import statistics
+import time
+from typing import Optional
+
+from metrics import percentile
+from query_engine import DEFAULT_B, DEFAULT_INDEX, DEFAULT_K1, DEFAULT_WEIGHTS, FIELDS, InvertedIndex, analyze
+
+try:
+    import numpy as np
+except ImportError:  # optional, only needed for sparse scoring
+    np = None
+
+# query x chunk scores accumulated at once in search_batch; larger blocks fall out of
+# the CPU cache and score fewer queries per second, not more
+_BATCH_CELLS = 1 << 16
+
+
+def available() -> bool:
+    return np is not None
+
+
+def _top_k(scores, limit: int):
+    """Per row, the positions of the ``limit`` highest positive scores, best first (ties by position)."""
+    limit = min(limit, scores.shape[1])
+    if limit <= 0:
+        return [[] for _ in scores]
+    part = np.argpartition(-scores, limit - 1, axis=1)[:, :limit]
+    out = []
+    for row, cand in zip(scores, part):
+        cand = cand[row[cand] > 0]
+        out.append(cand[np.lexsort((cand, -row[cand]))])
+    return out
+
+
+class SparseIndex:
+    """BM25F over a CSR term-document matrix of per-field term counts."""
+
+    def __init__(self, chunks: list[dict]):
+        if np is None:
+            raise RuntimeError("sparse scoring needs NumPy (pip install numpy)")
+        self.chunks = chunks
+        self.terms: dict[str, int] = {}
+        rows: list[int] = []
+        docs: list[int] = []
+        counts: list[int] = []
+        lengths = np.zeros((len(FIELDS), len(chunks)), dtype=np.float64)
+        for doc, ch in enumerate(chunks):
+            per_term: dict[str, list[int]] = {}
+            for fi, field in enumerate(FIELDS):
+                tokens = analyze(ch.get(field) or "")
+                lengths[fi, doc] = len(tokens)
+                for term in tokens:
+                    c = per_term.get(term)
+                    if c is None:
+                        c = per_term[term] = [0] * len(FIELDS)
+                    c[fi] += 1
+            for term, c in per_term.items():
+                rows.append(self.terms.setdefault(term, len(self.terms)))
+                docs.append(doc)
+                counts.extend(c)
+
+        # entries were appended chunk by chunk; a stable sort by term keeps each row in chunk order
+        rows_arr = np.array(rows, dtype=np.int64)
+        order = np.argsort(rows_arr, kind="stable")
+        self.indptr = np.zeros(len(self.terms) + 1, dtype=np.int64)
+        self.indptr[1:] = np.cumsum(np.bincount(rows_arr, minlength=len(self.terms)))
+        self.docs = np.array(docs, dtype=np.int64)[order]
+        self.counts = np.ascontiguousarray(
+            np.array(counts, dtype=np.float64).reshape(-1, len(FIELDS))[order].T)
+        df = np.diff(self.indptr)
+        self.idf = np.log(1 + (len(chunks) - df + 0.5) / (df + 0.5))
+        self.lengths = lengths
+        avg = lengths.mean(axis=1) if len(chunks) else np.zeros(len(FIELDS))
+        self.avg_length = np.where(avg == 0, 1.0, avg)
+        self._impact_key: Optional[tuple] = None
+        self._impacts = None
+
+    @classmethod
+    def from_jsonl(cls, path) -> "SparseIndex":
+        with open(path, encoding="utf-8") as f:
+            return cls([json.loads(line) for line in f if line.strip()])
+
+    def __len__(self) -> int:
+        return len(self.chunks)
+
+    def impacts(self, k1: float, weights: dict, b: dict):
+        """Every posting's BM25F contribution ``idf * tf / (k1 + tf)``, cached for the last parameters."""
+        key = (k1, tuple(weights[f] for f in FIELDS), tuple(b[f] for f in FIELDS))
+        if key != self._impact_key:
+            tf = np.zeros(len(self.docs))
+            for fi, field in enumerate(FIELDS):
+                norm = 1 - b[field] + b[field] * self.lengths[fi] / self.avg_length[fi]
+                # like the postings loop, skip fields the term is absent from: with b=1 an empty
+                # field has norm 0
+                tf += weights[field] * np.divide(self.counts[fi], norm[self.docs], where=self.counts[fi] > 0,
+                                                 out=np.zeros(len(self.docs)))
+            idf = np.repeat(self.idf, np.diff(self.indptr))
+            self._impacts = idf * tf / (k1 + tf)
+            self._impact_key = key
+        return self._impacts
+
+    def term_rows(self, query: str) -> list[int]:
+        return [self.terms[t] for t in dict.fromkeys(analyze(query)) if t in self.terms]
+
+    def _contributions(self, term_rows, impacts, offsets=None):
+        """``(cells, contribution)`` for every posting of ``term_rows``: the posting's chunk,
+        plus the row's entry in ``offsets`` when scoring several queries into one array."""
+        term_rows = np.asarray(term_rows, dtype=np.int64)
+        starts, ends = self.indptr[term_rows], self.indptr[term_rows + 1]
+        sizes = ends - starts
+        # positions of all the rows' entries, without a Python loop over the rows
+        entries = np.arange(sizes.sum()) + np.repeat(starts - np.cumsum(sizes) + sizes, sizes)
+        cells = self.docs[entries]
+        if offsets is not None:
+            cells = cells + np.repeat(offsets, sizes)
+        return cells, impacts[entries]
+
+    def scores(self, query: str, k1: float = DEFAULT_K1, weights: Optional[dict] = None,
+               b: Optional[dict] = None):
+        """BM25F score of every chunk for ``query``, as an array in index.jsonl order."""
+        impacts = self.impacts(k1, weights or DEFAULT_WEIGHTS, b or DEFAULT_B)
+        docs, contrib = self._contributions(self.term_rows(query), impacts)
+        return np.bincount(docs, weights=contrib, minlength=len(self.chunks))
+
+    def search(self, query: str, limit: int = 10, k1: float = DEFAULT_K1,
+               weights: Optional[dict] = None, b: Optional[dict] = None) -> list[tuple[float, dict]]:
+        """Same results as InvertedIndex.search."""
+        scores = self.scores(query, k1, weights, b)
+        return [(float(scores[i]), self.chunks[i]) for i in _top_k(scores[None], limit)[0]]
+
+    def search_batch(self, queries: list[str], limit: int = 10, k1: float = DEFAULT_K1,
+                     weights: Optional[dict] = None, b: Optional[dict] = None) -> list[list[tuple[float, dict]]]:
+        """search() for every query, scoring a block of queries per vectorized pass."""
+        impacts = self.impacts(k1, weights or DEFAULT_WEIGHTS, b or DEFAULT_B)
+        n = max(1, len(self.chunks))
+        block = max(1, _BATCH_CELLS // n)
+        results = []
+        for start in range(0, len(queries), block):
+            rows_per_query = [self.term_rows(q) for q in queries[start:start + block]]
+            # query i's scores live in cells [i * n, (i + 1) * n)
+            offsets = np.repeat(np.arange(len(rows_per_query)) * n, [len(r) for r in rows_per_query])
+            cells, contrib = self._contributions([t for r in rows_per_query for t in r], impacts,
+                                                 offsets if len(rows_per_query) > 1 else None)
+            scores = np.bincount(cells, weights=contrib, minlength=len(rows_per_query) * n)
+            scores = scores.reshape(len(rows_per_query), n)[:, :len(self.chunks)]
+            for row, top in zip(scores, _top_k(scores, limit)):
+                results.append([(float(row[i]), self.chunks[i]) for i in top])
+        return results
+
+
+def load_queries(path: Optional[str], chunks: list[dict], limit: int = 1000) -> list[str]:
+    """Queries from a file (one per line, ``#`` comments), or else the chunks' headings."""
+    if path:
+        lines = pathlib.Path(path).read_text(encoding="utf-8").splitlines()
+        return [q.strip() for q in lines if q.strip() and not q.startswith("#")]
+    headings = dict.fromkeys(ch.get("heading") or ch.get("title", "") for ch in chunks)
+    return [h for h in headings if h][:limit]
+
+
+def cmd_bench(args) -> None:
+    start = time.perf_counter()
+    inverted = InvertedIndex.from_jsonl(args.index)
+    inverted_ms = (time.perf_counter() - start) * 1000
+    start = time.perf_counter()
+    sparse = SparseIndex(inverted.chunks)
+    sparse_ms = (time.perf_counter() - start) * 1000
+    start = time.perf_counter()
+    sparse.impacts(DEFAULT_K1, DEFAULT_WEIGHTS, DEFAULT_B)
+    impacts_ms = (time.perf_counter() - start) * 1000
+    queries = load_queries(args.queries, inverted.chunks)
+    if not queries:
+        print(f"No queries to run in {args.queries or args.index}")
+        return
+    # the postings index is millions of Python objects; keep full GC passes over them out of the timings
+    gc.collect()
+    gc.freeze()
+    print(f"Index: {len(sparse)} chunks, {len(sparse.terms)} terms, {len(sparse.docs)} postings; "
+          f"built in {inverted_ms:.0f}ms (postings) / {sparse_ms:.0f}ms (sparse) "
+          f"+ {impacts_ms:.0f}ms (BM25F impacts)")
+    print(f"Queries: {len(queries)}, limit {args.limit}\n")
+
+    def per_query(search):
+        timings, results = [], []
+        for q in queries:
+            start = time.perf_counter()
+            results.append(search(q, limit=args.limit))
+            timings.append((time.perf_counter() - start) * 1000)
+        return timings, results
+
+    loop_ms, expected = per_query(inverted.search)
+    sparse_q_ms, got = per_query(sparse.search)
+    start = time.perf_counter()
+    batch = sparse.search_batch(queries, limit=args.limit)
+    batch_s = time.perf_counter() - start
+
+    print(f"{'engine':<16} {'mean ms':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'queries/s':>10}")
+    for name, timings in (("postings loop", loop_ms), ("sparse", sparse_q_ms)):
+        print(f"{name:<16} {statistics.fmean(timings):>8.3f} {percentile(timings, 50):>8.3f} "
+              f"{percentile(timings, 95):>8.3f} {percentile(timings, 99):>8.3f} "
+              f"{len(queries) / (sum(timings) / 1000):>10.0f}")
+    print(f"{'sparse batch':<16} {batch_s * 1000 / len(queries):>8.3f} {'':>8} {'':>8} {'':>8} "
+          f"{len(queries) / batch_s:>10.0f}")
+
+    def score_lists(results):
+        return [[round(score, 9) for score, _ in r] for r in results]
+
+    mismatched = sum(a != b or a != c for a, b, c in
+                     zip(score_lists(expected), score_lists(got), score_lists(batch)))
+    print(f"\nTop-{args.limit} scores differing from the postings loop: {mismatched} of {len(queries)} queries")
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Score queries with BM25F over a sparse term-document matrix")
+    ap.add_argument("--index", default=str(DEFAULT_INDEX), help="Path to index.jsonl (default: %(default)s)")
+    sub = ap.add_subparsers(dest="command", required=True)
+
+    sp = sub.add_parser("search", help="Score one or more queries in one batch and print the ranked chunks")
+    sp.add_argument("query", nargs="+")
+    sp.add_argument("--limit", type=int, default=10, help="Max results per query (default: 10)")
+
+    bp = sub.add_parser("bench", help="Compare per-query and batch scoring with query_engine's postings loop")
+    bp.add_argument("--queries", default=None,
+                    help="File with one query per line (default: the corpus's first 1000 distinct headings)")
+    bp.add_argument("--limit", type=int, default=10, help="Max results per query (default: 10)")
+
+    args = ap.parse_args()
+    if np is None:
+        ap.error("sparse scoring needs NumPy (pip install numpy)")
+    if args.command == "bench":
+        cmd_bench(args)
+        return
+
+    index = SparseIndex.from_jsonl(args.index)
+    start = time.perf_counter()
+    batch = index.search_batch(args.query, limit=args.limit)
+    elapsed = (time.perf_counter() - start) * 1000
+    for query, results in zip(args.query, batch):
+        print(f"# {query}")
+        for rank, (score, ch) in enumerate(results, 1):
+            heading = f" — {ch['heading']}" if ch.get("heading") else ""
+            print(f"{rank:2d}. {score:7.3f}  {ch['id']}  {ch['title']}{heading}")
+            print(f"    {ch['url']}")
+    print(f"\n{len(args.query)} queries in {elapsed:.2f}ms")
+
+
+if __name__ == "__main__":
+    main()
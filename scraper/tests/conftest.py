@@ -0,0 +1,5 @@
+import pathlib
+import sys
+
+# the scraper modules import each other as top-level modules
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parent.parent))
@@ -0,0 +1,69 @@
+import json
+import threading
+
+import pytest
+
+pytest.importorskip("bs4")
+pytest.importorskip("requests")
+
+import fixture_site
+from generations import CURRENT, MANIFEST, Generations
+from incremental import MANIFEST_NAME
+from page_store import open_page_store
+from scrape_and_build_omarchy import crawl_and_build
+from search_index import file_sha256
+
+
+@pytest.fixture
+def site():
+    return fixture_site.SyntheticManual(pages=12, links=4, words=120, nav_links=6)
+
+
+@pytest.fixture
+def site_root(site):
+    server = fixture_site.serve(site)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_port}{fixture_site.ROOT_PATH}/", site.pages + 1
+    server.shutdown()
+
+
+def chunks_by_url(index) -> dict[str, list[dict]]:
+    by_url = {}
+    for line in index.read_text(encoding="utf-8").splitlines():
+        chunk = json.loads(line)
+        by_url.setdefault(chunk["url"], []).append(chunk)
+    return by_url
+
+
+def test_plain_build_after_generations_publishes_a_new_generation(tmp_path, site_root):
+    root, max_pages = site_root
+    crawl_and_build(root, tmp_path, wait_sec=0.0, max_pages=max_pages, host_rate=0.0, generations=2)
+    first = Generations(tmp_path).current()
+    crawl_and_build(root, tmp_path, wait_sec=0.0, max_pages=max_pages, host_rate=0.0)
+
+    current = Generations(tmp_path).current()
+    assert current != first and len(Generations(tmp_path).all()) == 2
+    assert (tmp_path / "index.jsonl").is_symlink()
+    files = json.loads((tmp_path / CURRENT / MANIFEST).read_text(encoding="utf-8"))["files"]
+    for name in ("index.jsonl", "search-index.json"):
+        assert file_sha256(tmp_path / name) == files[name]["sha256"]
+    assert first.is_dir() and file_sha256(first / "index.jsonl") == json.loads(
+        (first / MANIFEST).read_text(encoding="utf-8"))["files"]["index.jsonl"]["sha256"]
+
+
+def test_incremental_keeps_pages_that_fail(tmp_path, site, site_root, monkeypatch):
+    root, max_pages = site_root
+    crawl_and_build(root, tmp_path, wait_sec=0.0, max_pages=max_pages, host_rate=0.0, incremental=True)
+    before = chunks_by_url(tmp_path / "index.jsonl")
+    broken = site.path(5)
+    url = next(u for u in before if u.endswith(broken))
+
+    render = site.render
+    monkeypatch.setattr(site, "render", lambda path: None if path == broken else render(path))
+    crawl_and_build(root, tmp_path, wait_sec=0.0, max_pages=max_pages, host_rate=0.0, incremental=True,
+                    retries=0)
+
+    assert chunks_by_url(tmp_path / "index.jsonl")[url] == before[url]
+    assert url in json.loads((tmp_path / MANIFEST_NAME).read_text(encoding="utf-8"))["pages"]
+    assert url in open_page_store(tmp_path, "files")
+    assert url in (tmp_path / "retry-urls.txt").read_text(encoding="utf-8").split()
@@ -0,0 +1,62 @@
+import random
+
+import pytest
+
+from chunking import chunk_by_tokens, estimate_tokens, split_blocks
+
+WORDS = "the a omarchy hyprland waybar config keybinding terminal install package theme font".split()
+
+
+def random_markdown(rng: random.Random) -> str:
+    """Headings of every level (often stacked), paragraphs, list items and code of random sizes."""
+    sentence = lambda n: " ".join(rng.choice(WORDS) for _ in range(n)).capitalize() + "."
+    blocks = []
+    for _ in range(rng.randint(1, 40)):
+        kind = rng.random()
+        if kind < 0.3:
+            blocks.append("#" * rng.randint(1, 4) + " " + sentence(rng.randint(1, 12)))
+        elif kind < 0.6:
+            blocks.append(" ".join(sentence(rng.randint(3, 20)) for _ in range(rng.randint(1, 8))))
+        elif kind < 0.8:
+            blocks.append(f"- {sentence(rng.randint(2, 15))}")
+        else:
+            lines = [sentence(rng.randint(1, 10)) for _ in range(rng.randint(1, 12))]
+            blocks.append("```\n" + "\n".join(lines) + "\n```")
+    return "\n\n".join(blocks)
+
+
+@pytest.mark.parametrize("seed", range(300))
+def test_chunks_fit_the_token_budget(seed):
+    rng = random.Random(seed)
+    md = random_markdown(rng)
+    max_tokens = rng.choice([16, 24, 32, 64, 128])
+    overlap = rng.choice([0, 4, 8, max_tokens // 2])
+    chunks = list(chunk_by_tokens(md, "Title", "https://example.org/p", max_tokens, overlap))
+    for chunk in chunks:
+        blocks = split_blocks(chunk["markdown"])
+        # a single word longer than the budget cannot be split any further
+        assert estimate_tokens(chunk["markdown"]) <= max_tokens or (
+            len(blocks) == 1 and len(blocks[0][1].split()) == 1)
+    # nothing is dropped to make room, headings included
+    emitted = {text for chunk in chunks for _, text in split_blocks(chunk["markdown"])}
+    assert all(text in emitted for _, text in split_blocks(md) if estimate_tokens(text) <= max_tokens)
+
+
+def section(name: str, n: int) -> str:
+    return f"## {name}\n\n" + " ".join(f"{name.lower()}{i}" for i in range(n)) + "."
+
+
+def test_chunk_ids_survive_edits_elsewhere_on_the_page():
+    pytest.importorskip("bs4")
+    from scrape_and_build_omarchy import chunk_markdown
+
+    names = ["Install", "Keybindings", "Themes", "Troubleshooting"]
+    page = "# Manual\n\n" + "\n\n".join(section(name, 60) for name in names)
+    edited = page.replace("install59.", "install59.\n\nA new paragraph inserted into the first section.")
+    url = "https://example.org/manual/page"
+    before = {ch["heading"]: ch["id"] for ch in chunk_markdown(page, "Manual", url)}
+    after = {ch["heading"]: ch["id"] for ch in chunk_markdown(edited, "Manual", url)}
+
+    assert before.keys() == after.keys() and set(names) <= before.keys()
+    assert before["Install"] != after["Install"]
+    assert all(before[name] == after[name] for name in names[1:])
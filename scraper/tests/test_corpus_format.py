@@ -0,0 +1,18 @@
+import json
+
+import corpus_format
+
+
+def test_export_removes_other_formats(tmp_path):
+    index = tmp_path / "index.jsonl"
+    index.write_text("".join(json.dumps({"id": str(i), "title": "T", "heading": "H", "url": "u",
+                                         "markdown": f"chunk {i}"}) + "\n" for i in range(3)),
+                     encoding="utf-8")
+    gz = corpus_format.export(index, "jsonl.gz")
+    assert gz.exists() and corpus_format.frame_index_path(gz).exists()
+
+    columns = corpus_format.export(index, "columnar")
+    assert columns.is_dir() and not gz.exists() and not corpus_format.frame_index_path(gz).exists()
+
+    assert corpus_format.export(index, "jsonl") is None
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["index.jsonl"]
@@ -0,0 +1,50 @@
+import json
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+import ann
+import embeddings
+
+CHUNKS = [
+    {"id": f"c{i}", "title": "Manual", "heading": heading, "url": f"https://example.invalid/{i}", "markdown": body}
+    for i, (heading, body) in enumerate([
+        ("Screenshots", "Take a screenshot of a region or the whole screen with the print key."),
+        ("Wallpaper", "Change the desktop background image from the theme menu."),
+        ("Wi-Fi", "Connect to a wireless network with the network manager."),
+        ("Bluetooth", "Pair headphones and other bluetooth devices."),
+    ] * 5)
+]
+
+
+def write_index(tmp_path, chunks):
+    path = tmp_path / "index.jsonl"
+    path.write_text("".join(json.dumps(ch) + "\n" for ch in chunks), encoding="utf-8")
+    return path
+
+
+def test_search_finds_matching_chunk(tmp_path):
+    index_path = write_index(tmp_path, CHUNKS)
+    embeddings.write_embeddings(index_path, dims=8, ann_lists=0)
+    index = embeddings.EmbeddingIndex(index_path)
+    assert len(index) == len(CHUNKS) and index.ivf is not None and not index.stale
+    for exact in (True, False):
+        (score, pos), *_ = index.search("desktop background", limit=3, exact=exact)
+        assert CHUNKS[pos]["heading"] == "Wallpaper" and score > 0
+
+
+def test_empty_corpus(tmp_path):
+    index_path = write_index(tmp_path, [])
+    embeddings.write_embeddings(index_path, dims=8, ann_lists=0)
+    index = embeddings.EmbeddingIndex(index_path)
+    assert len(index) == 0
+    assert index.search("anything", exact=True) == []
+    assert index.search("anything") == []
+
+
+def test_ivf_empty_and_single_vector(tmp_path):
+    empty = ann.IVFIndex(ann.build_ivf(np.zeros((0, 4), dtype=np.float32), tmp_path / "empty"))
+    assert empty.search(np.ones(4, dtype=np.float32)) == []
+    one = ann.IVFIndex(ann.build_ivf(np.array([[1, 0, 0, 0]], dtype=np.float32), tmp_path / "one"))
+    assert one.search(np.array([1, 0, 0, 0], dtype=np.float32), limit=5) == [(1.0, 0)]
@@ -0,0 +1,54 @@
+import os
+import subprocess
+import sys
+import time
+
+import generations
+from generations import PARTIAL, Generations
+
+
+def dead_pid() -> int:
+    proc = subprocess.Popen([sys.executable, "-c", "pass"])
+    proc.wait()
+    return proc.pid
+
+
+def test_prune_keeps_partials_of_live_builds(tmp_path):
+    gens = Generations(tmp_path, keep=1)
+    gens.root.mkdir()
+    live = gens.root / f"20260101T000000-{os.getppid()}{PARTIAL}"
+    dead = gens.root / f"20260101T000001-{dead_pid()}{PARTIAL}"
+    old = gens.root / f"20260101T000002-{os.getppid()}{PARTIAL}"
+    for path in (live, dead, old):
+        path.mkdir()
+    stale = time.time() - generations.STALE_PARTIAL - 60
+    os.utime(old, (stale, stale))
+
+    mine = gens.begin()
+    (mine / "index.jsonl").write_text("", encoding="utf-8")
+    gens.publish(mine, {})
+    assert live.is_dir()
+    assert not dead.exists() and not old.exists()
+
+
+def test_resume_adopts_only_abandoned_partials(tmp_path):
+    gens = Generations(tmp_path)
+    gens.root.mkdir()
+    (gens.root / f"20260101T000009-{os.getppid()}{PARTIAL}").mkdir()
+    crashed = gens.root / f"20260101T000001-{dead_pid()}{PARTIAL}"
+    crashed.mkdir()
+    assert gens.latest_partial() == crashed
+    adopted = gens.adopt(crashed)
+    assert adopted.name == f"20260101T000001-{os.getpid()}{PARTIAL}" and adopted.is_dir()
+    assert gens.latest_partial() is None
+
+
+def test_builds_within_one_second_get_distinct_generations(tmp_path):
+    gens = Generations(tmp_path, keep=3)
+    published = []
+    for _ in range(3):
+        build = gens.begin()
+        (build / "index.jsonl").write_text(build.name, encoding="utf-8")
+        published.append(gens.publish(build, {}))
+    assert len(set(published)) == 3
+    assert gens.all() == published and gens.current() == published[-1]
@@ -0,0 +1,28 @@
+import json
+
+from incremental import MANIFEST_NAME, MANIFEST_VERSION, IncrementalBuild
+
+
+def write_manifest(out_dir, builder, pages):
+    (out_dir / MANIFEST_NAME).write_text(
+        json.dumps({"version": MANIFEST_VERSION, "builder": builder, "pages": pages}), encoding="utf-8")
+
+
+def test_unchanged_page_without_old_lines_counts_as_unchanged(tmp_path):
+    # a resumed in-place build: the manifest survives but index.jsonl was already rewritten
+    write_manifest(tmp_path, "4", {"u1": {"hash": "h1", "chunks": ["c1"]},
+                                   "u2": {"hash": "h2", "chunks": ["c2"]}})
+    (tmp_path / "index.jsonl").write_text("", encoding="utf-8")
+    build = IncrementalBuild(tmp_path, "4")
+    assert build.previous_lines("u1", "h1") is None
+    build.record("u1", "h1", ["c1"])
+    build.record("u2", "h2-new", ["c2"])
+    build.record("u3", "h3", ["c3"])
+    assert build.counts == {"added": 1, "changed": 1, "unchanged": 1, "kept": 0, "removed": 0}
+
+
+def test_new_builder_counts_rechunked_pages_as_changed(tmp_path):
+    write_manifest(tmp_path, "3", {"u1": {"hash": "h1", "chunks": ["c1"]}})
+    build = IncrementalBuild(tmp_path, "4")
+    build.record("u1", "h1", ["c1-new"])
+    assert build.counts["changed"] == 1 and build.counts["unchanged"] == 0
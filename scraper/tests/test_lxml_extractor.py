@@ -0,0 +1,49 @@
+import pathlib
+
+import pytest
+
+pytest.importorskip("bs4")
+pytest.importorskip("lxml")
+
+import lxml_extractor
+from scrape_and_build_omarchy import html_to_markdown, parse_html
+
+FIXTURES = sorted((pathlib.Path(__file__).parent.parent / "fixtures").glob("*.html"))
+
+EDGE_CASES = {
+    "nested-lists": """<html><body><main><h1>Lists</h1>
+        <ul><li>One<ul><li>One a</li><li>One b<ol><li>deep</li></ol></li></ul></li>
+        <li>Two <a href="/two">link</a></li></ul>
+        <ol><li>First</li><li><p>Second</p><ul><li>inner</li></ul></li></ol>
+        </main></body></html>""",
+    "pre-in-table": """<html><body><main><h1>Table</h1>
+        <table><tr><th>Key</th><th>Command</th></tr>
+        <tr><td>Super+Enter</td><td><pre><code>alacritty
+--working-directory ~</code></pre></td></tr>
+        <tr><td><code>inline</code></td><td><p>text <a href="t">in</a> cell</p></td></tr></table>
+        <pre>top-level
+  indented</pre>
+        </main></body></html>""",
+    "pruned-chrome": """<html><head><title>Pruned</title></head><body>
+        <header><a href="/home">Home</a></header>
+        <nav><ul><li><a href="/a">A</a></li></ul></nav>
+        <main><h1>Page</h1>
+        <div class="toc-wrapper"><ul><li><a href="#s">Section</a></li></ul></div>
+        <aside><p>Aside text</p></aside>
+        <div role="navigation"><a href="/prev">Prev</a></div>
+        <ul class="sidebar-list"><li class="menu-item">hidden</li></ul>
+        <h2 id="s">Section</h2><p>Kept <button>Copy</button> text.</p>
+        <ul><li class="nav-item">nav item</li><li>real item</li></ul>
+        <script>var x = 1;</script>
+        </main><footer>Footer <a href="/legal">Legal</a></footer></body></html>""",
+}
+
+CASES = [pytest.param(p.read_text(encoding="utf-8"), id=p.name) for p in FIXTURES] + [
+    pytest.param(html, id=name) for name, html in EDGE_CASES.items()]
+
+
+@pytest.mark.parametrize("html", CASES)
+def test_lxml_extractor_matches_bs4(html):
+    doc = lxml_extractor.parse(html)
+    assert lxml_extractor.to_markdown(doc) == html_to_markdown(parse_html(html))
+    assert lxml_extractor.links(doc) == [a.get("href", "") for a in parse_html(html).select("a[href]")]
@@ -0,0 +1,24 @@
+import os
+
+from page_store import PAGES_DIR, SQLITE_NAME, open_page_store
+
+PAGE = {"url": "https://example.org/manual/a", "title": "A", "markdown": "# A\n\nText"}
+
+
+def test_readonly_sqlite_store_leaves_the_file_untouched(tmp_path):
+    store = open_page_store(tmp_path, "sqlite")
+    store.put(PAGE)
+    store.close()
+    os.chmod(tmp_path / SQLITE_NAME, 0o444)
+    before = sorted(os.listdir(tmp_path)), (tmp_path / SQLITE_NAME).stat().st_mtime_ns
+
+    store = open_page_store(tmp_path, "sqlite", readonly=True)
+    assert store.get(PAGE["url"]) == PAGE and store.get("https://example.org/other") is None
+    store.close()
+    assert (sorted(os.listdir(tmp_path)), (tmp_path / SQLITE_NAME).stat().st_mtime_ns) == before
+
+
+def test_readonly_file_store_creates_nothing(tmp_path):
+    store = open_page_store(tmp_path, "files", readonly=True)
+    assert store.get(PAGE["url"]) is None
+    assert not (tmp_path / PAGES_DIR).exists()
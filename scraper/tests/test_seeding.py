@@ -0,0 +1,16 @@
+import gzip
+
+from seeding import parse_sitemap
+
+SITEMAP = b"<urlset><url><loc>https://example.invalid/a</loc></url></urlset>"
+
+
+def test_gzipped_sitemap():
+    assert parse_sitemap(gzip.compress(SITEMAP)) == (["https://example.invalid/a"], [])
+
+
+def test_corrupt_sitemaps_yield_nothing(capsys):
+    packed = gzip.compress(SITEMAP)
+    for data in (packed[:-8], packed[:12], b"\x1f\x8bnot gzip at all", b"<urlset><url>"):
+        assert parse_sitemap(data, "sitemap.xml.gz") == ([], [])
+    assert "sitemap.xml.gz" in capsys.readouterr().err
@@ -0,0 +1,35 @@
+import random
+
+import pytest
+
+pytest.importorskip("numpy")
+
+from query_engine import InvertedIndex
+from sparse_scoring import SparseIndex
+
+WORDS = ("install update wifi network screenshot keybinding theme font terminal browser "
+         "hyprland waybar config package manual battery display audio bluetooth backup").split()
+QUERIES = ["wifi network", "install", "screenshot keybindings", "themes and fonts", "backup battery display",
+           "terminal", "hyprland waybar config", "nothing matches zzz", "updating packages", "audio bluetooth"]
+
+
+def corpus(n=60, seed=3) -> list[dict]:
+    rng = random.Random(seed)
+    words = lambda k: " ".join(rng.choice(WORDS) for _ in range(k))
+    return [{"id": f"c{i}", "title": words(rng.randint(1, 3)), "heading": words(rng.randint(0, 4)),
+             "url": f"https://example.invalid/{i}", "markdown": words(rng.randint(5, 80))} for i in range(n)]
+
+
+@pytest.mark.parametrize("params", [{}, {"k1": 2.0, "weights": {"title": 1.0, "heading": 1.0, "markdown": 1.0},
+                                        "b": {"title": 0.0, "heading": 1.0, "markdown": 0.3}}])
+def test_sparse_scores_match_the_postings_loop(params):
+    chunks = corpus()
+    loop, sparse = InvertedIndex(chunks), SparseIndex(chunks)
+    batch = sparse.search_batch(QUERIES, 10, **params)
+    for query, batched in zip(QUERIES, batch):
+        expected = loop.search(query, 10, **params)
+        everything = {ch["id"]: score for score, ch in loop.search(query, len(chunks), **params)}
+        for got in (sparse.search(query, 10, **params), batched):
+            assert [s for s, _ in got] == pytest.approx([s for s, _ in expected])
+            # each hit carries its own postings-loop score, so the top k agree up to ties
+            assert all(score == pytest.approx(everything[ch["id"]]) for score, ch in got)
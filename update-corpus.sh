@@ -8,6 +8,7 @@ SCRIPT_DIR="$(cd "$(dirname "${BASH_SOURCE[0]}")" && pwd)"
 SCRAPER_DIR="$SCRIPT_DIR/scraper"
 CORPUS_DIR="$SCRIPT_DIR/corpus"
 VENV_DIR="$SCRAPER_DIR/.venv"
+CACHE_DIR="$SCRAPER_DIR/.http-cache"
 
 echo "╔═══════════════════════════════════════════════════════════════════╗"
 echo "║          Omarchy MCP Corpus Update Script                        ║"
@@ -21,12 +22,10 @@ if [ ! -d "$VENV_DIR" ]; then
     exit 1
 fi
 
-# Backup existing corpus if it exists
+# No backup copy needed: the build goes into a new generation directory and
+# corpus/current only switches to it once it is complete (last 3 are kept).
 if [ -d "$CORPUS_DIR" ]; then
-    BACKUP_NAME="corpus.backup-$(date +%Y%m%d-%H%M%S)"
-    echo "📦 Backing up existing corpus to $BACKUP_NAME..."
-    mv "$CORPUS_DIR" "$SCRIPT_DIR/$BACKUP_NAME"
-    echo "✅ Backup created"
+    echo "ℹ️  Existing corpus stays live until the new generation is complete"
 else
     echo "ℹ️  No existing corpus found, creating new one"
 fi
@@ -41,25 +40,26 @@ echo ""
 cd "$SCRAPER_DIR"
 source "$VENV_DIR/bin/activate"
 
+# Corpora built before the packed page store keep one file per page in pages/
+if [ -d "$CORPUS_DIR/pages" ] && [ ! -f "$CORPUS_DIR/pages.sqlite" ]; then
+    python3 page_store.py migrate "$CORPUS_DIR" --remove
+fi
+
 python3 scrape_and_build_omarchy.py \
     --root https://learn.omacom.io/2/the-omarchy-manual/ \
     --out "$CORPUS_DIR" \
     --wait 1.0 \
-    --max-pages 200
+    --max-pages 200 \
+    --cache-dir "$CACHE_DIR" \
+    --incremental \
+    --page-store sqlite \
+    --generations 3 \
+    --resume || SCRAPE_FAILED=1
 
 # Check if scraping was successful
-if [ ! -f "$CORPUS_DIR/index.jsonl" ]; then
+if [ -n "$SCRAPE_FAILED" ] || [ ! -f "$CORPUS_DIR/index.jsonl" ]; then
     echo ""
-    echo "❌ Scraping failed! index.jsonl not found"
-    echo "   Restoring backup..."
-
-    # Find latest backup
-    LATEST_BACKUP=$(ls -dt "$SCRIPT_DIR"/corpus.backup-* 2>/dev/null | head -1)
-    if [ -n "$LATEST_BACKUP" ]; then
-        rm -rf "$CORPUS_DIR"
-        mv "$LATEST_BACKUP" "$CORPUS_DIR"
-        echo "✅ Backup restored"
-    fi
+    echo "❌ Scraping failed! The previous corpus generation is still live."
     exit 1
 fi
 
@@ -83,15 +83,10 @@ echo "   2. Restart Claude Code"
 echo "   3. Test with: 'search omarchy manual for shortcuts'"
 echo ""
 
-# Show backups
-BACKUP_COUNT=$(ls -d "$SCRIPT_DIR"/corpus.backup-* 2>/dev/null | wc -l)
-if [ "$BACKUP_COUNT" -gt 0 ]; then
-    echo "📦 Old backups available ($BACKUP_COUNT):"
-    ls -dt "$SCRIPT_DIR"/corpus.backup-* | head -3
-    echo ""
-    if [ "$BACKUP_COUNT" -gt 5 ]; then
-        echo "💡 Tip: Clean up old backups with: rm -rf corpus.backup-*"
-    fi
-fi
+# Show generations
+echo "📦 Corpus generations (* = live):"
+python3 generations.py list "$CORPUS_DIR"
+echo "   Roll back with: cd scraper && python3 generations.py rollback ../corpus"
+echo ""
 
 echo "✅ Done!"